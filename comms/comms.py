@@ -1,5 +1,5 @@
-import time
 from coordinator import Provider
+from telemetry import record_latencies
 
 try:
     from radio import Radio
@@ -19,9 +19,20 @@ class Comms(Provider):
 
         self._is_second_comms = is_second_comms
         self._radio = None
+        # avoid spamming the xbee radio
+        self._target_frequency = 1 / Radio.MESSAGE_DELAY
 
         self._owned_fields = ['_blue_robot_status'] if team == 'blue' \
             else ['_yellow_robot_status']
+        # we only need our own team's robots
+        self._subscribed_fields = [
+            '_{}_robot_positions'.format(team),
+            '_robot_states',
+            '_{}_robot_commands'.format(team),
+            '_{}_command_trace'.format(team),
+        ]
+        # frame number of the last command trace we recorded latencies for
+        self._last_traced_frame = None
 
         # self._receive_loop_sleep = Radio.MESSAGE_DELAY
         # self._messages_received = []
@@ -45,6 +56,11 @@ class Comms(Provider):
         # send serialized message for whole team
         message = RobotCommands.get_serialized_team_command(team_commands)
         self._radio.send(message)
+        trace = self.gs.get_command_trace(self._team)
+        if trace is not None and \
+                trace['frame_number'] != self._last_traced_frame:
+            self._last_traced_frame = trace['frame_number']
+            record_latencies(self.telemetry, trace, self.gs.clock())
         for robot_id, commands in team_commands.items():
             robot_status = self.gs.get_robot_status(self._team, robot_id)
             # simulate charge of capacitors according to commands
@@ -53,8 +69,6 @@ class Comms(Provider):
             # TODO: UNTESTED
             if commands.is_kicking:
                 robot_status.charge_level = 0
-        # sleep to avoid spamming the xbee radio
-        time.sleep(Radio.MESSAGE_DELAY)
 
     def post_run(self):
         if self._radio is not None:
@@ -4,17 +4,134 @@ Only modify it as last resort, or if you have debugging time available.
 """
 from multiprocessing import Queue
 from multiprocessing import Process, Event
+from multiprocessing.connection import wait
 import traceback
 import logging
 from logging.handlers import SocketHandler
 import signal
 import sys
 import time
+import random
+import numpy as np
 from queue import Empty, Full
+from telemetry import ProviderTelemetry, write_metrics, format_summary, \
+    latency_report
+from log_pipeline import LogPipeline
 
 
 # Do not make this large or bad things will happen
 MAX_Q_SIZE = 1
+# Default limit on how often the coordinator pushes new data to providers
+MAX_PUBLISH_RATE = 100  # Hz
+# Push to providers at least this often even when nothing changed, so
+# providers waiting on new data keep running
+HEARTBEAT_INTERVAL = .05  # s
+# How often providers report their scheduling stats and timings
+REPORT_INTERVAL = 5  # s
+# Where the coordinator appends the providers' timing stats
+METRICS_FILE = 'logs/metrics.jsonl'
+
+
+class ProviderScheduler(object):
+    """
+    Runs a provider loop at a fixed target frequency. Each tick it sleeps
+    only for whatever is left of the period, and it keeps track of the
+    ticks that went over budget (overruns), how late ticks start (jitter)
+    and the frequency actually achieved.
+    With no target frequency the loop runs as fast as it can, but the
+    stats are still recorded.
+    """
+    def __init__(self, frequency=None):
+        self.target_frequency = frequency
+        self.period = 1 / frequency if frequency else None
+        self.reset()
+
+    def reset(self):
+        self.ticks = 0
+        self.overruns = 0
+        self.first_tick_time = None
+        self.tick_start_time = None
+        # when the next tick is supposed to start
+        self.scheduled_time = None
+        self.total_jitter = 0
+        self.max_jitter = 0
+        self.max_tick_duration = 0
+
+    def is_fixed_rate(self):
+        return self.period is not None
+
+    def start_tick(self):
+        now = time.time()
+        if self.first_tick_time is None:
+            self.first_tick_time = now
+        if self.scheduled_time is not None:
+            jitter = now - self.scheduled_time
+            self.total_jitter += jitter
+            self.max_jitter = max(self.max_jitter, jitter)
+        self.tick_start_time = now
+
+    def end_tick(self, stop_event=None):
+        """
+        Records the tick that just finished and sleeps for the rest of the
+        period (waking early if stop_event is set).
+        Returns the time left in the period, negative if we overran.
+        """
+        now = time.time()
+        self.ticks += 1
+        self.max_tick_duration = max(self.max_tick_duration,
+                                     now - self.tick_start_time)
+        if not self.is_fixed_rate():
+            return 0
+        if self.scheduled_time is None:
+            self.scheduled_time = self.tick_start_time
+        # schedule from the previous deadline rather than from now,
+        # so small delays don't make the loop drift
+        self.scheduled_time += self.period
+        remaining = self.scheduled_time - now
+        if remaining < 0:
+            self.overruns += 1
+            # skip the periods we missed rather than trying to catch up
+            self.scheduled_time = now
+        elif stop_event is not None:
+            stop_event.wait(remaining)
+        else:
+            time.sleep(remaining)
+        return remaining
+
+    def achieved_frequency(self):
+        if self.first_tick_time is None or self.ticks == 0:
+            return 0
+        elapsed = time.time() - self.first_tick_time
+        return self.ticks / elapsed if elapsed > 0 else 0
+
+    def get_stats(self):
+        scheduled_ticks = max(self.ticks - 1, 1)
+        return {
+            'target_hz': self.target_frequency,
+            'achieved_hz': self.achieved_frequency(),
+            'ticks': self.ticks,
+            'overruns': self.overruns,
+            'mean_jitter': self.total_jitter / scheduled_ticks,
+            'max_jitter': self.max_jitter,
+            'max_tick_duration': self.max_tick_duration,
+        }
+
+
+class LockstepClock(object):
+    """
+    Stands in for time.time() as the gamestate's clock in lockstep mode
+    with a fixed time step. It only moves on when the coordinator advances
+    it after each round, so timestamps don't depend on how long the
+    providers took.
+    """
+    def __init__(self, start=0.):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, delta_time):
+        self.now += delta_time
 
 
 class Provider(object):
@@ -35,6 +152,22 @@ class Provider(object):
         # Convenience variables for assess the performance of the provider
         self.last_run_time = None
         self.delta_time = 0
+        # Timing histograms, created in the provider process. Summaries
+        # are sent to the coordinator through telemetry_q.
+        self.telemetry = None
+        self.telemetry_q = Queue(MAX_Q_SIZE)
+        # Background thread that writes out our log records, so logging
+        # never blocks run(). Created along with the logger.
+        self._log_pipeline = None
+
+        # Whether we are being run in the coordinator's process, sharing its
+        # gamestate, rather than in our own process (see lockstep_tick)
+        self._lockstep = False
+
+        # Rate (Hz) at which run() should be called, None means as fast
+        # as possible. See ProviderScheduler.
+        self._target_frequency = None
+        self.scheduler = None
 
         # This specifies the fields in the gamestate dict for which this
         # provider is the source of truth. These fields will be stored
@@ -42,6 +175,43 @@ class Provider(object):
         # in new gamestate packets.
         self._owned_fields = []
 
+        # This specifies the fields in the gamestate that this provider
+        # reads. Only these fields are sent to it by the coordinator.
+        # None means the provider is sent every field.
+        self._subscribed_fields = None
+
+        # The version and encoded value of each owned field the last time
+        # it was sent to the coordinator. Fields are only sent when they
+        # change.
+        self._owned_field_versions = dict()
+        self._sent_field_data = dict()
+
+        # Optional shared memory buffers (set up by the coordinator) for the
+        # bulky gamestate fields, see gamestate_shared_memory.py.
+        # _shared_gs_in is written by the coordinator and read by us,
+        # _shared_gs_out is written by us for fields we own.
+        self._shared_gs_in = None
+        self._shared_gs_out = None
+
+    def _is_subscribed(self, field):
+        """
+        Whether the coordinator should send this field to the provider
+        """
+        if field in self._owned_fields:
+            return False
+        return self._subscribed_fields is None or \
+            field in self._subscribed_fields
+
+    def _shared_owned_fields(self):
+        """
+        The owned fields that are sent back through shared memory rather
+        than the commands_out_q
+        """
+        if self._shared_gs_out is None:
+            return []
+        return [f for f in self._owned_fields
+                if f in self._shared_gs_out.fields]
+
     def run(self):
         """
         Handle provider specific logic. This function is continuously
@@ -53,39 +223,72 @@ class Provider(object):
         """
         raise NotImplementedError("Need to implement run() in child classes.")
 
-    def _update_gamestate(self):
+    def _update_gamestate(self, timeout=1):
         """
-        Get the latest gamestate from coordinator. DON'T call this method from
-        outside the provider.
+        Get the latest changes to the gamestate from coordinator.
+        DON'T call this method from outside the provider.
         """
-        # Save a copy of all of the fields this provider owns
-        owned_field_values = dict()
-        for field in self._owned_fields:
-            owned_field_values[field] = getattr(self.gs, field)
-
-        # Get a new gamestate copy from the coordinator
+        if self._lockstep:
+            # the gamestate is shared, so it is always up to date
+            return
+        # Get the fields that changed since our last update, as a dict of
+        # field : (version, encoded value)
+        start_time = time.time()
         try:
-            self.gs = self.data_in_q.get(timeout=1)
-            # Send logger messages from gs to the calling provider's logger
-            self.gs.logger = self.logger
+            delta = self.data_in_q.get(timeout=timeout)
         except Empty:
-            pass
+            delta = {}
+        received_time = time.time()
+
+        # Fields this provider owns are never overwritten by the coordinator
+        for field, (version, data) in delta.items():
+            if self._is_subscribed(field):
+                self.gs.decode_field(field, data)
 
-        # Restore the fields that this provider owns
-        for key, value in owned_field_values.items():
-            setattr(self.gs, key, value)
+        # Bring the shared memory fields we read up to date in place
+        if self._shared_gs_in is not None:
+            self._shared_gs_in.read_into(self.gs, [
+                f for f in self._shared_gs_in.fields
+                if self._is_subscribed(f)
+            ])
+
+        if self.telemetry is not None:
+            self.telemetry.record('queue_wait', received_time - start_time)
+            self.telemetry.record('update', time.time() - received_time)
 
     def _send_result_back_to_coordinator(self):
         """
-        Send the gamestate from the provider back to the coordinator.
+        Send the owned fields that changed back to the coordinator.
         Do not call this method from outside the provider.
         """
         if self._owned_fields == []:
             return
+        shared_owned_fields = self._shared_owned_fields()
+        shared_changed = False
+        if shared_owned_fields:
+            shared_changed = self._shared_gs_out.write(self.gs,
+                                                       shared_owned_fields)
+        # Compare against what we last managed to send, so that nothing
+        # is lost if the queue happens to be full
+        delta = dict()
+        for field in self._owned_fields:
+            if field in shared_owned_fields:
+                continue
+            data = self.gs.encode_field(field)
+            if data != self._sent_field_data.get(field):
+                version = self._owned_field_versions.get(field, 0) + 1
+                delta[field] = (version, data)
+        # even if only shared memory changed we still put an (empty) delta
+        # in the queue, as that is what wakes up the coordinator
+        if not delta and not shared_changed:
+            return
         try:
-            self.commands_out_q.put_nowait(self.gs)
+            self.commands_out_q.put_nowait(delta)
         except Full:
-            pass
+            return
+        for field, (version, data) in delta.items():
+            self._owned_field_versions[field] = version
+            self._sent_field_data[field] = data
 
     def _update_times(self):
         """
@@ -95,30 +298,121 @@ class Provider(object):
         t = time.time()
         if self.last_run_time:
             self.delta_time = t - self.last_run_time
+            if self.telemetry is not None:
+                self.telemetry.record('loop', self.delta_time)
         self.last_run_time = t
 
+    def _telemetry_summary(self):
+        """
+        A summary of our timings, scheduler stats and dropped log records
+        """
+        summary = self.telemetry.summary()
+        if self.scheduler is not None:
+            summary['scheduler'] = self.scheduler.get_stats()
+        if self._log_pipeline is not None:
+            summary['dropped_log_records'] = self._log_pipeline.dropped()
+        return summary
+
+    def _send_telemetry(self):
+        """
+        Sends a summary of our timings to the coordinator, replacing the
+        previous one if it hasn't been read yet.
+        """
+        summary = self._telemetry_summary()
+        try:
+            self.telemetry_q.get_nowait()
+        except Empty:
+            pass
+        try:
+            self.telemetry_q.put_nowait(summary)
+        except Full:
+            pass
+
     def start_providing(self, stop_event):
         """
         Starts the provider. Should always be run on a background process.
         Usually this is called from Coordinator.start_game()
         """
         self.create_logger()
+        # Send logger messages from gs to the calling provider's logger
+        self.gs.logger = self.logger
+        self.telemetry = ProviderTelemetry(self.logger.name)
+        self.scheduler = ProviderScheduler(self._target_frequency)
+        # fixed rate providers should not block waiting for new data, as
+        # the scheduler does the waiting
+        update_timeout = 0 if self.scheduler.is_fixed_rate() else 1
+        last_report_time = time.time()
         try:
             self.pre_run()
             self._send_result_back_to_coordinator()
             while not stop_event.is_set():
-                self._update_gamestate()
+                self.scheduler.start_tick()
+                self._update_gamestate(timeout=update_timeout)
+                run_start_time = time.time()
                 self.run()
                 self._update_times()
+                self.telemetry.record('run', time.time() - run_start_time)
+                send_start_time = time.time()
                 self._send_result_back_to_coordinator()
+                self.telemetry.record('send', time.time() - send_start_time)
+                self.scheduler.end_tick(stop_event)
+                if time.time() - last_report_time > REPORT_INTERVAL:
+                    last_report_time = time.time()
+                    self.logger.info("Scheduler stats: %s",
+                                     self.scheduler.get_stats())
+                    self._send_telemetry()
         except Exception as e:
             traceback.print_exc()
             self.logger.error(e, exc_info=True)
             print("(See Logger for more info)")
 
+        self.logger.info("Final scheduler stats: %s",
+                         self.scheduler.get_stats())
+        self.logger.info("Timings:\n%s",
+                         format_summary(self.telemetry.summary()))
+        self.logger.info("Memo stats: %s", self.gs.get_memo_stats())
+        self._send_telemetry()
         self.post_run()
         self.destroy()
 
+    def start_lockstep(self, gs, logger_name=None):
+        """
+        Sets up the provider to be run by the coordinator in the main process
+        instead of start_providing(), reading and writing the coordinator's
+        gamestate directly. See Coordinator.lockstep_loop()
+        """
+        self._lockstep = True
+        self.gs = gs
+        self.create_logger(logger_name)
+        self.gs.logger = self.logger
+        self.telemetry = ProviderTelemetry(self.logger.name)
+        self.scheduler = ProviderScheduler()
+        self.pre_run()
+
+    def lockstep_tick(self, delta_time=None):
+        """
+        Calls run() once. If delta_time is given, run() sees that fixed time
+        step instead of the measured one, so simulated runs are repeatable.
+        """
+        self.gs.logger = self.logger
+        self.scheduler.start_tick()
+        run_start_time = time.time()
+        if delta_time is not None:
+            self.delta_time = delta_time
+        self.run()
+        self._update_times()
+        self.telemetry.record('run', time.time() - run_start_time)
+        self.scheduler.end_tick()
+
+    def stop_lockstep(self):
+        """
+        Counterpart of start_lockstep, once the coordinator is done
+        """
+        self.logger.info("Timings:\n%s",
+                         format_summary(self.telemetry.summary()))
+        self.post_run()
+        self._log_pipeline.stop()
+
     def pre_run(self):
         """
         This function is called exactly once whenever a provider is started,
@@ -142,6 +436,11 @@ class Provider(object):
         """
         self.destroy_queue(self.data_in_q)
         self.destroy_queue(self.commands_out_q)
+        if self._log_pipeline is not None:
+            self._log_pipeline.stop()
+        # not emptied, so the coordinator can still read our last summary
+        self.telemetry_q.close()
+        self.telemetry_q.join_thread()
 
     def destroy_queue(self, q):
         """
@@ -159,11 +458,12 @@ class Provider(object):
         if logger_name is None:
             logger_name = self.__class__.__name__
         self.logger = logging.getLogger(logger_name)
-        self.logger.addHandler(
-            logging.FileHandler('logs/%s.log' % logger_name, mode='w'))
         self.logger.setLevel(1)
-        socket_handler = SocketHandler('127.0.0.1', 19996)
-        self.logger.addHandler(socket_handler)
+        # the file/socket writes happen on the pipeline's listener thread
+        self._log_pipeline = LogPipeline(self.logger, [
+            logging.FileHandler('logs/%s.log' % logger_name, mode='w'),
+            SocketHandler('127.0.0.1', 19996),
+        ])
         self.logger.info("Created logger: %s" % logger_name)
 
 
@@ -191,9 +491,20 @@ class Coordinator(object):
     parties including vision, refbox data, XBEE processes and
     strategy processes.
     """
-    def __init__(self, providers):
-        """
-        Collects the objects to coordinate
+    def __init__(self, providers, use_shared_memory=False,
+                 max_publish_rate=MAX_PUBLISH_RATE, lockstep=False,
+                 lockstep_dt=None, max_ticks=None, lockstep_seed=None):
+        """
+        Collects the objects to coordinate.
+        If use_shared_memory is set, the position histories, commands and
+        statuses are passed through shared memory instead of being pickled.
+        max_publish_rate (Hz) limits how often new data is pushed to the
+        providers, None means no limit.
+        If lockstep is set, the providers are all run in this process one
+        after another on a single gamestate, see lockstep_loop(). Then
+        lockstep_dt fixes the time step the providers see (and the
+        gamestate's clock), the game stops after max_ticks rounds (if
+        given) and lockstep_seed seeds the random number generators.
         """
         from gamestate import GameState
         # A list of all of the provider that need to be synchronised
@@ -212,26 +523,95 @@ class Coordinator(object):
         # This event is used to signal to the child processes when to stop
         self.stop_event = Event()
 
+        self._min_publish_interval = 0
+        if max_publish_rate:
+            self._min_publish_interval = 1 / max_publish_rate
+
+        # Every owned field is versioned, so we only merge the fields that
+        # changed and only forward the changes to each provider.
+        # field : version, bumped whenever a new value is merged
+        self._field_versions = dict()
+        # field : encoded value, forwarded to providers as is
+        self._field_data = dict()
+        # per provider - field : version of the last value received from it
+        self._received_versions = [dict() for _ in providers]
+        # per provider - field : version of the last value pushed to it
+        self._sent_versions = [dict() for _ in providers]
+
+        # Statistics on how much delta publishing saves us
+        self.ticks_published = 0
+        self.bytes_sent = 0
+        self.bytes_saved = 0
+
+        # Shared memory buffer mirroring self.gamestate, if enabled
+        self._shared_gs = None
+        if use_shared_memory:
+            self.create_shared_memory()
+
+        # Latest timing summary received from each provider
+        self._provider_telemetry = [None for _ in providers]
+
+        self._lockstep = lockstep
+        self._lockstep_dt = lockstep_dt
+        self._max_ticks = max_ticks
+        self._lockstep_seed = lockstep_seed
+        self.lockstep_ticks = 0
+
     def create_logger(self):
         self.logger = logging.getLogger('coordinator')
-        self.logger.addHandler(
-            logging.FileHandler('coordinator.log', mode='a'))
-        self.logger.info("Initializing Coordinator")
         self.logger.setLevel(1)
-        socket_handler = SocketHandler('0.0.0.0', 19996)
-        self.logger.addHandler(socket_handler)
+        self._log_pipeline = LogPipeline(self.logger, [
+            logging.FileHandler('coordinator.log', mode='a'),
+            SocketHandler('0.0.0.0', 19996),
+        ])
+        self.logger.info("Initializing Coordinator")
         self.logger.info("Created logger for coordinator")
 
+    def create_shared_memory(self):
+        """
+        Sets up the shared memory buffers. Must be called before the
+        providers are started so the child processes inherit them.
+        """
+        from gamestate import SharedGameStateBuffer
+        if not SharedGameStateBuffer.is_supported():
+            self.logger.warning("Shared memory not supported on this python "
+                                "version, falling back to queues")
+            return
+        self._shared_gs = SharedGameStateBuffer(create=True)
+        for provider in self.providers:
+            provider._shared_gs_in = self._shared_gs
+            if any(f in self._shared_gs.fields
+                   for f in provider._owned_fields):
+                provider._shared_gs_out = SharedGameStateBuffer(create=True)
+
+    def destroy_shared_memory(self):
+        """
+        Frees the shared memory buffers once all of the providers are done.
+        """
+        if self._shared_gs is None:
+            return
+        buffers = [self._shared_gs]
+        buffers += [p._shared_gs_out for p in self.providers
+                    if p._shared_gs_out is not None]
+        for buffer in buffers:
+            buffer.close()
+            buffer.unlink()
+        self._shared_gs = None
+
     def start_game(self):
         """
         Starts all of the providers in their own processes..
         This should be called from main.py once a Coordinator has been
         instantiated
+        In lockstep mode, no processes are started and the providers are
+        run from lockstep_loop() instead.
         """
-        for provider in self.providers:
-            self.processes.append(Process(target=provider.start_providing,
-                                          args=[self.stop_event],
-                                          name=provider.__class__.__name__))
+        if not self._lockstep:
+            for provider in self.providers:
+                self.processes.append(Process(
+                    target=provider.start_providing,
+                    args=[self.stop_event],
+                    name=provider.__class__.__name__))
 
         # Disable signals before fork so only parent process responds to SIGINT
         with DisableSignals():
@@ -242,7 +622,23 @@ class Coordinator(object):
 
         # Start main game loop
         self.logger.info("Starting main game loop")
-        self.game_loop()
+        with open(METRICS_FILE, 'w') as metrics_file:
+            if self._lockstep:
+                self.lockstep_loop(metrics_file)
+            else:
+                self.game_loop(metrics_file)
+                self.logger.info("IPC stats: %s", self.get_ipc_stats())
+
+            for proc in self.processes:
+                proc.join(timeout=1)
+            # the providers send their final timings as they exit
+            telemetry = self.get_provider_telemetry()
+            write_metrics(metrics_file, telemetry)
+        for summary in telemetry.values():
+            self.logger.info("Timings for %s", format_summary(summary))
+        self.logger.info("Latency report: %s", latency_report(telemetry))
+        self.destroy_shared_memory()
+        self._log_pipeline.stop()
 
     def stop_game(self):
         """
@@ -251,46 +647,203 @@ class Coordinator(object):
         """
         self.stop_event.set()
 
-    def game_loop(self):
+    def game_loop(self, metrics_file=None):
         """
         This is the main loop of the game that runs continuously in the main
         process.
         This should only be called from self.start_game()
+        Sleeps until a provider sends something back, rather than spinning.
+        The providers' timings are appended to metrics_file periodically.
         """
+        # the queue's underlying pipe becomes readable when a provider puts
+        readers = dict()
+        for provider in self.providers:
+            readers[provider.commands_out_q._reader] = provider
+        has_new_data = True
+        last_publish_time = 0
+        last_report_time = time.time()
         while not self.stop_event.is_set():
-            sys.stdout.flush()
-            self.publish_new_gamestate()
+            # wait for a provider, or until we are allowed to publish again
+            next_publish_time = last_publish_time + self._min_publish_interval
+            if has_new_data:
+                timeout = next_publish_time - time.time()
+            else:
+                timeout = last_publish_time + HEARTBEAT_INTERVAL - time.time()
+            for reader in wait(list(readers), max(timeout, 0)):
+                self.get_data_from_provider(readers[reader])
+                has_new_data = True
+            now = time.time()
+            is_heartbeat = now - last_publish_time >= HEARTBEAT_INTERVAL
+            if now >= next_publish_time and (has_new_data or is_heartbeat):
+                sys.stdout.flush()
+                self.publish_new_gamestate()
+                has_new_data = False
+                last_publish_time = now
+            if metrics_file is not None and \
+                    now - last_report_time > REPORT_INTERVAL:
+                last_report_time = now
+                write_metrics(metrics_file, self.get_provider_telemetry())
+
+    def lockstep_loop(self, metrics_file=None):
+        """
+        Alternative to game_loop() where the providers share our gamestate
+        and we call their run() in turn, in the order they were given.
+        Nothing is pickled or sent between processes, and the order things
+        happen in doesn't depend on the OS scheduler, which makes it easy
+        to profile and test. Exceptions from the providers are not caught.
+        With a fixed time step, the gamestate's clock goes forward by that
+        much each round, so with the same seed runs are identical.
+        """
+        clock = None
+        if self._lockstep_dt is not None:
+            clock = LockstepClock()
+            self.gamestate.clock = clock
+        if self._lockstep_seed is not None:
+            random.seed(self._lockstep_seed)
+            np.random.seed(self._lockstep_seed)
+        names = set()
+        for i, provider in enumerate(self.providers):
+            # separate loggers for e.g. the two teams' strategies
+            name = provider.__class__.__name__
+            if name in names:
+                name = '%s_%d' % (name, i)
+            names.add(name)
+            provider.start_lockstep(self.gamestate, name)
+        last_report_time = time.time()
+        try:
+            while not self.stop_event.is_set():
+                for provider in self.providers:
+                    provider.lockstep_tick(self._lockstep_dt)
+                if clock is not None:
+                    clock.advance(self._lockstep_dt)
+                self.lockstep_ticks += 1
+                if self._max_ticks and self.lockstep_ticks >= self._max_ticks:
+                    break
+                now = time.time()
+                if metrics_file is not None and \
+                        now - last_report_time > REPORT_INTERVAL:
+                    last_report_time = now
+                    write_metrics(metrics_file, self.get_provider_telemetry())
+        finally:
             for provider in self.providers:
-                self.get_data_from_provider(provider)
+                provider.stop_lockstep()
 
     def get_data_from_provider(self, provider):
         """
-        Gets and integrates updated gamestate data from a provider's returned
-        gamestate
+        Gets and integrates the changed fields from a provider
         """
-        provider_gs = self.get_from_provider_ignore_exceptions(provider)
-        if provider_gs:
-            for field in provider._owned_fields:
-                setattr(self.gamestate, field, getattr(provider_gs, field))
+        shared_owned_fields = provider._shared_owned_fields()
+        if shared_owned_fields:
+            provider._shared_gs_out.read_into(self.gamestate,
+                                              shared_owned_fields)
+        delta = self.get_from_provider_ignore_exceptions(provider)
+        if delta:
+            self.merge_delta(self.providers.index(provider), delta)
+
+    def merge_delta(self, i, delta):
+        """
+        Merges the fields that actually changed from a delta sent by
+        provider number i into our gamestate
+        """
+        provider = self.providers[i]
+        received_versions = self._received_versions[i]
+        for field, (version, data) in delta.items():
+            if field not in provider._owned_fields or \
+                    version <= received_versions.get(field, 0):
+                continue
+            received_versions[field] = version
+            self._field_versions[field] = self._field_versions.get(field, 0) + 1  # noqa
+            self._field_data[field] = data
+            self.gamestate.decode_field(field, data)
 
     def publish_new_gamestate(self):
         """
-        Pushes the current gamestate to the data_in_q of the providers that
-        need it
+        Pushes the fields that changed since the last push to the data_in_q
+        of each provider, skipping fields the provider does not read
+        """
+        if self._shared_gs is not None:
+            self._shared_gs.write(self.gamestate)
+        full_size = sum(len(data) for data in self._field_data.values())
+        for i, provider in enumerate(self.providers):
+            sent_versions = self._sent_versions[i]
+            delta = dict()
+            for field, version in self._field_versions.items():
+                if not provider._is_subscribed(field):
+                    continue
+                if sent_versions.get(field, 0) < version:
+                    delta[field] = (version, self._field_data[field])
+            delivered = self.push_to_provider_ignore_exceptions(provider,
+                                                                delta)
+            if delivered is None:
+                # we may have thrown away an undelivered delta, so send
+                # everything again next time
+                sent_versions.clear()
+                continue
+            for field, (version, data) in delta.items():
+                sent_versions[field] = version
+            sent_size = sum(len(data) for _, data in delta.values())
+            self.bytes_sent += sent_size
+            self.bytes_saved += full_size - sent_size
+        self.ticks_published += 1
+
+    def get_ipc_stats(self):
+        """
+        Returns the average number of bytes per tick that were pushed to
+        providers, and that were saved by only pushing changed fields.
+        """
+        ticks = max(self.ticks_published, 1)
+        return {
+            'bytes_sent_per_tick': self.bytes_sent / ticks,
+            'bytes_saved_per_tick': self.bytes_saved / ticks,
+        }
+
+    def get_provider_telemetry(self):
+        """
+        Returns the latest timing summary of each provider that has sent
+        one, keyed by provider name. See telemetry.py for the format.
+        """
+        for i, provider in enumerate(self.providers):
+            if provider._lockstep:
+                # no need to go through the queue
+                if provider.telemetry is not None:
+                    self._provider_telemetry[i] = \
+                        provider._telemetry_summary()
+                continue
+            try:
+                while True:
+                    self._provider_telemetry[i] = \
+                        provider.telemetry_q.get_nowait()
+            except (Empty, OSError, ValueError):
+                pass
+        telemetry = dict()
+        for i, summary in enumerate(self._provider_telemetry):
+            if summary is None:
+                continue
+            name = summary['name']
+            if name in telemetry:
+                # e.g. one strategy per team
+                name = '%s_%d' % (name, i)
+            telemetry[name] = summary
+        return telemetry
+
+    def get_latency_report(self):
         """
-        for provider in self.providers:
-            self.push_to_provider_ignore_exceptions(provider, self.gamestate)
+        Returns the vision to robot latency stats measured by the providers
+        that send commands to robots (comms or simulator)
+        """
+        return latency_report(self.get_provider_telemetry())
 
     def push_to_provider_ignore_exceptions(self, provider, item):
         """
-        A non-blocking helper method to .put() to a provider's
+        A non-blocking helper method to .put() a delta to a provider's
         data_in_q queue and ignore any exceptions.
 
         Args:
             q (Provider): The provider in question
+            item (dict): The delta to send
 
         Returns:
-            The item from the queue, or None.
+            The delta that ended up in the queue, or None if the put failed.
         """
         if not provider:
             return None
@@ -299,17 +852,21 @@ class Coordinator(object):
             q.put_nowait(item)
         except Full:
             # If the queue is full we try to remove the current item
-            # in the queue and replace it with our new item.
+            # in the queue and replace it with our new item. The old item
+            # never got delivered, so fold it into the new one.
             # There are race conditions here, so if the final put ends up
-            # failing we just ignore the failure and move on.
+            # failing we just report the failure and move on.
             try:
-                q.get_nowait()
+                stale_item = q.get_nowait()
+                stale_item.update(item)
+                item = stale_item
             except Empty:
                 pass
             try:
                 q.put_nowait(item)
             except Full:
-                pass
+                return None
+        return item
 
     def get_from_provider_ignore_exceptions(self, provider):
         """
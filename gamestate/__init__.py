@@ -1,2 +1,3 @@
 # pylint: disable=import-error
 from .gamestate import GameState  # noqa
+from .gamestate_shared_memory import SharedGameStateBuffer  # noqa
@@ -0,0 +1,118 @@
+import numpy as np
+
+# Vision noise (std dev of measured position, mm) and how much the ball's
+# acceleration may differ from the rolling deceleration model (mm/s^2)
+BALL_POSITION_NOISE = 3
+BALL_ACCEL_NOISE = 1000
+# variance of the velocity when we start tracking the ball (mm/s)^2
+BALL_INITIAL_VELOCITY_VARIANCE = 1e8
+# measurements this unlikely under the model (chi-squared, 2 dof) are
+# treated as the ball being kicked/bumped, so the filter starts over
+BALL_GATE_THRESHOLD = 13.8
+# estimated speeds below this (mm/s) are rounded down to the ball stopping
+BALL_STOPPED_SPEED = 1
+# max number of samples to filter when restarting from a position history
+BALL_REPLAY_LENGTH = 10
+
+
+class BallEstimator(object):
+    """
+    Kalman filter of the ball's position and velocity, using the rolling
+    model from predict_ball_pos (constant deceleration until it stops).
+    Noise is the same in x and y, so both axes share one 2x2 covariance
+    of (position, velocity) and each update is just a few multiplications.
+    """
+    def __init__(self, decceleration):
+        self.decceleration = decceleration
+        self.reset()
+
+    def reset(self):
+        self.position = None
+        self.velocity = np.zeros(2)
+        self.time = None
+        self._last_measurement = None
+        # per axis covariance [[p_pos, p_pos_vel], [p_pos_vel, p_vel]]
+        self._p_pos = self._p_pos_vel = self._p_vel = 0
+
+    def _start(self, pos, velocity=None):
+        self.position = np.array(pos, dtype=float)
+        self.velocity = np.zeros(2) if velocity is None else velocity
+        self._p_pos = BALL_POSITION_NOISE ** 2
+        self._p_pos_vel = 0
+        self._p_vel = BALL_INITIAL_VELOCITY_VARIANCE
+
+    def _predict(self, dt):
+        # move along the rolling model, stopping if the ball would stop
+        speed = np.linalg.norm(self.velocity)
+        slowdown = self.decceleration * dt
+        if speed <= slowdown:
+            if speed > 0:
+                self.position += self.velocity * (
+                    speed / (2 * self.decceleration))
+            self.velocity = np.zeros(2)
+        else:
+            self.position += self.velocity * dt * (1 - slowdown / (2 * speed))
+            self.velocity *= 1 - slowdown / speed
+        # propagate the covariance with the constant velocity jacobian
+        q = BALL_ACCEL_NOISE ** 2
+        self._p_pos += 2 * dt * self._p_pos_vel + dt * dt * self._p_vel + \
+            q * dt ** 4 / 4
+        self._p_pos_vel += dt * self._p_vel + q * dt ** 3 / 2
+        self._p_vel += q * dt * dt
+
+    def update(self, timestamp, pos):
+        """Adds a measured ball position"""
+        if self.position is None or timestamp < self.time:
+            self._start(pos)
+        else:
+            dt = timestamp - self.time
+            self._predict(dt)
+            innovation = pos - self.position
+            s = self._p_pos + BALL_POSITION_NOISE ** 2
+            if innovation.dot(innovation) / s > BALL_GATE_THRESHOLD:
+                velocity = None
+                if dt > 0:
+                    velocity = (pos - self._last_measurement) / dt
+                self._start(pos, velocity)
+            else:
+                k_pos = self._p_pos / s
+                k_vel = self._p_pos_vel / s
+                self.position += k_pos * innovation
+                self.velocity += k_vel * innovation
+                self._p_vel -= k_vel * self._p_pos_vel
+                self._p_pos_vel *= 1 - k_pos
+                self._p_pos *= 1 - k_pos
+                if np.linalg.norm(self.velocity) < BALL_STOPPED_SPEED:
+                    self.velocity = np.zeros(2)
+        self.time = timestamp
+        self._last_measurement = np.array(pos, dtype=float)
+
+    def update_from_history(self, history):
+        """
+        Catches up with the new entries of a PositionHistory (e.g. one
+        received from another process), starting over if it was replaced
+        """
+        if len(history) == 0:
+            self.reset()
+            return
+        times = history.get_times()
+        new = len(times)
+        if self.time is not None:
+            new = np.count_nonzero(times > self.time)
+            if new == len(times) or times[new] != self.time or \
+                    not np.array_equal(history.get_positions(new + 1)[new],
+                                       self._last_measurement):
+                # history doesn't continue from what we've seen
+                self.reset()
+                new = len(times)
+        if self.time is None:
+            new = min(new, BALL_REPLAY_LENGTH)
+        positions = history.get_positions(new)
+        for i in reversed(range(new)):
+            self.update(float(times[i]), positions[i])
+
+    def get_covariance(self):
+        """4x4 covariance of the state [x, y, vx, vy]"""
+        per_axis = np.array([[self._p_pos, self._p_pos_vel],
+                             [self._p_pos_vel, self._p_vel]])
+        return np.kron(per_axis, np.eye(2))
@@ -0,0 +1,176 @@
+import numpy as np
+
+
+def _path_buffer(trajectory, t, u, w, max_speeds, elapsed):
+    """
+    How much further than the ball's path (at time t after the trajectory
+    start) each robot could have gone by then, for robots at u along and
+    w across the path from its start. Arrays broadcast against each other.
+    """
+    a = trajectory.decceleration
+    tc = np.minimum(t, trajectory.stop_time)
+    along = trajectory.speed * tc - .5 * a * tc ** 2
+    return max_speeds * (t - elapsed) - np.hypot(along - u, w)
+
+
+def intercept_times(trajectory, robot_positions, max_speeds, now):
+    """
+    Solves when robots (an (N, 2+) array of positions, with an (N,) array
+    or scalar of max speeds) can first get to a point on the ball's path
+    no later than the ball, and until when that stays true.
+    Returns (earliest, latest) arrays of times after trajectory.start_time.
+    Both are NaN for robots that can't reach the ball before it leaves the
+    field, latest is inf if the ball stops in the field within reach.
+
+    Robot starting at time e after the trajectory start, with max speed m,
+    reaches the ball at time t if m (t - e) >= |ball(t) - robot|. Along
+    the ball's path ball(t) = v t - a t^2 / 2 until it stops, so squaring
+    the equality gives a quartic in t, solved for all robots at once from
+    the eigenvalues of their companion matrices. The roots split time into
+    intervals where the condition holds or doesn't, which we then check.
+    """
+    positions = np.asarray(robot_positions, dtype=float)[:, :2]
+    n = len(positions)
+    m = np.broadcast_to(np.asarray(max_speeds, dtype=float), (n,))
+    earliest = np.full(n, np.nan)
+    latest = np.full(n, np.nan)
+    if n == 0 or trajectory.exit_time == 0:
+        return earliest, latest
+    elapsed = now - trajectory.start_time
+    # robot positions relative to the ball's path
+    relative = positions - trajectory.start_position
+    direction = trajectory.direction()
+    if not direction.any():
+        direction = np.array([1., 0.])
+    u = relative.dot(direction)
+    w = relative[:, 1] * direction[0] - relative[:, 0] * direction[1]
+    v, a = trajectory.speed, trajectory.decceleration
+
+    # while rolling
+    start = max(elapsed, 0)
+    end = min(trajectory.stop_time, trajectory.exit_time)
+    if start < end:
+        # (v t - a t^2 / 2 - u)^2 + w^2 - m^2 (t - e)^2 = 0
+        m2 = m ** 2
+        coefficients = np.stack([
+            np.full(n, a * a / 4),
+            np.full(n, -a * v),
+            v * v + a * u - m2,
+            -2 * v * u + 2 * m2 * elapsed,
+            u * u + w * w - m2 * elapsed ** 2,
+        ], axis=1)
+        companion = np.zeros((n, 4, 4))
+        companion[:, 0, :] = -coefficients[:, 1:] / coefficients[:, :1]
+        companion[:, [1, 2, 3], [0, 1, 2]] = 1
+        # real parts of all the roots - any extra ones just give us more
+        # intervals to check
+        roots = np.clip(np.linalg.eigvals(companion).real, start, end)
+        bounds = np.sort(np.concatenate(
+            [np.full((n, 1), start), roots, np.full((n, 1), end)],
+            axis=1), axis=1)
+        mids = (bounds[:, :-1] + bounds[:, 1:]) / 2
+        ok = _path_buffer(trajectory, mids, u[:, None], w[:, None],
+                          m[:, None], elapsed) >= 0
+        ok_start = _path_buffer(trajectory, start, u, w, m, elapsed) >= 0
+        # (empty intervals don't count either way)
+        empty = bounds[:, 1:] <= bounds[:, :-1]
+        good = ok & ~empty
+        bad = ~ok & ~empty
+        rows = np.arange(n)
+        first = np.where(ok_start, 0, np.argmax(good, axis=1))
+        found = ok_start | good.any(axis=1)
+        earliest = np.where(ok_start, start, bounds[rows, first])
+        # window lasts until the next interval where it doesn't hold
+        bad &= np.arange(bad.shape[1]) >= first[:, None]
+        ends_early = bad.any(axis=1)
+        latest = np.where(ends_early, bounds[rows, np.argmax(bad, axis=1)],
+                          end)
+        earliest[~found] = np.nan
+        latest[~found] = np.nan
+        until_end = found & ~ends_early
+    else:
+        until_end = np.zeros(n, dtype=bool)
+    # once the ball has stopped, a robot can always get there eventually
+    if trajectory.exit_time == np.inf:
+        final = trajectory.final_position()
+        arrival = elapsed + np.linalg.norm(positions - final, axis=1) / m
+        stopped = np.isnan(earliest)
+        earliest[stopped] = np.maximum(arrival[stopped],
+                                       trajectory.stop_time)
+        latest[stopped | until_end] = np.inf
+    return earliest, latest
+
+
+def safest_intercept_times(trajectory, robot_positions, max_speeds):
+    """
+    For each robot, the time (after trajectory.start_time) of the point on
+    the ball's path that it can get to with the most time to spare before
+    the ball, or the least time late. NaN if the ball is already out.
+
+    At distance s along the path the ball gets there at
+    T(s) = (v - sqrt(v^2 - 2 a s)) / a and the robot at
+    R(s) = sqrt((s - u)^2 + w^2) / m, so T - R is largest at an end of the
+    path or where T' = R'. Squared, that's the cubic
+    2 a x^3 + (m^2 - v^2 + 2 a u) x^2 + m^2 w^2 = 0 in x = s - u, solved
+    for all robots at once like the quartic in intercept_times.
+    """
+    positions = np.asarray(robot_positions, dtype=float)[:, :2]
+    n = len(positions)
+    m = np.broadcast_to(np.asarray(max_speeds, dtype=float), (n,))
+    if n == 0 or trajectory.exit_time == 0:
+        return np.full(n, np.nan)
+    v, a = trajectory.speed, trajectory.decceleration
+    end = min(trajectory.stop_time, trajectory.exit_time)
+    length = v * end - .5 * a * end ** 2
+    relative = positions - trajectory.start_position
+    direction = trajectory.direction()
+    u = relative.dot(direction)
+    w = relative[:, 1] * direction[0] - relative[:, 0] * direction[1]
+
+    companion = np.zeros((n, 3, 3))
+    companion[:, 0, 0] = -(m * m - v * v + 2 * a * u) / (2 * a)
+    companion[:, 0, 2] = -(m * w) ** 2 / (2 * a)
+    companion[:, [1, 2], [0, 1]] = 1
+    # (real parts of any complex roots are just more points to check)
+    roots = u[:, None] + np.linalg.eigvals(companion).real
+    candidates = np.clip(np.concatenate(
+        [np.zeros((n, 1)), np.full((n, 1), length), roots], axis=1),
+        0, length)
+    ball_times = (v - np.sqrt(np.maximum(v * v - 2 * a * candidates, 0))) / a
+    robot_times = np.hypot(candidates - u[:, None], w[:, None]) / m[:, None]
+    best = np.argmax(ball_times - robot_times, axis=1)
+    return ball_times[np.arange(n), best]
+
+
+class BallIntercepts(object):
+    """
+    Earliest/latest intercepts of the ball (see intercept_times) for every
+    robot in the gamestate, from gs.get_ball_intercepts(), and the safest
+    intercepts (see safest_intercept_times). Times are timestamps,
+    positions are where on the ball's path those are. Robots start moving
+    at now.
+    """
+    def __init__(self, gs, now):
+        self.now = now
+        trajectory = gs.get_ball_trajectory()
+        poses, self.teams, self.ids = gs.get_robot_pose_matrix()
+        max_speeds = np.array([gs.robot_max_speed(team, robot_id) for
+                               team, robot_id in zip(self.teams, self.ids)])
+        earliest, latest = intercept_times(trajectory, poses, max_speeds, now)
+        self.earliest_positions = trajectory.positions_at(earliest)
+        self.latest_positions = trajectory.positions_at(latest)
+        self.earliest_times = trajectory.start_time + earliest
+        self.latest_times = trajectory.start_time + latest
+        safest = safest_intercept_times(trajectory, poses, max_speeds)
+        self.safest_positions = trajectory.positions_at(safest)
+        self.safest_times = trajectory.start_time + safest
+        self._rows = {(str(team), int(robot_id)): i for i, (team, robot_id)
+                      in enumerate(zip(self.teams, self.ids))}
+
+    def index(self, team, robot_id):
+        "row of the robot, None if it isn't in the gamestate"
+        return self._rows.get((team, robot_id))
+
+    def can_intercept(self, team, robot_id):
+        i = self.index(team, robot_id)
+        return i is not None and not np.isnan(self.earliest_times[i])
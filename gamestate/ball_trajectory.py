@@ -0,0 +1,106 @@
+import numpy as np
+
+# spacing and max length of the predicted trajectory (seconds)
+BALL_TRAJECTORY_TIMESTEP = .1
+BALL_TRAJECTORY_HORIZON = 20
+
+
+def rolling_positions(pos, velocity, decceleration, times):
+    """
+    Positions of a ball rolling from pos at velocity, with constant
+    deceleration until it stops, after each of the times (seconds)
+    """
+    times = np.asarray(times, dtype=float)
+    speed = np.linalg.norm(velocity)
+    if speed == 0:
+        return np.tile(np.asarray(pos, dtype=float), (len(times), 1))
+    # the ball stops instead of going backwards
+    t = np.minimum(times, speed / decceleration)
+    distance = speed * t - .5 * decceleration * t ** 2
+    return pos + np.outer(distance, velocity / speed)
+
+
+class BallTrajectory(object):
+    """
+    Predicted ball positions every BALL_TRAJECTORY_TIMESTEP from the latest
+    ball position, until the ball stops (the last two positions are the
+    same) or leaves the field (the last position is outside it, and there
+    are none if it is already outside).
+    Get it from gs.get_ball_trajectory(), which only makes a new one when
+    the ball position changes.
+    """
+    def __init__(self, gs):
+        self.start_time = gs.get_ball_last_update_time()
+        if self.start_time is None:
+            self.start_time = gs.clock()
+        self.start_position = np.asarray(gs.get_ball_position(), dtype=float)
+        self.velocity = gs.get_ball_velocity()
+        self.decceleration = gs.BALL_DECCELERATION
+        self.speed = np.linalg.norm(self.velocity)
+        self.stop_time = self.speed / self.decceleration
+        self.exit_time = self._exit_time(gs)
+        n = min(int(np.ceil(self.stop_time / BALL_TRAJECTORY_TIMESTEP)) + 2,
+                int(BALL_TRAJECTORY_HORIZON / BALL_TRAJECTORY_TIMESTEP))
+        delta_times = np.arange(n) * BALL_TRAJECTORY_TIMESTEP
+        positions = self.positions_at(delta_times)
+        x, y = positions[:, 0], positions[:, 1]
+        outside = np.flatnonzero(
+            (x < gs.FIELD_MIN_X) | (x > gs.FIELD_MAX_X) |
+            (y < gs.FIELD_MIN_Y) | (y > gs.FIELD_MAX_Y))
+        if len(outside) > 0:
+            # nothing if the ball is already out of the field
+            n = outside[0] + 1 if outside[0] > 0 else 0
+        # timestamps of each position
+        self.times = self.start_time + delta_times[:n]
+        self.positions = positions[:n]
+        self.times.flags.writeable = False
+        self.positions.flags.writeable = False
+
+    def _exit_time(self, gs):
+        "time the ball rolls out of the field, inf if it stops inside"
+        if not gs.is_in_field(self.start_position):
+            return 0.
+        if self.speed == 0:
+            return np.inf
+        direction = self.velocity / self.speed
+        # distance along the path to the field boundary
+        exit_distance = np.inf
+        start = self.start_position
+        for i, (low, high) in enumerate([(gs.FIELD_MIN_X, gs.FIELD_MAX_X),
+                                         (gs.FIELD_MIN_Y, gs.FIELD_MAX_Y)]):
+            if direction[i] > 0:
+                exit_distance = min(exit_distance,
+                                    (high - start[i]) / direction[i])
+            elif direction[i] < 0:
+                exit_distance = min(exit_distance,
+                                    (low - start[i]) / direction[i])
+        a = self.decceleration
+        discriminant = self.speed ** 2 - 2 * a * max(exit_distance, 0)
+        if discriminant < 0:
+            return np.inf
+        return (self.speed - np.sqrt(discriminant)) / a
+
+    def direction(self):
+        "unit vector the ball is rolling in ([0, 0] if it isn't)"
+        if self.speed == 0:
+            return np.zeros(2)
+        return self.velocity / self.speed
+
+    def __len__(self):
+        return len(self.times)
+
+    def positions_at(self, delta_times):
+        """Positions at each of the times after start_time"""
+        return rolling_positions(self.start_position, self.velocity,
+                                 self.decceleration, delta_times)
+
+    def position_at(self, delta_time):
+        return self.positions_at([delta_time])[0]
+
+    def final_position(self):
+        "where the ball stops (possibly outside the field)"
+        return self.position_at(self.stop_time)
+
+    def as_list(self):
+        """[(timestamp, position)] like strategy's get_future_ball_array"""
+        return list(zip(self.times, self.positions))
@@ -0,0 +1,108 @@
+import numpy as np
+
+# cell size of the free space grid (mm)
+FREE_SPACE_RESOLUTION = 50
+# how far from a position we look for free space (mm)
+FREE_SPACE_SEARCH_DISTANCE = 1500
+
+
+def legal_cells(gs, shape, resolution, are_legal):
+    """
+    Which cells of the grid are legal all over by are_legal(points): all of
+    their corners are (the rules are convex shapes bigger than the cells,
+    or the inside of one)
+    """
+    xs = gs.FIELD_MIN_X + np.arange(shape[0] + 1) * resolution
+    ys = gs.FIELD_MIN_Y + np.arange(shape[1] + 1) * resolution
+    xs[-1] = min(xs[-1], gs.FIELD_MAX_X)
+    ys[-1] = min(ys[-1], gs.FIELD_MAX_Y)
+    corners = np.stack(np.meshgrid(xs, ys, indexing='ij'), axis=-1)
+    legal = are_legal(corners.reshape(-1, 2)).reshape(corners.shape[:2])
+    return legal[:-1, :-1] & legal[1:, :-1] & legal[:-1, 1:] & legal[1:, 1:]
+
+
+class FreeSpaceMap(object):
+    """
+    Grid over the field of where a robot could be (legal, and not overlapping
+    other robots), so finding the nearest free position is a search of the
+    cells around it rather than checking the rules and robots everywhere.
+    Cells are only free if all of the cell is, so the free cell centers
+    are valid positions (up to rules with curved edges).
+    Robots count themselves as obstacles here, see nearest_free_position()
+    for a single robot's query.
+    Get it from gs.get_free_space_map(), which makes one per tick at most.
+    """
+    def __init__(self, gs, team, robot_id,
+                 resolution=FREE_SPACE_RESOLUTION,
+                 search_distance=FREE_SPACE_SEARCH_DISTANCE):
+        self.resolution = resolution
+        self.origin = np.array([gs.FIELD_MIN_X, gs.FIELD_MIN_Y])
+        self.shape = (int(np.ceil(gs.FIELD_X_LENGTH / resolution)),
+                      int(np.ceil(gs.FIELD_Y_LENGTH / resolution)))
+        self.search_cells = int(np.ceil(search_distance / resolution))
+        # the field rules only change with the refbox message, the ones
+        # depending on the ball are checked again each time
+        is_goalie = gs.is_goalie(team, robot_id)
+        raster = gs.get_legality_raster(team, robot_id)
+        legal = gs.memoize(
+            ('free_space_legal_cells', team, is_goalie, resolution),
+            lambda: legal_cells(gs, self.shape, resolution, raster.are_legal),
+            refbox_only=True)
+        if gs.ball_rules_apply():
+            legal = legal & legal_cells(gs, self.shape, resolution,
+                                        gs.ball_rules_allow)
+        # and not within reach of any robot from any point in the cell
+        reach = gs.ROBOT_RADIUS * 2 + resolution / np.sqrt(2)
+        n = int(np.ceil(reach / resolution)) + 1
+        offsets = np.arange(-n, n + 1)
+        poses, _, _ = gs.get_robot_pose_matrix()
+        cells = ((poses[:, :2] - self.origin) // resolution).astype(int)
+        # (robot, offset) cells around each robot
+        cells_i = np.clip(cells[:, :1] + offsets, 0, self.shape[0] - 1)
+        cells_j = np.clip(cells[:, 1:] + offsets, 0, self.shape[1] - 1)
+        centers_x = self.origin[0] + (cells_i + .5) * resolution
+        centers_y = self.origin[1] + (cells_j + .5) * resolution
+        blocked = np.hypot(centers_x[:, :, None] - poses[:, 0, None, None],
+                           centers_y[:, None, :] - poses[:, 1, None, None]) \
+            < reach
+        robot, i, j = np.nonzero(blocked)
+        free = legal.copy()
+        free[cells_i[robot, i], cells_j[robot, j]] = False
+        self.free = free
+
+    def cell_centers(self, cells):
+        return self.origin + (np.asarray(cells) + .5) * self.resolution
+
+    def cell_of(self, pos):
+        "grid cell of a position (the nearest one, if it's off the grid)"
+        i, j = ((np.asarray(pos[:2], dtype=float) - self.origin) //
+                self.resolution).astype(int)
+        return (min(max(i, 0), self.shape[0] - 1),
+                min(max(j, 0), self.shape[1] - 1))
+
+    def nearest_free_cell_center(self, pos):
+        """
+        center of the nearest free cell, None if there is none within the
+        search distance
+        """
+        i, j = self.cell_of(pos)
+        n = self.search_cells
+        min_i, min_j = max(i - n, 0), max(j - n, 0)
+        free_i, free_j = np.nonzero(self.free[min_i:i + n + 1,
+                                              min_j:j + n + 1])
+        if not len(free_i):
+            return None
+        d2 = (free_i + min_i - i) ** 2 + (free_j + min_j - j) ** 2
+        k = np.argmin(d2)
+        if d2[k] > n * n:
+            return None
+        return self.cell_centers((free_i[k] + min_i, free_j[k] + min_j))
+
+    def are_free(self, points):
+        "whether the cells of each point are free"
+        points = np.asarray(points, dtype=float)
+        cells = ((points[:, :2] - self.origin) // self.resolution).astype(int)
+        on_grid = ((cells >= 0) & (cells < self.shape)).all(axis=1)
+        free = np.zeros(len(points), dtype=bool)
+        free[on_grid] = self.free[cells[on_grid, 0], cells[on_grid, 1]]
+        return free
@@ -1,6 +1,5 @@
 import time
 import numpy as np
-from collections import deque
 
 # import RobotCommands from the comms folder
 # (expected to run from root directory, use try/except if run from here)
@@ -12,9 +11,17 @@ from refbox import SSL_Referee  # pylint: disable=import-error
 try:
     from gamestate_field import Field
     from gamestate_analysis import Analysis
+    from gamestate_serialization import Serialization
+    from gamestate_memo import Memo
+    from position_history import PositionHistory
+    from ball_estimator import BallEstimator
 except (SystemError, ImportError):
     from .gamestate_field import Field
     from .gamestate_analysis import Analysis
+    from .gamestate_serialization import Serialization
+    from .gamestate_memo import Memo
+    from .position_history import PositionHistory
+    from .ball_estimator import BallEstimator
 
 # RAW DATA PROCESSING CONSTANTS
 BALL_POS_HISTORY_LENGTH = 200
@@ -24,9 +31,13 @@ ROBOT_POS_HISTORY_LENGTH = 20
 ROBOT_LOST_TIME = .5
 # time after which lost robot is deleted from the gamestate
 ROBOT_REMOVE_TIME = 5
+# robot states, as of the last sweep_lost_robots()
+ROBOT_ACTIVE = 0
+ROBOT_LOST = 1
+ROBOT_REMOVED = 2
 
 
-class GameState(Field, Analysis):
+class GameState(Field, Analysis, Serialization, Memo):
     """Game state contains all raw game information in one place.
        Many threads can edit and use the game state at once, cuz Python GIL
        Since using python, data types are specified in the comments below.
@@ -42,14 +53,36 @@ class GameState(Field, Analysis):
         self._game_loop_sleep = None
         self._last_step_time = None
 
+        # Where timestamps come from: the wall clock, unless the coordinator
+        # runs the game in lockstep with a fixed time step (see
+        # Coordinator.lockstep_loop)
+        self.clock = time.time
+
         # Raw Position Data - updated by vision provider
         # (either vision or simulator)
-        # queue of (time, pos) where positions are in the form np.array([x, y])
-        # most recent data is at the front of queue
-        self._ball_position = deque([], BALL_POS_HISTORY_LENGTH)
+        # history of (time, pos) where positions are in the form
+        # np.array([x, y]), most recent data first (see PositionHistory)
+        self._ball_position = PositionHistory(BALL_POS_HISTORY_LENGTH, 2)
+        # filtered ball position/velocity, updated with each new position
+        self._ball_estimator = BallEstimator(self.BALL_DECCELERATION)
         # robot positions are np.array([x, y, w]) where w = rotation
-        self._blue_robot_positions = dict()  # Robot ID: queue of (time, pos)
-        self._yellow_robot_positions = dict()  # Robot ID: queue of (time, pos)
+        self._blue_robot_positions = dict()  # Robot ID: (time, pos) history
+        self._yellow_robot_positions = dict()  # Robot ID: (time, pos) history
+        # team: {robot id: ROBOT_ACTIVE/LOST/REMOVED}, see sweep_lost_robots
+        self._robot_states = {'blue': dict(), 'yellow': dict()}
+        # bumped whenever robot positions change, see get_robot_pose_matrix
+        self._robot_positions_version = 0
+        self._robot_pose_cache = None
+        # bumped whenever the ball position changes
+        self._ball_position_version = 0
+        # values memoized for the current version of the data, see Memo
+        self._memo_version = None
+        self._memo_refbox = None
+        self._memo_cache = dict()
+        self._memo_stats = dict()  # name: [hits, misses]
+        # and for values that only depend on the refbox message
+        self._refbox_memo_message = None
+        self._refbox_memo_cache = dict()
 
         # Commands Data (desired robot actions) - updated by strategy
         self._blue_robot_commands = dict()  # Robot ID: commands object
@@ -59,6 +92,13 @@ class GameState(Field, Analysis):
         self._blue_robot_status = dict()  # Robot ID: status object
         self._yellow_robot_status = dict()  # Robot ID: status object
 
+        # Latency tracing - timestamps of the vision frame the positions
+        # came from (updated by vision), and of the frame the team's
+        # commands were based on (updated by strategy), see telemetry.py
+        self._vision_trace = None
+        self._blue_command_trace = None
+        self._yellow_command_trace = None
+
         # UI Inputs - updated by visualizer
         self.viz_inputs = {
             "simulator_events_count": 0,  # flag for simulator to handle
@@ -87,6 +127,11 @@ class GameState(Field, Analysis):
         # CALL self.get_latest_refbox_message()
         # Initialize to a default message for when we do not care
         # about the refbox
+        # (message string, parsed message, derived fields) of the last
+        # message we parsed, so we only parse when the string changes
+        self._refbox_cache = None
+        # (team, is goalie, blue defense side left) : LegalityRaster
+        self._legality_rasters = dict()
         self._latest_refbox_message_string = b'\x08\x8f\xbb\xb7\x83\x86\xf5\xe7\x02\x10\r \x00(\x010\x9e\xb6\xe3\x9b\x82\xf5\xe7\x02:\x12\n\x00\x10\x00\x18\x00(\x000\x048\x80\xc6\x86\x8f\x01@\x00B\x12\n\x00\x10\x00\x18\x00(\x000\x048\x80\xc6\x86\x8f\x01@\x00P\x00'  # noqa
         # TODO - functions to get data from refbox message?
         # Game status/events
@@ -111,13 +156,19 @@ class GameState(Field, Analysis):
             return self.get_latest_refbox_message().yellow
 
     def get_goalie_id(self, team):
-        return self.get_team_info(team).goalie
+        _, _, derived = self._get_refbox_cache()
+        return derived[team + '_goalie']
 
     def is_goalie(self, team, robot_id):
         return robot_id == self.get_goalie_id(team)
 
+    def get_refbox_command(self):
+        _, _, derived = self._get_refbox_cache()
+        return derived['command']
+
     def is_blue_defense_side_left(self):
-        return not self.get_latest_refbox_message().blueTeamOnPositiveHalf
+        _, _, derived = self._get_refbox_cache()
+        return derived['is_blue_defense_side_left']
 
     # RAW DATA GET/SET FUNCTIONS
     # returns latest refbox message
@@ -125,17 +176,38 @@ class GameState(Field, Analysis):
         """
         Returns latest refbox message as an object.
         See referee.proto for specifications.
+        The same object is returned until the message changes, so don't
+        modify it.
         """
-        if self._latest_refbox_message_string is None:
-            raise Exception("Refbox message must be populated")
-        refbox_message = SSL_Referee()
-        refbox_message.ParseFromString(self._latest_refbox_message_string)
-        # print(f"{self._latest_refbox_message_string}\n")
+        _, refbox_message, _ = self._get_refbox_cache()
         return refbox_message
 
+    def _get_refbox_cache(self):
+        """
+        Parses the latest refbox message if it has changed since we last
+        parsed it. The message string can also be replaced directly when it
+        is sent from another process, so we check it is the same object.
+        """
+        message_string = self._latest_refbox_message_string
+        if self._refbox_cache is None or \
+                self._refbox_cache[0] is not message_string:
+            if message_string is None:
+                raise Exception("Refbox message must be populated")
+            refbox_message = SSL_Referee()
+            refbox_message.ParseFromString(message_string)
+            # fields that are used a lot, e.g. in legality checks
+            derived = {
+                'command': refbox_message.command,
+                'blue_goalie': refbox_message.blue.goalie,
+                'yellow_goalie': refbox_message.yellow.goalie,
+                'is_blue_defense_side_left':
+                    not refbox_message.blueTeamOnPositiveHalf,
+            }
+            self._refbox_cache = (message_string, refbox_message, derived)
+        return self._refbox_cache
+
     def update_game_info_from_refbox_message(self, prev_msg_string):
-        msg = SSL_Referee()
-        msg.ParseFromString(self._latest_refbox_message_string)
+        msg = self.get_latest_refbox_message()
         prev_msg = SSL_Referee()
         prev_msg.ParseFromString(prev_msg_string)
         if msg.command == SSL_Referee.NORMAL_START \
@@ -157,14 +229,36 @@ class GameState(Field, Analysis):
         return pos
 
     def clear_ball_position(self):
-        self._ball_position = deque([], BALL_POS_HISTORY_LENGTH)
+        self._ball_position.clear()
+        self._ball_estimator.reset()
+        self._ball_position_version += 1
 
     def update_ball_position(self, pos, timestamp=None):
         if timestamp is None:
-            timestamp = time.time()
+            timestamp = self.clock()
         assert(len(pos) == 2 and type(pos) == np.ndarray)
-        pos = pos.copy().astype(float)
-        self._ball_position.appendleft((timestamp, pos))
+        self._ball_position.add(timestamp, pos)
+        self._ball_estimator.update(timestamp, pos)
+        self._ball_position_version += 1
+
+    def _ball_position_changed(self):
+        """
+        Call after changing the ball position other than through the
+        methods above, so the estimate and cached data are refreshed
+        """
+        self._ball_estimator.update_from_history(self._ball_position)
+        self._ball_position_version += 1
+
+    def get_ball_estimate(self):
+        """
+        Returns filtered (position, velocity, covariance) of the ball, or
+        None if it hasn't been seen. Covariance is 4x4, of [x, y, vx, vy]
+        """
+        estimator = self._ball_estimator
+        if estimator.position is None:
+            return None
+        return (estimator.position.copy(), estimator.velocity.copy(),
+                estimator.get_covariance())
 
     def get_ball_last_update_time(self):
         if len(self._ball_position) == 0:
@@ -177,7 +271,39 @@ class GameState(Field, Analysis):
         last_update_time = self.get_ball_last_update_time()
         if last_update_time is None:
             return True
-        return time.time() - last_update_time > BALL_LOST_TIME
+        return self.clock() - last_update_time > BALL_LOST_TIME
+
+    def update_vision_trace(self, frame_number, capture_time,
+                            receive_time=None):
+        """Records which camera frame the latest positions came from"""
+        now = self.clock()
+        self._vision_trace = {
+            'frame_number': frame_number,
+            't_capture': capture_time,
+            't_receive': now if receive_time is None else receive_time,
+            't_gamestate': now,
+        }
+
+    def get_vision_trace(self):
+        return self._vision_trace
+
+    def update_command_trace(self, team):
+        """Stamps the team's commands with the frame they were based on"""
+        if self._vision_trace is None:
+            return
+        trace = dict(self._vision_trace, t_command=self.clock())
+        if team == 'blue':
+            self._blue_command_trace = trace
+        else:
+            assert(team == 'yellow')
+            self._yellow_command_trace = trace
+
+    def get_command_trace(self, team):
+        if team == 'blue':
+            return self._blue_command_trace
+        else:
+            assert(team == 'yellow')
+            return self._yellow_command_trace
 
     def get_team_positions(self, team):
         if team == 'blue':
@@ -219,18 +345,66 @@ class GameState(Field, Analysis):
                     all_robot_positions.append((key, robot_pos))
         return all_robot_positions
 
+    def get_robot_pose_matrix(self):
+        """
+        Returns (poses, teams, ids) where poses is an (N, 3) array of the
+        latest [x, y, w] of every robot that isn't lost, with arrays of the
+        team and id of each row, blue team first.
+        These are cached until the positions change, so don't modify them.
+        """
+        cache = self._robot_pose_cache
+        if cache is None or cache[0] != self._robot_positions_version:
+            poses, teams, ids = [], [], []
+            team_slices = dict()
+            for team in ['blue', 'yellow']:
+                start = len(poses)
+                team_positions = self.get_team_positions(team)
+                for robot_id in self.get_active_robot_ids(team):
+                    poses.append(team_positions[robot_id].get_positions(1)[0])
+                    teams.append(team)
+                    ids.append(robot_id)
+                team_slices[team] = slice(start, len(poses))
+            poses = np.array(poses, dtype=float).reshape(-1, 3)
+            teams = np.array(teams, dtype=str)
+            ids = np.array(ids, dtype=int)
+            for array in (poses, teams, ids):
+                array.flags.writeable = False
+            cache = (self._robot_positions_version, poses, teams, ids,
+                     team_slices)
+            self._robot_pose_cache = cache
+        return cache[1:4]
+
+    def get_team_pose_matrix(self, team):
+        """
+        Returns (poses, ids) of one team, as views of get_robot_pose_matrix()
+        """
+        poses, _, ids = self.get_robot_pose_matrix()
+        team_slice = self._robot_pose_cache[4][team]
+        return poses[team_slice], ids[team_slice]
+
+    def _robot_positions_changed(self):
+        """
+        Call after changing robot positions other than through the methods
+        below, so cached/memoized data based on them is refreshed
+        """
+        self._robot_positions_version += 1
+
     def update_robot_position(self, team, robot_id, pos):
         assert(len(pos) == 3 and type(pos) == np.ndarray)
-        pos = pos.copy().astype(float)
         robot_positions = self.get_team_positions(team)
         if robot_id not in robot_positions:
             # assert(len(robot_positions) <= 6)
-            robot_positions[robot_id] = deque([], ROBOT_POS_HISTORY_LENGTH)
-        robot_positions[robot_id].appendleft((time.time(), pos))
+            robot_positions[robot_id] = PositionHistory(
+                ROBOT_POS_HISTORY_LENGTH, 3)
+        robot_positions[robot_id].add(self.clock(), pos)
+        self._robot_states[team][robot_id] = ROBOT_ACTIVE
+        self._robot_positions_changed()
 
     def remove_robot(self, team, robot_id):
         team_positions = self.get_team_positions(team)
         del team_positions[robot_id]
+        self._robot_states[team][robot_id] = ROBOT_REMOVED
+        self._robot_positions_changed()
         team_commands = self.get_team_commands(team)
         if robot_id in team_commands:
             del team_commands[robot_id]
@@ -244,17 +418,41 @@ class GameState(Field, Analysis):
             # print("getting update time of robot never seen?!?")
             return None
         timestamp, pos = robot_positions[robot_id][0]
-        # remove lost robots after a while
-        if time.time() - timestamp > ROBOT_REMOVE_TIME:
-            self.remove_robot(team, robot_id)
         return timestamp
 
+    def sweep_lost_robots(self, now=None):
+        """
+        Marks robots that haven't been seen by cameras in a while as lost,
+        and removes the ones lost for long enough. The vision provider
+        runs this after each update, so everyone else just reads the states
+        """
+        if now is None:
+            now = self.clock()
+        is_changed = False
+        for team in ['blue', 'yellow']:
+            states = self._robot_states[team]
+            for robot_id, history in list(self.get_team_positions(team).items()):  # noqa
+                age = now - history.get_times(1)[0]
+                if age > ROBOT_REMOVE_TIME:
+                    self.remove_robot(team, robot_id)
+                    continue
+                state = ROBOT_LOST if age > ROBOT_LOST_TIME else ROBOT_ACTIVE
+                if states.get(robot_id) != state:
+                    states[robot_id] = state
+                    is_changed = True
+        if is_changed:
+            # lost robots drop out of the pose matrix
+            self._robot_positions_changed()
+
     # check if robot hasn't been seen by cameras in a while
     def is_robot_lost(self, team, robot_id):
-        last_update_time = self.get_robot_last_update_time(team, robot_id)
-        if last_update_time is None:
-            return True
-        return time.time() - last_update_time > ROBOT_LOST_TIME
+        return self._robot_states[team].get(robot_id) != ROBOT_ACTIVE
+
+    def get_active_robot_ids(self, team):
+        """ids of the team's robots that aren't lost"""
+        return tuple(robot_id for robot_id, state
+                     in self._robot_states[team].items()
+                     if state == ROBOT_ACTIVE)
 
     def get_team_commands(self, team):
         if team == 'blue':
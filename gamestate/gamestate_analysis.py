@@ -1,6 +1,18 @@
 # pylint: disable=no-member
 import numpy as np
 from refbox import SSL_Referee
+try:
+    from gamestate_memo import memoized
+    from ball_trajectory import BallTrajectory, rolling_positions
+    from ball_interception import BallIntercepts
+    from free_space import FreeSpaceMap
+    from segment_collision import segment_circles_entry
+except (SystemError, ImportError):
+    from .gamestate_memo import memoized
+    from .ball_trajectory import BallTrajectory, rolling_positions
+    from .ball_interception import BallIntercepts
+    from .free_space import FreeSpaceMap
+    from .segment_collision import segment_circles_entry
 
 
 class Analysis(object):
@@ -105,19 +117,17 @@ class Analysis(object):
         close_enough = np.linalg.norm(ball_pos - robot_pos[:2]) < MAX_DIST
         return in_zone and close_enough
 
+    @memoized
     def ball_in_dribbler(self, team, robot_id):
         positions = self._ball_position
         MIN_TIME_INTERVAL = 1
-        i = 0
         if len(positions) <= 1:
             return False
         if not self.ball_in_dribbler_single_frame(team, robot_id, positions[0][1]):  # noqa
             return False
         # look back from 0 (most recent) until big enough interval
-        while i < len(positions) - 1 and \
-                positions[0][0] - positions[i][0] < MIN_TIME_INTERVAL:
-            ball_pos = positions[i][1]
-            i += 1
+        i = positions.index_before(MIN_TIME_INTERVAL)
+        for ball_pos in positions.get_positions(i):
             if not self.ball_in_dribbler_single_frame(team, robot_id, ball_pos):  # noqa
                 return False
         return True
@@ -127,85 +137,204 @@ class Analysis(object):
         return whether robot can be in a location without colliding
         with another robot
         """
-        for key, robot_pos in self.get_all_robot_positions():
-            if key == (team, robot_id):
-                continue
-            if self.robot_overlap(pos, robot_pos, buffer_dist).any():
-                return False
-        return True
+        poses, teams, ids = self.get_robot_pose_matrix()
+        is_other = (teams != team) | (ids != robot_id)
+        distances = np.linalg.norm(
+            poses[is_other, :2] - np.asarray(pos[:2], dtype=float), axis=1)
+        # same test as robot_overlap
+        return not (distances < self.ROBOT_RADIUS * 2 + buffer_dist).any()
+
+    def get_free_space_map(self, team, robot_id):
+        """
+        FreeSpaceMap for the robot's team (and whether it is the goalie),
+        made at most once per position update
+        """
+        is_goalie = self.is_goalie(team, robot_id)
+        return self.memoize(('get_free_space_map', team, is_goalie),
+                            lambda: FreeSpaceMap(self, team, robot_id))
+
+    def _is_free(self, pos, team, robot_id):
+        return self.is_pos_legal(pos, team, robot_id) and \
+            self.is_position_open(pos, team, robot_id)
+
+    def _own_space(self, points, team, robot_id, free_space):
+        """
+        Which points are near enough to the robot that the free space map
+        (where it is an obstacle) doesn't apply, and which of those are free
+        """
+        robot_pos = self.get_robot_position(team, robot_id)
+        reach = self.ROBOT_RADIUS * 2 + free_space.resolution
+        near = np.hypot(points[:, 0] - robot_pos[0],
+                        points[:, 1] - robot_pos[1]) < reach
+        free = np.zeros(len(points), dtype=bool)
+        if near.any():
+            free[near] = self.are_pos_legal(points[near], team, robot_id) & \
+                self.are_positions_open(points[near], team, robot_id)
+        return near, free
+
+    def nearest_free_position(self, pos, team, robot_id):
+        """
+        Nearest position to pos where the robot is legal and doesn't overlap
+        other robots (to within the free space map resolution), pos itself
+        if it already is. None if there isn't one nearby.
+        """
+        pos = np.asarray(pos[:2], dtype=float)
+        if self._is_free(pos, team, robot_id):
+            return pos
+        free_space = self.get_free_space_map(team, robot_id)
+        candidates = []
+        center = free_space.nearest_free_cell_center(pos)
+        if center is not None:
+            candidates.append(center)
+        # cells around the robot itself, which are never free in the map
+        robot_pos = self.get_robot_position(team, robot_id)
+        i, j = free_space.cell_of(robot_pos)
+        reach = int(np.ceil(self.ROBOT_RADIUS * 2 / free_space.resolution))
+        di, dj = np.mgrid[-reach:reach + 1, -reach:reach + 1]
+        cells = np.stack([i + di.ravel(), j + dj.ravel()], axis=1)
+        points = free_space.cell_centers(cells)
+        near, free = self._own_space(points, team, robot_id, free_space)
+        candidates.extend(points[near & free])
+        if not candidates:
+            return None
+        candidates = np.array(candidates)
+        order = np.argsort(np.hypot(candidates[:, 0] - pos[0],
+                                    candidates[:, 1] - pos[1]))
+        for candidate in candidates[order]:
+            if self._is_free(candidate, team, robot_id):
+                return self._refine_free_position(pos, candidate,
+                                                  team, robot_id)
+        return None
+
+    def _refine_free_position(self, pos, free_pos, team, robot_id, steps=6):
+        "bisects from free_pos back towards pos, staying free"
+        blocked = pos
+        for _ in range(steps):
+            middle = (blocked + free_pos) / 2
+            if self._is_free(middle, team, robot_id):
+                free_pos = middle
+            else:
+                blocked = middle
+        return free_pos
+
+    def nearest_free_position_on_line(self, pos, direction, max_distance,
+                                      team, robot_id):
+        """
+        Like nearest_free_position, but only looking along the line through
+        pos in direction (unit vector), checking both sides alternately
+        """
+        free_space = self.get_free_space_map(team, robot_id)
+        steps = np.repeat(np.arange(0, max_distance, free_space.resolution),
+                          2).astype(float)
+        steps[1::2] *= -1
+        points = np.asarray(pos[:2], dtype=float) + \
+            steps[:, None] * np.asarray(direction, dtype=float)
+        near, free = self._own_space(points, team, robot_id, free_space)
+        free[~near] = free_space.are_free(points[~near])
+        for candidate in points[free]:
+            if self._is_free(candidate, team, robot_id):
+                return candidate
+        return None
+
+    def are_positions_open(self, points, team, robot_id, buffer_dist=0):
+        """
+        is_position_open for each row of an (N, 2+) array of positions
+        """
+        poses, teams, ids = self.get_robot_pose_matrix()
+        others = poses[(teams != team) | (ids != robot_id), :2]
+        points = np.asarray(points, dtype=float)[:, :2]
+        open_ = np.ones(len(points), dtype=bool)
+        for other in others:
+            distances = np.hypot(points[:, 0] - other[0],
+                                 points[:, 1] - other[1])
+            open_ &= distances >= self.ROBOT_RADIUS * 2 + buffer_dist
+        return open_
+
+    def path_collision_time(self, start, end, team, robot_id,
+                            buffer_dist=0):
+        """
+        Fraction of the way from start to end where the robot first
+        overlaps another one (np.inf if it doesn't), like checking
+        is_position_open all the way along
+        """
+        poses, teams, ids = self.get_robot_pose_matrix()
+        others = poses[(teams != team) | (ids != robot_id), :2]
+        if not len(others):
+            return np.inf
+        return segment_circles_entry(
+            start, end, others,
+            np.full(len(others), self.ROBOT_RADIUS * 2 + buffer_dist)).min()
+
+    def first_path_collision(self, start, end, team, robot_id,
+                             buffer_dist=0, allow_illegal=False):
+        """
+        First position along the straight path from start to end where the
+        robot would hit another robot or (unless allow_illegal) break a
+        rule, None if the path is clear
+        """
+        start = np.asarray(start, dtype=float)[:2]
+        end = np.asarray(end, dtype=float)[:2]
+        hit_time = self.path_collision_time(start, end, team, robot_id,
+                                            buffer_dist)
+        if not allow_illegal:
+            hit_time = min(hit_time, self.path_illegal_time(
+                start, end, team, robot_id))
+        if hit_time > 1:
+            return None
+        return start + hit_time * (end - start)
 
     def robot_at_position(self, pos):
         """
         return robot team and id occupying a current position, if any
         """
-        for (team, robot_id), robot_pos in self.get_all_robot_positions():
-            if self.overlap(pos, robot_pos, self.ROBOT_RADIUS).any():
-                return (team, robot_id)
-        return None
+        poses, teams, ids = self.get_robot_pose_matrix()
+        distances = np.linalg.norm(
+            poses[:, :2] - np.asarray(pos[:2], dtype=float), axis=1)
+        overlapping = np.flatnonzero(distances < self.ROBOT_RADIUS)
+        if len(overlapping) == 0:
+            return None
+        i = overlapping[0]
+        return (str(teams[i]), int(ids[i]))
 
     def get_ball_velocity(self):
         """
-        Here we find ball velocity at most recent timestamp from position data
+        Ball velocity at most recent timestamp, from the ball estimator
+        (see ball_estimator.py), which is updated with each new position
         """
-        # TOOD: smooth out this value by averaging?
-        # prev_velocity = self.ball_velocity
-        positions = self._ball_position
-        MIN_TIME_INTERVAL = .05
-        i = 0
-        if len(positions) <= 1:
-            return np.array([0, 0])
-        # look back from 0 (most recent) until big enough interval
-        while i < len(positions) - 1 and \
-                positions[0][0] - positions[i][0] < MIN_TIME_INTERVAL:
-            i += 1
-        # use those two points as reference for calculation
-        time1, pos1 = positions[i]
-        time2, pos2 = positions[0]
-        delta_pos = pos2 - pos1
-        delta_time = time2 - time1
-        midpoint_velocity = delta_pos / delta_time
-        if not midpoint_velocity.any():
+        if len(self._ball_position) <= 1:
             return np.array([0, 0])
+        return self._ball_estimator.velocity.copy()
 
-        # adjust ball's deceleration since the midpoint of interval used
-        midpoint_time = (time1 + time2) / 2
-        time_since_midpoint = time2 - midpoint_time
-        accel_direction = - midpoint_velocity / np.linalg.norm(midpoint_velocity)  # noqa
-        accel = accel_direction * self.BALL_DECCELERATION * time_since_midpoint
-        velocity_now = midpoint_velocity + accel
+    def predict_ball_pos(self, delta_time):
+        return self.predict_ball_trajectory([delta_time])[0]
 
-        # truncate if slowdown has caused change directions
-        if ((velocity_now * midpoint_velocity) < 0).any():
-            assert(((velocity_now * midpoint_velocity) <= 0).all())
-            velocity_now = np.array([0, 0])
-        # print("after adjust: {}".format(velocity_now))
-        return velocity_now
+    def predict_ball_trajectory(self, times):
+        """
+        Predicted ball positions after each of the times (seconds after the
+        latest ball position),
+        as an (N, 2) array
+        """
+        return rolling_positions(self.get_ball_position(),
+                                 self.get_ball_velocity(),
+                                 self.BALL_DECCELERATION, times)
 
-    def predict_ball_pos(self, delta_time):
-        velocity_initial = self.get_ball_velocity()
-        # print(f"{velocity_initial}")
-        if not velocity_initial.any():
-            return (self.get_ball_position())
-        accel_direction = -velocity_initial / np.linalg.norm(velocity_initial)
-        accel = accel_direction * self.BALL_DECCELERATION
-        # truncate if we're going past the time where the ball would stop
-        velocity_final = accel * delta_time + velocity_initial
-        if ((velocity_initial * velocity_final) < 0).any():
-            assert(((velocity_initial * velocity_final) <= 0).all())
-            # We need to use two cases here because one coordinate of initial
-            # velocity can be zero which
-            # would cause us to divide by zero if we use that axis.
-            if not accel[0] == 0:
-                time_to_stop = -1 * velocity_initial[0] / accel[0]
-            else:
-                time_to_stop = -1 * velocity_initial[1] / accel[1]
-            # print("dt: {} TTS: {}".format(delta_time, time_to_stop))
-            delta_time = time_to_stop
-        predicted_pos_change = \
-            0.5 * accel * delta_time ** 2 + velocity_initial * delta_time
-        # print("dt: {} PPC: {}".format(delta_time, predicted_pos_change))
-        predicted_pos = predicted_pos_change + self.get_ball_position()
-        return predicted_pos
+    def get_ball_trajectory(self):
+        """
+        BallTrajectory of where the ball is going, made once per ball update
+        """
+        return self.memoize(('get_ball_trajectory',),
+                            lambda: BallTrajectory(self))
+
+    def get_ball_intercepts(self):
+        """
+        BallIntercepts of every robot, solved all at once when first asked
+        for after the positions change. Robots start from when the ball was
+        last seen, not the wall clock, so the memoized value doesn't go
+        stale.
+        """
+        return self.memoize(('get_ball_intercepts',),
+                            lambda: BallIntercepts(
+                                self, self.get_ball_trajectory().start_time))
 
     def is_ball_in_play(self):
         '''
@@ -235,7 +364,7 @@ class Analysis(object):
         start_ball_pos = self.get_ball_position()
         start_x = start_ball_pos[0]
         start_y = start_ball_pos[1]
-        final_ball_pos = self.predict_ball_pos(10)
+        final_ball_pos = self.get_ball_trajectory().position_at(10)
         final_x = final_ball_pos[0]
         final_y = final_ball_pos[1]
         defense_goal = self.get_defense_goal(team)
@@ -1,6 +1,22 @@
 # pylint: disable=no-member
 import numpy as np
 from refbox import SSL_Referee  # pylint: disable=import-error
+try:
+    from gamestate_memo import refbox_memoized
+    from legality_raster import LegalityRaster
+    from segment_collision import segment_circles_entry, \
+        segment_rectangles_entry, segment_rectangle_exit
+except (SystemError, ImportError):
+    from .gamestate_memo import refbox_memoized
+    from .legality_raster import LegalityRaster
+    from .segment_collision import segment_circles_entry, \
+        segment_rectangles_entry, segment_rectangle_exit
+
+
+# how far robots have to stay from the ball during STOP, and behind it when
+# preparing a penalty (mm)
+STOP_BALL_DISTANCE = 500
+PENALTY_RANGE = 1000
 
 
 class Field(object):
@@ -20,6 +36,7 @@ class Field(object):
     DEFENSE_AREA_X_LENGTH = 1000 * FIELD_SCALE
     DEFENSE_AREA_Y_LENGTH = 2000 * FIELD_SCALE
 
+    @refbox_memoized
     def defense_area_corner(self, team):
         """
         returns bottom left corner of defense area
@@ -44,6 +61,16 @@ class Field(object):
         in_y = dy_min <= pos[1] <= dy_max
         return in_x and in_y
 
+    def defense_area_rectangle(self, team):
+        """
+        (min x, min y, max x, max y) of the area is_in_defense_area checks
+        """
+        min_x, min_y = self.defense_area_corner(team)
+        radius = self.ROBOT_RADIUS
+        return (min_x - radius, min_y - radius,
+                min_x + self.DEFENSE_AREA_X_LENGTH + radius,
+                min_y + self.DEFENSE_AREA_Y_LENGTH + radius)
+
     def is_in_field(self, pos):
         return ((self.FIELD_MIN_X <= pos[0] <= self.FIELD_MAX_X) and
                 (self.FIELD_MIN_Y <= pos[1] <= self.FIELD_MAX_Y))
@@ -52,32 +79,121 @@ class Field(object):
         # TODO: account for robot radius
         # TODO: during free kicks must be away from opponent area
         # + ALL OTHER RULES
-        latest_refbox_message = self.get_latest_refbox_message()
+        command = self.get_refbox_command()
         # TODO: Also avoid ball during other team ball placement,
         # defend free kick, etc.
-        if latest_refbox_message.command == SSL_Referee.STOP:
+        if command == SSL_Referee.STOP:
             dist = np.linalg.norm(pos[:2] - self.get_ball_position())
-            if dist <= 500 + self.ROBOT_RADIUS:
+            if dist <= STOP_BALL_DISTANCE + self.ROBOT_RADIUS:
                 return False
-        if latest_refbox_message.command == SSL_Referee.PREPARE_PENALTY_BLUE:
-            penalty_range = 1000
+        if command == SSL_Referee.PREPARE_PENALTY_BLUE:
             if self.is_goalie(team, robot_id):
                 pass
             if self.is_blue_defense_side_left():
                 ball_x, _ = self.get_ball_position()
-                if pos[0] < ball_x + penalty_range:
+                if pos[0] < ball_x + PENALTY_RANGE:
                     return False
             else:
                 ball_x, _ = self.get_ball_position()
-                if pos[0] > ball_x - penalty_range:
+                if pos[0] > ball_x - PENALTY_RANGE:
                     return False
-        in_d_area = self.is_in_defense_area(pos, team)
-        ot = self.other_team(team)
-        in_own_defense_area = in_d_area and not self.is_goalie(team, robot_id)
-        in_other_defense_area = self.is_in_defense_area(pos, ot)
-        return (self.is_in_field(pos) and
-                not in_own_defense_area and
-                not in_other_defense_area)
+        # field edges and defense areas
+        raster = self.get_legality_raster(team, robot_id)
+        return raster.is_legal(pos[0], pos[1])
+
+    def are_pos_legal(self, points, team, robot_id):
+        """
+        is_pos_legal for each row of an (N, 2+) array of positions
+        """
+        points = np.asarray(points, dtype=float)
+        legal = self.get_legality_raster(team, robot_id).are_legal(points)
+        return legal & self.ball_rules_allow(points)
+
+    def ball_rules_allow(self, points):
+        """
+        Which rows of an (N, 2+) array of positions the rules depending on
+        the ball allow (all of them unless ball_rules_apply)
+        """
+        points = np.asarray(points, dtype=float)
+        allowed = np.ones(len(points), dtype=bool)
+        command = self.get_refbox_command()
+        if command == SSL_Referee.STOP:
+            dist = np.linalg.norm(points[:, :2] - self.get_ball_position(),
+                                  axis=1)
+            allowed &= dist > STOP_BALL_DISTANCE + self.ROBOT_RADIUS
+        if command == SSL_Referee.PREPARE_PENALTY_BLUE:
+            ball_x, _ = self.get_ball_position()
+            if self.is_blue_defense_side_left():
+                allowed &= points[:, 0] >= ball_x + PENALTY_RANGE
+            else:
+                allowed &= points[:, 0] <= ball_x - PENALTY_RANGE
+        return allowed
+
+    def ball_rules_apply(self):
+        "whether is_pos_legal depends on where the ball is right now"
+        return self.get_refbox_command() in [SSL_Referee.STOP,
+                                             SSL_Referee.PREPARE_PENALTY_BLUE]
+
+    def forbidden_shapes(self, team, robot_id):
+        """
+        The rectangles (min x, min y, max x, max y) and circles (centers,
+        radii) the robot isn't allowed in right now. The rest of the rules
+        are the field edges, and the line behind the ball for penalties.
+        """
+        rectangles = self.get_legality_raster(team, robot_id).forbidden
+        centers, radii = np.empty((0, 2)), np.empty(0)
+        if self.get_refbox_command() == SSL_Referee.STOP:
+            centers = np.array([self.get_ball_position()], dtype=float)
+            radii = np.array([STOP_BALL_DISTANCE + self.ROBOT_RADIUS])
+        return rectangles, centers, radii
+
+    def path_illegal_time(self, start, end, team, robot_id):
+        """
+        Fraction of the way from start to end where the robot first gets
+        somewhere is_pos_legal doesn't allow (np.inf if it never does)
+        """
+        start = np.asarray(start, dtype=float)[:2]
+        end = np.asarray(end, dtype=float)[:2]
+        raster = self.get_legality_raster(team, robot_id)
+        rectangles, centers, radii = self.forbidden_shapes(team, robot_id)
+        hit_time = min(segment_rectangle_exit(start, end, raster.field),
+                       segment_rectangles_entry(start, end, rectangles).min())
+        if len(centers):
+            # (touching the circles counts here)
+            hit_time = min(hit_time, segment_circles_entry(
+                start, end, centers, radii).min())
+        if self.get_refbox_command() == SSL_Referee.PREPARE_PENALTY_BLUE:
+            ball_x, _ = self.get_ball_position()
+            # has to stay on the far side of a line behind the ball
+            if self.is_blue_defense_side_left():
+                line_x, sign = ball_x + PENALTY_RANGE, 1
+            else:
+                line_x, sign = ball_x - PENALTY_RANGE, -1
+            if sign * (start[0] - line_x) < 0:
+                hit_time = 0
+            elif sign * (end[0] - line_x) < 0:
+                hit_time = min(hit_time,
+                               (start[0] - line_x) / (start[0] - end[0]))
+        return hit_time
+
+    def get_legality_raster(self, team, robot_id):
+        """
+        LegalityRaster of the ball independent rules for a robot, made the
+        first time they apply (depends on the team, whether it is the
+        goalie and the side we're defending)
+        """
+        is_goalie = self.is_goalie(team, robot_id)
+        key = (team, is_goalie, self.is_blue_defense_side_left())
+        raster = self._legality_rasters.get(key)
+        if raster is None:
+            forbidden = [self.defense_area_rectangle(self.other_team(team))]
+            if not is_goalie:
+                forbidden.append(self.defense_area_rectangle(team))
+            raster = LegalityRaster(
+                (self.FIELD_MIN_X, self.FIELD_MIN_Y,
+                 self.FIELD_MAX_X, self.FIELD_MAX_Y), forbidden)
+            self._legality_rasters[key] = raster
+        return raster
 
     def random_position(self):
         """
@@ -91,6 +207,7 @@ class Field(object):
             self.is_pos_legal(pos, team, robot_id)
 
     # returns the top and bottom goalposts for a team
+    @refbox_memoized
     def get_defense_goal(self, team):
         if (self.is_blue_defense_side_left() and team == 'blue') or \
            (not self.is_blue_defense_side_left() and team == 'yellow'):
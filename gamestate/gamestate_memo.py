@@ -0,0 +1,91 @@
+import functools
+import numpy as np
+
+
+def freeze(value):
+    "makes arrays in a cached value read only, so callers can't change it"
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, tuple):
+        for item in value:
+            freeze(item)
+    return value
+
+
+def memoized(method):
+    """
+    Decorator for gamestate methods whose result only depends on the
+    positions, refbox message and the (hashable) arguments
+    """
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        return self.memoize((name,) + args, lambda: method(self, *args))
+    return wrapper
+
+
+def refbox_memoized(method):
+    """
+    Like memoized, for methods that only depend on the refbox message
+    (e.g. which side we defend), so position updates don't throw them out
+    """
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        return self.memoize((name,) + args, lambda: method(self, *args),
+                            refbox_only=True)
+    return wrapper
+
+
+class Memo(object):
+    """
+    Memoization of values computed from the game data, e.g. so that the
+    ball velocity is only calculated once per vision update however many
+    times strategy asks for it. Everything cached is thrown out when the
+    state version changes (ball/robot positions or refbox message), or
+    for refbox_only values, when the refbox message changes.
+    """
+    def _state_version(self):
+        return (self._ball_position_version, self._robot_positions_version,
+                id(self._latest_refbox_message_string))
+
+    def memoize(self, key, compute, refbox_only=False):
+        """
+        Returns compute() for the current state, reusing the value from
+        the last call with the same key if nothing has changed since.
+        If refbox_only, the value is kept until the refbox message changes.
+        Arrays in the value are made read only, copy them to modify.
+        """
+        if refbox_only:
+            cache = self._refbox_memo_cache
+            if self._refbox_memo_message is not \
+                    self._latest_refbox_message_string:
+                self._refbox_memo_message = \
+                    self._latest_refbox_message_string
+                cache.clear()
+        else:
+            cache = self._memo_cache
+            version = self._state_version()
+            if self._memo_version != version:
+                self._memo_version = version
+                # keep the message string alive so its id can't be reused
+                self._memo_refbox = self._latest_refbox_message_string
+                cache.clear()
+        name = key[0]
+        stats = self._memo_stats.get(name)
+        if stats is None:
+            stats = self._memo_stats[name] = [0, 0]
+        if key in cache:
+            stats[0] += 1
+            return cache[key]
+        stats[1] += 1
+        value = freeze(compute())
+        cache[key] = value
+        return value
+
+    def get_memo_stats(self):
+        """{name: {'hits': n, 'misses': n}} for everything memoized so far"""
+        return {name: {'hits': hits, 'misses': misses}
+                for name, (hits, misses) in self._memo_stats.items()}
@@ -0,0 +1,115 @@
+# pylint: disable=no-member
+import pickle
+import numpy as np
+try:
+    from position_history import PositionHistory
+except (SystemError, ImportError):
+    from .position_history import PositionHistory
+
+# The position histories are sent as flat float64 arrays rather than
+# pickled, which avoids the pickle overhead of every little part. Rows
+# are (time, x, y) for the ball and (robot id, time, x, y, w) for
+# robots, most recent first.
+BALL_ROW_LENGTH = 3
+ROBOT_ROW_LENGTH = 5
+COMPACT_FIELDS = [
+    '_ball_position',
+    '_blue_robot_positions',
+    '_yellow_robot_positions',
+]
+# Attributes that are not part of the game data
+UNSERIALIZED_FIELDS = ['logger', '_game_thread', '_refbox_cache',
+                       '_robot_positions_version', '_robot_pose_cache',
+                       '_ball_position_version', '_ball_estimator',
+                       '_memo_version',
+                       '_memo_refbox', '_memo_cache', '_memo_stats',
+                       '_refbox_memo_message', '_refbox_memo_cache',
+                       '_legality_rasters', 'clock']
+
+
+def history_to_rows(history, rows):
+    "fills rows with the (time, pos) entries of a history"
+    rows[:, 0] = history.get_times()
+    rows[:, 1:] = history.get_positions()
+
+
+def rows_to_history(rows, maxlen):
+    return PositionHistory.from_arrays(maxlen, rows[:, 0], rows[:, 1:])
+
+
+def encode_ball_positions(history):
+    rows = np.empty((len(history), BALL_ROW_LENGTH))
+    history_to_rows(history, rows)
+    return rows.tobytes()
+
+
+def decode_ball_positions(data):
+    from .gamestate import BALL_POS_HISTORY_LENGTH
+    rows = np.frombuffer(data).reshape(-1, BALL_ROW_LENGTH)
+    return rows_to_history(rows, BALL_POS_HISTORY_LENGTH)
+
+
+def encode_robot_positions(team_positions):
+    num_rows = sum(len(history) for history in team_positions.values())
+    rows = np.empty((num_rows, ROBOT_ROW_LENGTH))
+    start = 0
+    for robot_id, history in team_positions.items():
+        end = start + len(history)
+        rows[start:end, 0] = robot_id
+        history_to_rows(history, rows[start:end, 1:])
+        start = end
+    return rows.tobytes()
+
+
+def decode_robot_positions(data):
+    from .gamestate import ROBOT_POS_HISTORY_LENGTH
+    rows = np.frombuffer(data).reshape(-1, ROBOT_ROW_LENGTH)
+    team_positions = dict()
+    # rows for each robot are together, in the order the robots were added
+    ids, starts = np.unique(rows[:, 0], return_index=True)
+    for i in np.argsort(starts):
+        end = starts[i] + np.count_nonzero(rows[:, 0] == ids[i])
+        team_positions[int(ids[i])] = rows_to_history(
+            rows[starts[i]:end, 1:], ROBOT_POS_HISTORY_LENGTH)
+    return team_positions
+
+
+class Serialization(object):
+    """
+    Compact serialization of gamestate fields, used to send them between
+    processes (see coordinator.py). Fields without a compact format are
+    pickled.
+    """
+    def encode_field(self, field):
+        value = getattr(self, field)
+        if field == '_ball_position':
+            return encode_ball_positions(value)
+        if field in COMPACT_FIELDS:
+            return encode_robot_positions(value)
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def decode_field(self, field, data):
+        """Sets field from data made by encode_field()"""
+        if field == '_ball_position':
+            value = decode_ball_positions(data)
+        elif field in COMPACT_FIELDS:
+            value = decode_robot_positions(data)
+        else:
+            value = pickle.loads(data)
+        setattr(self, field, value)
+        if field.endswith('_robot_positions') or field == '_robot_states':
+            self._robot_positions_changed()
+        elif field == '_ball_position':
+            self._ball_position_changed()
+
+    def encode_snapshot(self):
+        """Serializes all of the game data at once"""
+        return pickle.dumps({
+            field: self.encode_field(field) for field in vars(self)
+            if field not in UNSERIALIZED_FIELDS
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def decode_snapshot(self, data):
+        """Loads data from encode_snapshot() into this gamestate"""
+        for field, field_data in pickle.loads(data).items():
+            self.decode_field(field, field_data)
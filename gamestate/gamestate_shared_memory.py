@@ -0,0 +1,375 @@
+"""
+Shared memory mirror of the bulky gamestate fields (position histories,
+robot commands and robot statuses), so they do not have to be pickled
+through the coordinator queues every tick.
+
+Each buffer has exactly one writer and any number of readers. Consistency
+is handled with a seqlock: the writer makes the sequence number odd while
+it is writing, and readers retry if the sequence number was odd or changed
+while they were copying data out.
+Position histories are stored as ring buffers so that both writing and
+reading only touch the entries that are new since the last tick.
+"""
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+    from multiprocessing import resource_tracker
+except ImportError:
+    # shared memory was only added in python 3.8
+    shared_memory = None
+
+from comms import RobotCommands, RobotStatus  # pylint: disable=import-error
+try:
+    from position_history import PositionHistory
+except (SystemError, ImportError):
+    from .position_history import PositionHistory
+
+# The gamestate fields that are mirrored in shared memory instead of
+# being sent through the coordinator queues
+SHARED_FIELDS = [
+    '_ball_position',
+    '_blue_robot_positions',
+    '_yellow_robot_positions',
+    '_blue_robot_commands',
+    '_yellow_robot_commands',
+    '_blue_robot_status',
+    '_yellow_robot_status',
+]
+TEAMS = ['blue', 'yellow']
+# robot ids are sent to the firmware in 4 bits (see robot_commands.py)
+MAX_ROBOTS = 16
+# waypoints beyond this are dropped from the shared copy of the commands
+MAX_WAYPOINTS = 64
+# layout of a single robot commands record
+COMMANDS_HEADER = ['present', 'x', 'y', 'w', 'speed_limit', 'is_dribbling',
+                   'is_charging', 'is_kicking', 'has_prev_waypoint',
+                   'prev_x', 'prev_y', 'prev_w', 'num_waypoints']
+COMMANDS_RECORD_LENGTH = len(COMMANDS_HEADER) + 3 * MAX_WAYPOINTS
+# give up on a read if the writer keeps interrupting us
+MAX_READ_ATTEMPTS = 100
+
+
+class SharedGameStateBuffer(object):
+    """
+    A fixed layout shared memory block holding SHARED_FIELDS of a gamestate.
+    Create it in the coordinator (create=True) before the providers are
+    started; it can be pickled and will reattach by name in the child.
+    """
+    def __init__(self, name=None, create=True):
+        # import here to avoid circular imports (see coordinator.py)
+        from .gamestate import BALL_POS_HISTORY_LENGTH, ROBOT_POS_HISTORY_LENGTH  # noqa
+        if shared_memory is None:
+            raise RuntimeError("Shared memory requires python 3.8 or above")
+        self._ball_length = BALL_POS_HISTORY_LENGTH
+        self._robot_length = ROBOT_POS_HISTORY_LENGTH
+        self._create = create
+        size = self._layout(None)
+        self._shm = shared_memory.SharedMemory(name=name, create=create,
+                                               size=size)
+        if not create:
+            # only the creator should clean up the memory block, see
+            # https://bugs.python.org/issue39959
+            try:
+                resource_tracker.unregister(self._shm._name, 'shared_memory')
+            except Exception:  # noqa
+                pass
+        self._layout(self._shm.buf)
+        if create:
+            self._header[:] = 0
+            self._data[:] = 0
+        # versions of each field this process has already read
+        self._read_versions = {}
+
+    @staticmethod
+    def is_supported():
+        return shared_memory is not None
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def fields(self):
+        return SHARED_FIELDS
+
+    def __getstate__(self):
+        return {'name': self.name}
+
+    def __setstate__(self, state):
+        self.__init__(state['name'], create=False)
+
+    def _layout(self, buf):
+        """
+        Creates numpy views into buf for each section of the block.
+        Returns the total number of bytes needed.
+        """
+        header_length = 1 + len(SHARED_FIELDS)
+        header_bytes = header_length * 8
+        sections = [
+            # (attribute name, shape)
+            ('_ball_meta', (2,)),
+            ('_ball_times', (self._ball_length,)),
+            ('_ball_positions', (self._ball_length, 2)),
+            ('_robot_meta', (2, MAX_ROBOTS, 2)),
+            ('_robot_times', (2, MAX_ROBOTS, self._robot_length)),
+            ('_robot_positions', (2, MAX_ROBOTS, self._robot_length, 3)),
+            ('_commands', (2, MAX_ROBOTS, COMMANDS_RECORD_LENGTH)),
+            ('_status', (2, MAX_ROBOTS, 2)),
+        ]
+        data_length = sum(int(np.prod(shape)) for _, shape in sections)
+        if buf is None:
+            return header_bytes + data_length * 8
+        # header is [sequence number, version of each field]
+        self._header = np.ndarray((header_length,), dtype=np.uint64,
+                                  buffer=buf)
+        self._data = np.ndarray((data_length,), dtype=np.float64,
+                                buffer=buf, offset=header_bytes)
+        offset = 0
+        for attr, shape in sections:
+            length = int(np.prod(shape))
+            setattr(self, attr,
+                    self._data[offset:offset + length].reshape(shape))
+            offset += length
+        return header_bytes + data_length * 8
+
+    def close(self):
+        self._shm.close()
+
+    def unlink(self):
+        if self._create:
+            self._shm.unlink()
+
+    # WRITER SIDE
+    def write(self, gs, fields=None):
+        """
+        Copies the given fields (default all shared) of gs into memory.
+        Returns whether any of them changed.
+        """
+        if fields is None:
+            fields = SHARED_FIELDS
+        changed = False
+        self._header[0] += 1  # odd sequence number - write in progress
+        try:
+            for field in fields:
+                index = SHARED_FIELDS.index(field)
+                value = getattr(gs, field)
+                if value is None:
+                    continue
+                if self._write_field(field, value):
+                    self._header[index + 1] += 1
+                    changed = True
+        finally:
+            self._header[0] += 1
+        return changed
+
+    def _write_field(self, field, value):
+        """Writes a single field, returns whether anything changed"""
+        if field == '_ball_position':
+            return self._write_history(value, self._ball_meta,
+                                       self._ball_times, self._ball_positions)
+        t = TEAMS.index(field.split('_')[1])
+        for robot_id in value:
+            if not 0 <= robot_id < MAX_ROBOTS:
+                raise ValueError("robot_id={} is too big".format(robot_id))
+        if field.endswith('_positions'):
+            changed = False
+            for robot_id in range(MAX_ROBOTS):
+                meta = self._robot_meta[t, robot_id]
+                if robot_id not in value:
+                    changed = changed or meta[1] != 0
+                    meta[:] = 0
+                    continue
+                changed = self._write_history(
+                    value[robot_id], meta, self._robot_times[t, robot_id],
+                    self._robot_positions[t, robot_id]) or changed
+            return changed
+        if field.endswith('_commands'):
+            records = np.zeros((MAX_ROBOTS, COMMANDS_RECORD_LENGTH))
+            for robot_id, commands in value.items():
+                records[robot_id] = self._commands_record(commands)
+            return self._write_if_changed(self._commands[t], records)
+        assert field.endswith('_status')
+        records = np.zeros((MAX_ROBOTS, 2))
+        for robot_id, status in value.items():
+            records[robot_id] = [1, status.charge_level]
+        return self._write_if_changed(self._status[t], records)
+
+    def _write_if_changed(self, section, records):
+        if np.array_equal(section, records):
+            return False
+        section[:] = records
+        return True
+
+    def _write_history(self, history, meta, times, positions):
+        """
+        Writes a PositionHistory into a ring buffer,
+        only copying the entries that are newer than what is stored.
+        """
+        head, count = int(meta[0]), int(meta[1])
+        if len(history) == 0:
+            meta[:] = 0
+            return count > 0
+        length = len(times)
+        history_times = history.get_times()
+        num_new = len(history)
+        if count > 0:
+            latest_time = times[head]
+            # entries at the front that are newer than what we have
+            is_newer = history_times > latest_time
+            if not is_newer.all():
+                num_new = int(np.argmin(is_newer))
+            # if the history does not continue from what we have stored
+            # (i.e. it was cleared) then rewrite everything
+            if num_new == len(history) or \
+                    history_times[num_new] != latest_time:
+                num_new = len(history)
+                head, count = length - 1, 0
+        if num_new == 0:
+            return False
+        # write from oldest to newest, moving the head forward
+        k = min(num_new, length)
+        slots = (head + 1 + np.arange(k)) % length
+        times[slots] = history_times[k - 1::-1]
+        positions[slots] = history.get_positions(k)[::-1]
+        meta[0] = slots[-1]
+        meta[1] = min(count + num_new, length)
+        return True
+
+    def _commands_record(self, commands):
+        record = np.zeros(COMMANDS_RECORD_LENGTH)
+        record[:9] = [1, commands._x, commands._y, commands._w,
+                      commands._speed_limit, commands.is_dribbling,
+                      commands.is_charging, commands.is_kicking,
+                      commands._prev_waypoint is not None]
+        if commands._prev_waypoint is not None:
+            record[9:12] = self._to_floats(commands._prev_waypoint)
+        waypoints = commands.waypoints[:MAX_WAYPOINTS]
+        record[12] = len(waypoints)
+        for i, waypoint in enumerate(waypoints):
+            start = len(COMMANDS_HEADER) + 3 * i
+            record[start:start + 3] = self._to_floats(waypoint)
+        return record
+
+    def _to_floats(self, pos):
+        # waypoints can be object arrays that contain None for w
+        return [np.nan if v is None else v for v in pos]
+
+    # READER SIDE
+    def read_into(self, gs, fields=None):
+        """
+        Updates the given fields (default all shared) of gs from memory.
+        Fields that have not changed since the last read are skipped.
+        Returns whether a consistent snapshot was read.
+        """
+        if fields is None:
+            fields = SHARED_FIELDS
+        for _ in range(MAX_READ_ATTEMPTS):
+            sequence = int(self._header[0])
+            if sequence % 2 == 1:
+                continue
+            versions = self._header[1:].copy()
+            snapshot = {}
+            for field in fields:
+                index = SHARED_FIELDS.index(field)
+                is_stale = getattr(gs, field) is None or \
+                    self._read_versions.get(field) != versions[index]
+                if is_stale:
+                    snapshot[field] = self._copy_field(field)
+            if int(self._header[0]) != sequence:
+                continue
+            for field, raw in snapshot.items():
+                index = SHARED_FIELDS.index(field)
+                self._read_field(gs, field, raw)
+                self._read_versions[field] = versions[index]
+            return True
+        return False
+
+    def _copy_field(self, field):
+        """Copies the raw arrays of a field out of shared memory"""
+        if field == '_ball_position':
+            return (self._ball_meta.copy(), self._ball_times.copy(),
+                    self._ball_positions.copy())
+        t = TEAMS.index(field.split('_')[1])
+        if field.endswith('_positions'):
+            return (self._robot_meta[t].copy(), self._robot_times[t].copy(),
+                    self._robot_positions[t].copy())
+        if field.endswith('_commands'):
+            return self._commands[t].copy()
+        return self._status[t].copy()
+
+    def _read_field(self, gs, field, raw):
+        from .gamestate import BALL_POS_HISTORY_LENGTH, ROBOT_POS_HISTORY_LENGTH  # noqa
+        value = getattr(gs, field)
+        if field == '_ball_position':
+            if value is None:
+                value = PositionHistory(BALL_POS_HISTORY_LENGTH, 2)
+            setattr(gs, field, self._read_history(value, *raw))
+            gs._ball_position_changed()
+        elif field.endswith('_positions'):
+            value = dict() if value is None else value
+            meta, times, positions = raw
+            for robot_id in range(MAX_ROBOTS):
+                if meta[robot_id][1] == 0:
+                    value.pop(robot_id, None)
+                    continue
+                history = value.get(robot_id)
+                if history is None:
+                    history = PositionHistory(ROBOT_POS_HISTORY_LENGTH, 3)
+                value[robot_id] = self._read_history(
+                    history, meta[robot_id], times[robot_id],
+                    positions[robot_id])
+            setattr(gs, field, value)
+            gs._robot_positions_changed()
+        elif field.endswith('_commands'):
+            value = dict()
+            for robot_id in range(MAX_ROBOTS):
+                if raw[robot_id][0]:
+                    value[robot_id] = self._commands_from_record(
+                        raw[robot_id])
+            setattr(gs, field, value)
+        else:
+            value = dict()
+            for robot_id in range(MAX_ROBOTS):
+                if raw[robot_id][0]:
+                    status = RobotStatus()
+                    status.charge_level = raw[robot_id][1]
+                    value[robot_id] = status
+            setattr(gs, field, value)
+
+    def _read_history(self, history, meta, times, positions):
+        """
+        Brings a PositionHistory up to date with a ring buffer,
+        only appending the entries it does not have yet if possible.
+        """
+        head, count = int(meta[0]), int(meta[1])
+        length = len(times)
+        latest_time = history[0][0] if len(history) > 0 else None
+        num_new = 0
+        while num_new < count and (latest_time is None or
+                                   times[(head - num_new) % length] > latest_time):  # noqa
+            num_new += 1
+        is_continuous = latest_time is not None and num_new < count and \
+            times[(head - num_new) % length] == latest_time
+        if not is_continuous:
+            history.clear()
+            num_new = count
+        for i in range(num_new - 1, -1, -1):
+            index = (head - i) % length
+            history.add(times[index], positions[index])
+        return history
+
+    def _commands_from_record(self, record):
+        commands = RobotCommands()
+        commands._x, commands._y, commands._w = record[1:4]
+        commands._speed_limit = record[4]
+        commands.is_dribbling = bool(record[5])
+        commands.is_charging = bool(record[6])
+        commands.is_kicking = bool(record[7])
+        if record[8]:
+            commands._prev_waypoint = record[9:12].copy()
+        start = len(COMMANDS_HEADER)
+        for i in range(int(record[12])):
+            commands.waypoints.append(
+                record[start + 3 * i:start + 3 * i + 3].copy())
+        return commands
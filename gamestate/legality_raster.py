@@ -0,0 +1,101 @@
+import numpy as np
+
+# cell size of the legality grid (mm)
+LEGALITY_RASTER_RESOLUTION = 20
+# cell values
+ILLEGAL = 0
+LEGAL = 1
+# a rule boundary goes through the cell, so check points in it exactly
+BOUNDARY = 2
+
+
+class LegalityRaster(object):
+    """
+    Grid over the field of where a robot is allowed to be, for the rules
+    that only depend on the field (field edges and defense areas), so
+    checking a position is just an array lookup. Rules depending on the
+    ball are up to gs.are_pos_legal().
+    The rules are unions/intersections of rectangles (min x, min y,
+    max x, max y), each of which we can check exactly:
+    legal = in the field and not in any of the forbidden rectangles.
+    """
+    def __init__(self, field, forbidden,
+                 resolution=LEGALITY_RASTER_RESOLUTION):
+        self.field = np.asarray(field, dtype=float)
+        self.forbidden = np.asarray(forbidden, dtype=float).reshape(-1, 4)
+        self.resolution = resolution
+        min_x, min_y, max_x, max_y = self.field
+        self.shape = (int(np.ceil((max_x - min_x) / resolution)),
+                      int(np.ceil((max_y - min_y) / resolution)))
+        # a cell is uniform if each rule's rectangle contains all or none
+        # of its corners (rectangles are bigger than the cells)
+        xs = min_x + np.arange(self.shape[0] + 1) * resolution
+        ys = min_y + np.arange(self.shape[1] + 1) * resolution
+        all_in, any_in = self._corners_in(self.field, xs, ys)
+        uniform = all_in | ~any_in
+        cells = np.where(all_in, LEGAL, ILLEGAL).astype(np.int8)
+        for rectangle in self.forbidden:
+            all_in, any_in = self._corners_in(rectangle, xs, ys)
+            uniform &= all_in | ~any_in
+            cells[any_in] = ILLEGAL
+        cells[~uniform] = BOUNDARY
+        self.cells = cells
+        # plain floats for checking single points quickly
+        self._bounds = tuple(float(bound) for bound in self.field)
+
+    @staticmethod
+    def _corners_in(rectangle, xs, ys):
+        "whether all/any corners of each grid cell are in the rectangle"
+        in_x = (rectangle[0] <= xs) & (xs <= rectangle[2])
+        in_y = (rectangle[1] <= ys) & (ys <= rectangle[3])
+        corners = in_x[:, None] & in_y[None, :]
+        all_in = corners[:-1, :-1] & corners[1:, :-1] & \
+            corners[:-1, 1:] & corners[1:, 1:]
+        any_in = corners[:-1, :-1] | corners[1:, :-1] | \
+            corners[:-1, 1:] | corners[1:, 1:]
+        return all_in, any_in
+
+    def _cell_index(self, points):
+        "cell of each point, and whether it is on the grid at all"
+        min_x, min_y, max_x, max_y = self.field
+        x, y = points[:, 0], points[:, 1]
+        on_grid = (min_x <= x) & (x <= max_x) & (min_y <= y) & (y <= max_y)
+        i = np.clip(((x - min_x) // self.resolution).astype(int),
+                    0, self.shape[0] - 1)
+        j = np.clip(((y - min_y) // self.resolution).astype(int),
+                    0, self.shape[1] - 1)
+        return i, j, on_grid
+
+    def exact(self, points):
+        "legality of points by checking all the rules"
+        x, y = points[:, 0], points[:, 1]
+        field = self.field
+        legal = (field[0] <= x) & (x <= field[2]) & \
+            (field[1] <= y) & (y <= field[3])
+        for rectangle in self.forbidden:
+            legal &= ~((rectangle[0] <= x) & (x <= rectangle[2]) &
+                       (rectangle[1] <= y) & (y <= rectangle[3]))
+        return legal
+
+    def are_legal(self, points):
+        """Legality of each point of an (N, 2+) array"""
+        points = np.asarray(points, dtype=float)
+        i, j, on_grid = self._cell_index(points)
+        cells = np.where(on_grid, self.cells[i, j], ILLEGAL)
+        legal = cells == LEGAL
+        boundary = np.flatnonzero(cells == BOUNDARY)
+        if len(boundary) > 0:
+            legal[boundary] = self.exact(points[boundary])
+        return legal
+
+    def is_legal(self, x, y):
+        """Legality of a single point"""
+        min_x, min_y, max_x, max_y = self._bounds
+        if not (min_x <= x <= max_x and min_y <= y <= max_y):
+            return False
+        i = min(int((x - min_x) // self.resolution), self.shape[0] - 1)
+        j = min(int((y - min_y) // self.resolution), self.shape[1] - 1)
+        cell = self.cells.item(i, j)
+        if cell == BOUNDARY:
+            return bool(self.exact(np.array([[x, y]]))[0])
+        return cell == LEGAL
@@ -0,0 +1,92 @@
+import numpy as np
+
+
+class PositionHistory(object):
+    """
+    Fixed size history of (time, position), stored in preallocated ring
+    buffer arrays so adding an entry doesn't allocate anything.
+    Indexing/iterating gives (time, position) tuples with the most recent
+    first, like the deques of tuples we used to keep. Positions returned
+    this way are copies, so they stay the same when the buffer wraps.
+    """
+    def __init__(self, maxlen, dim):
+        self.maxlen = maxlen
+        self.dim = dim
+        self._times = np.zeros(maxlen)
+        self._positions = np.zeros((maxlen, dim))
+        # index of the most recent entry
+        self._head = -1
+        self._len = 0
+        # offsets from the head, for vectorized window slicing
+        self._offsets = np.arange(maxlen)
+
+    @classmethod
+    def from_arrays(cls, maxlen, times, positions):
+        """Makes a history from arrays ordered most recent first"""
+        history = cls(maxlen, positions.shape[1])
+        n = min(len(times), maxlen)
+        history._times[:n] = times[n - 1::-1] if n else times[:0]
+        history._positions[:n] = positions[n - 1::-1] if n else positions[:0]
+        history._head = n - 1
+        history._len = n
+        return history
+
+    def __len__(self):
+        return self._len
+
+    def _index(self, i):
+        "buffer index of the i-th most recent entry"
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError("history index out of range")
+        return (self._head - i) % self.maxlen
+
+    def __getitem__(self, i):
+        index = self._index(i)
+        return float(self._times[index]), self._positions[index].copy()
+
+    def __iter__(self):
+        for i in range(self._len):
+            yield self[i]
+
+    def add(self, timestamp, pos):
+        self._head = (self._head + 1) % self.maxlen
+        self._times[self._head] = timestamp
+        self._positions[self._head] = pos
+        self._len = min(self._len + 1, self.maxlen)
+
+    def clear(self):
+        self._head = -1
+        self._len = 0
+
+    def _window(self, n):
+        if n is None or n > self._len:
+            n = self._len
+        return (self._head - self._offsets[:n]) % self.maxlen
+
+    def get_times(self, n=None):
+        """Times of the n (default all) most recent entries, newest first"""
+        return self._times[self._window(n)]
+
+    def get_positions(self, n=None):
+        """Positions of the n (default all) most recent entries"""
+        return self._positions[self._window(n)]
+
+    def index_before(self, interval):
+        """
+        Index of the most recent entry that is at least interval older than
+        the latest one, or of the oldest entry if there is none
+        """
+        times = self.get_times()
+        older = np.flatnonzero(times[0] - times >= interval)
+        return older[0] if len(older) > 0 else self._len - 1
+
+    def __getstate__(self):
+        # only pickle the entries in use, in order
+        return self.maxlen, self.get_times(), self.get_positions()
+
+    def __setstate__(self, state):
+        maxlen, times, positions = state
+        history = self.from_arrays(maxlen, times, positions)
+        self.__dict__.update(history.__dict__)
@@ -0,0 +1,85 @@
+"""
+Where a point moving along a segment first runs into things, solved
+exactly rather than by stepping along it. A robot (disc) sweeping along
+a path is the same as its center moving against obstacles grown by its
+radius, so these all work on the center.
+Times are fractions of the way along the segment, in [0, 1], with
+np.inf for obstacles it never reaches.
+"""
+import numpy as np
+
+
+def segment_circles_entry(start, end, centers, radii):
+    """
+    When the segment first gets inside each of the (N, 2) circles.
+    A circle the start is already inside only counts (at time 0) if the
+    segment heads further into it, so we can always move away from
+    something we're overlapping.
+    """
+    start, direction = _start_direction(start, end)
+    offsets = np.subtract(start, np.asarray(centers, dtype=float)[:, :2])
+    # |offset + t * direction| = radius, a t^2 + 2 half_b t + c = 0
+    a = direction[0] ** 2 + direction[1] ** 2
+    half_b = offsets @ direction
+    c = (offsets * offsets).sum(axis=1) - np.square(radii)
+    if a == 0:
+        return np.full(len(offsets), np.inf)
+    discriminant = half_b * half_b - a * c
+    entry = (-half_b - np.sqrt(np.maximum(discriminant, 0))) / a
+    times = np.where((discriminant >= 0) & (entry >= 0) & (entry <= 1),
+                     entry, np.inf)
+    times[(c < 0) & (half_b < 0)] = 0
+    return times
+
+
+def _slab(start, direction, rectangle):
+    """
+    times the line through the segment enters and leaves a rectangle
+    (there are only ever a few of them, so this is plain python)
+    """
+    enter, leave = -np.inf, np.inf
+    for axis in range(2):
+        low, high = rectangle[axis], rectangle[axis + 2]
+        if direction[axis] == 0:
+            # parallel, so always or never between the sides
+            if not low <= start[axis] <= high:
+                return np.inf, -np.inf
+            continue
+        t1 = (low - start[axis]) / direction[axis]
+        t2 = (high - start[axis]) / direction[axis]
+        if t1 > t2:
+            t1, t2 = t2, t1
+        enter = max(enter, t1)
+        leave = min(leave, t2)
+    return enter, leave
+
+
+def _start_direction(start, end):
+    start = (float(start[0]), float(start[1]))
+    return start, (float(end[0]) - start[0], float(end[1]) - start[1])
+
+
+def segment_rectangles_entry(start, end, rectangles):
+    """
+    When the segment first gets into each of the (min x, min y, max x,
+    max y) rectangles, 0 if it starts in one
+    """
+    start, direction = _start_direction(start, end)
+    times = []
+    for rectangle in np.asarray(rectangles, dtype=float).reshape(-1, 4) \
+            .tolist():
+        enter, leave = _slab(start, direction, rectangle)
+        hit = enter <= leave and leave >= 0 and enter <= 1
+        times.append(max(enter, 0) if hit else np.inf)
+    return np.array(times)
+
+
+def segment_rectangle_exit(start, end, rectangle):
+    """
+    When the segment leaves the rectangle, 0 if it starts outside
+    """
+    start, direction = _start_direction(start, end)
+    enter, leave = _slab(start, direction, [float(x) for x in rectangle])
+    if enter > 0 or leave < 0:
+        return 0
+    return leave if leave <= 1 else np.inf
@@ -0,0 +1,46 @@
+import numpy as np
+from ..gamestate import GameState
+
+
+def rolling_ball(gs, start, velocity, n, dt=.01):
+    "adds n positions of a ball rolling with the deceleration model"
+    pos, v = np.array(start, dtype=float), np.array(velocity, dtype=float)
+    for i in range(n):
+        gs.update_ball_position(pos.copy(), i * dt)
+        speed = np.linalg.norm(v)
+        pos += v * dt
+        v *= max(0, 1 - gs.BALL_DECCELERATION * dt / speed)
+    return v
+
+
+def test_velocity_from_two_positions():
+    # like simulator.put_fake_ball
+    gs = GameState()
+    gs.update_ball_position(np.array([0., 0.]), 0.)
+    gs.update_ball_position(np.array([50., 0.]), .05)
+    assert np.allclose(gs.get_ball_velocity(), [1000, 0], atol=1)
+
+
+def test_tracks_rolling_ball():
+    gs = GameState()
+    rolling_ball(gs, [0, 0], [2000, -1000], 50)
+    velocity = gs.get_ball_velocity()
+    # true velocity at the last sample
+    expected = rolling_ball(GameState(), [0, 0], [2000, -1000], 49)
+    assert np.allclose(velocity, expected, rtol=.02)
+    position, _, covariance = gs.get_ball_estimate()
+    assert covariance.shape == (4, 4)
+    assert np.allclose(position, gs.get_ball_position(), atol=1)
+
+
+def test_estimate_rebuilt_from_history():
+    gs = GameState()
+    rolling_ball(gs, [0, 0], [2000, 0], 30)
+    other = GameState()
+    other.decode_field('_ball_position', gs.encode_field('_ball_position'))
+    gs.clear_ball_position()
+    rolling_ball(gs, [0, 0], [0, 1000], 30)
+    # ball was replaced, receiver should start over
+    other.decode_field('_ball_position', gs.encode_field('_ball_position'))
+    assert np.allclose(other.get_ball_velocity(), gs.get_ball_velocity(),
+                       rtol=.05, atol=5)
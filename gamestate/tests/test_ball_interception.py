@@ -0,0 +1,79 @@
+import numpy as np
+from ..gamestate import GameState
+from ..ball_interception import intercept_times, safest_intercept_times
+
+
+def ball_trajectory(position, velocity):
+    gs = GameState()
+    position, velocity = np.array(position), np.array(velocity)
+    gs.update_ball_position(position - velocity * .05, 0.)
+    gs.update_ball_position(position, .05)
+    return gs.get_ball_trajectory()
+
+
+def sampled_intercept(trajectory, robot_pos, max_speed, now):
+    "first time robot gets to the ball's path in time, by brute force"
+    times = np.linspace(0, 20, 200001)
+    positions = trajectory.positions_at(times)
+    elapsed = now - trajectory.start_time
+    reachable = max_speed * (times - elapsed) >= \
+        np.linalg.norm(positions - robot_pos, axis=1)
+    return times[np.argmax(reachable)] if reachable.any() else np.nan
+
+
+def test_matches_sampled_solution():
+    trajectory = ball_trajectory([-1000., 500.], [1500., -300.])
+    robots = np.array([[0., 0.], [2000., 2000.], [-1000., 500.],
+                       [3000., -500.]])
+    max_speeds = np.array([1000., 500., 2000., 300.])
+    now = trajectory.start_time + .1
+    earliest, latest = intercept_times(trajectory, robots, max_speeds, now)
+    for i in range(len(robots)):
+        expected = sampled_intercept(trajectory, robots[i], max_speeds[i],
+                                     now)
+        assert abs(earliest[i] - expected) < 1e-3
+        assert latest[i] >= earliest[i]
+
+
+def test_ball_leaving_field():
+    trajectory = ball_trajectory([4000., 0.], [3000., 0.])
+    assert trajectory.exit_time < trajectory.stop_time
+    earliest, latest = intercept_times(
+        trajectory, np.array([[-4000., 0.], [4300., 0.]]), 1000.,
+        trajectory.start_time)
+    # too far away to get there before it's out
+    assert np.isnan(earliest[0]) and np.isnan(latest[0])
+    # close enough to get in front of it, until it's gone past
+    assert 0 < earliest[1] < latest[1] < trajectory.exit_time
+
+
+def test_safest_matches_sampled_solution():
+    trajectory = ball_trajectory([-1000., 500.], [1500., -300.])
+    robots = np.array([[0., 0.], [2000., 2000.], [-1000., 500.],
+                       [3000., -500.], [-3000., 2000.]])
+    max_speeds = np.array([1000., 500., 2000., 300., 500.])
+    safest = safest_intercept_times(trajectory, robots, max_speeds)
+    end = min(trajectory.stop_time, trajectory.exit_time)
+    times = np.linspace(0, end, 200001)
+    positions = trajectory.positions_at(times)
+    for i in range(len(robots)):
+        spare = times - np.linalg.norm(positions - robots[i],
+                                       axis=1) / max_speeds[i]
+        assert abs(safest[i] - times[np.argmax(spare)]) < 1e-3
+
+
+def test_missing_robot():
+    gs = GameState()
+    gs.update_ball_position(np.array([0, 0]), 0.)
+    gs.update_robot_position('blue', 0, np.array([1000, 0, 0]))
+    intercepts = gs.get_ball_intercepts()
+    assert intercepts.index('blue', 0) == 0
+    assert intercepts.index('blue', 5) is None
+    assert not intercepts.can_intercept('blue', 5)
+
+
+def test_stopped_ball():
+    trajectory = ball_trajectory([0., 0.], [0., 0.])
+    earliest, latest = intercept_times(
+        trajectory, np.array([[1000., 0.]]), 1000., trajectory.start_time)
+    assert np.allclose(earliest, 1) and latest[0] == np.inf
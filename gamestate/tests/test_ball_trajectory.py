@@ -0,0 +1,37 @@
+import numpy as np
+from ..gamestate import GameState
+
+
+def moving_ball(velocity):
+    gs = GameState()
+    gs.update_ball_position(np.array([0., 0.]) - np.array(velocity) * .05, 0.)
+    gs.update_ball_position(np.array([0., 0.]), .05)
+    return gs
+
+
+def test_trajectory_matches_single_predictions():
+    gs = moving_ball([600., -300.])
+    times = np.linspace(0, 5, 51)
+    trajectory = gs.predict_ball_trajectory(times)
+    for t, pos in zip(times, trajectory):
+        assert np.allclose(gs.predict_ball_pos(t), pos)
+    # stops rather than rolling back
+    assert np.allclose(trajectory[-1], trajectory[-2])
+
+
+def test_cached_trajectory_ends_when_ball_stops():
+    gs = moving_ball([700., 0.])
+    trajectory = gs.get_ball_trajectory()
+    assert gs.get_ball_trajectory() is trajectory
+    assert np.array_equal(trajectory.positions[-1], trajectory.positions[-2])
+    assert not np.array_equal(trajectory.positions[-2],
+                              trajectory.positions[-3])
+    assert np.allclose(trajectory.final_position(), trajectory.positions[-1])
+    assert trajectory.times[0] == .05
+
+
+def test_cached_trajectory_ends_out_of_field():
+    gs = moving_ball([0., 6000.])
+    positions = gs.get_ball_trajectory().positions
+    assert positions[-1][1] > gs.FIELD_MAX_Y
+    assert (positions[:-1, 1] <= gs.FIELD_MAX_Y).all()
@@ -0,0 +1,71 @@
+import numpy as np
+from refbox import SSL_Referee  # pylint: disable=import-error
+from ..gamestate import GameState
+from ..free_space import FreeSpaceMap
+
+
+def crowded_gamestate():
+    gs = GameState()
+    rng = np.random.RandomState(1)
+    for team in ['blue', 'yellow']:
+        for robot_id in range(6):
+            pos = rng.uniform([-3000, -2000], [3000, 2000])
+            gs.update_robot_position(team, robot_id,
+                                     np.array([pos[0], pos[1], 0]))
+    return gs
+
+
+def brute_force_distance(gs, pos, team, robot_id):
+    "distance to the nearest free point of a fine grid around pos"
+    offsets = np.mgrid[-1500:1500:10, -1500:1500:10].reshape(2, -1).T
+    points = pos + offsets
+    free = gs.are_pos_legal(points, team, robot_id) & \
+        gs.are_positions_open(points, team, robot_id)
+    return np.hypot(*offsets[free].T).min()
+
+
+def test_nearest_free_position():
+    gs = crowded_gamestate()
+    rng = np.random.RandomState(2)
+    queries = [gs.get_robot_position('yellow', i)[:2] for i in range(6)]
+    queries += list(rng.uniform([-4500, -3000], [4500, 3000], (20, 2)))
+    # in the defense area, away from any robot
+    queries.append(np.array([gs.FIELD_MIN_X + 100, 0]))
+    for pos in queries:
+        free_pos = gs.nearest_free_position(pos, 'blue', 1)
+        assert gs.is_pos_legal(free_pos, 'blue', 1)
+        assert gs.is_position_open(free_pos, 'blue', 1)
+        distance = np.linalg.norm(free_pos - pos)
+        assert distance <= brute_force_distance(gs, pos, 'blue', 1) + 30
+
+
+def test_ball_rules_follow_the_ball():
+    gs = crowded_gamestate()
+    gs.update_ball_position(np.array([0, 0]))
+    FreeSpaceMap(gs, 'blue', 1)
+    # the field rules are kept, the ball ones checked again
+    gs.get_refbox_command = lambda: SSL_Referee.STOP
+    gs.update_ball_position(np.array([1000, 500]))
+    free_space = FreeSpaceMap(gs, 'blue', 1)
+    cells = np.argwhere(free_space.free)
+    centers = free_space.cell_centers(cells)
+    assert gs.are_pos_legal(centers, 'blue', 1).all()
+    near_ball = np.hypot(*(centers - [1000, 500]).T) < 500
+    assert not near_ball.any()
+
+
+def test_robot_position_is_free():
+    gs = crowded_gamestate()
+    pos = gs.get_robot_position('blue', 3)[:2]
+    assert np.array_equal(gs.nearest_free_position(pos, 'blue', 3), pos)
+
+
+def test_nearest_free_position_on_line():
+    gs = crowded_gamestate()
+    pos = gs.get_robot_position('yellow', 0)[:2]
+    direction = np.array([0, 1])
+    free_pos = gs.nearest_free_position_on_line(pos, direction, 2000,
+                                                'blue', 1)
+    assert free_pos[0] == pos[0]
+    assert gs.is_pos_legal(free_pos, 'blue', 1)
+    assert gs.is_position_open(free_pos, 'blue', 1)
@@ -0,0 +1,39 @@
+import numpy as np
+from refbox import SSL_Referee  # pylint: disable=import-error
+from ..gamestate import GameState
+
+
+def exact_is_pos_legal(gs, pos, team, robot_id):
+    "the rules without the raster"
+    in_own = gs.is_in_defense_area(pos, team) and \
+        not gs.is_goalie(team, robot_id)
+    return gs.is_in_field(pos) and not in_own and \
+        not gs.is_in_defense_area(pos, gs.other_team(team))
+
+
+def test_raster_matches_rules():
+    gs = GameState()
+    rng = np.random.RandomState(0)
+    points = rng.uniform(-5000, 5000, (5000, 2))
+    # points right on the edges of the field and defense areas
+    for team in ['blue', 'yellow']:
+        min_x, min_y, max_x, max_y = gs.defense_area_rectangle(team)
+        points = np.vstack([points, [[min_x, 0], [max_x, 0], [max_x, max_y],
+                                     [np.nextafter(max_x, np.inf), 0]]])
+    points = np.vstack([points, [[gs.FIELD_MAX_X, 0], [0, gs.FIELD_MIN_Y]]])
+    goalie = gs.get_goalie_id('blue')
+    for robot_id in [goalie, goalie + 1]:
+        legal = gs.are_pos_legal(points, 'blue', robot_id)
+        for pos, is_legal in zip(points, legal):
+            expected = exact_is_pos_legal(gs, pos, 'blue', robot_id)
+            assert is_legal == expected
+            assert gs.is_pos_legal(pos, 'blue', robot_id) == expected
+
+
+def test_ball_rules():
+    gs = GameState()
+    gs.update_ball_position(np.array([0., 0.]))
+    gs.get_refbox_command = lambda: SSL_Referee.STOP
+    points = np.array([[100., 0.], [1000., 0.]])
+    assert list(gs.are_pos_legal(points, 'blue', 1)) == [False, True]
+    assert not gs.is_pos_legal(points[0], 'blue', 1)
@@ -0,0 +1,34 @@
+# pylint: disable=import-error
+import numpy as np
+from refbox import SSL_Referee
+from ..gamestate import GameState
+
+
+def test_memoize_invalidates():
+    gs = GameState()
+    gs.update_ball_position(np.array([0, 0]), 0.)
+    value = gs.memoize(('ball',), gs.get_ball_position)
+    assert gs.memoize(('ball',), gs.get_ball_position) is value
+    assert gs.get_memo_stats()['ball'] == {'hits': 1, 'misses': 1}
+    # cached arrays can't be changed by callers
+    assert not value.flags.writeable
+    gs.update_ball_position(np.array([300, 0]), 2.)
+    assert gs.memoize(('ball',), gs.get_ball_position)[0] == 300
+    assert gs.get_memo_stats()['ball']['misses'] == 2
+
+
+def test_memoized_goal_follows_refbox():
+    gs = GameState()
+    gs.update_robot_position('blue', 0, np.array([0, 0, 0]))
+    goal = gs.get_defense_goal('blue')
+    assert gs.get_defense_goal('blue') is goal
+    gs.update_robot_position('blue', 0, np.array([10, 0, 0]))
+    gs.update_ball_position(np.array([0, 0]), 0.)
+    # it only depends on the refbox message, so it's kept
+    assert gs.get_defense_goal('blue') is goal
+    # until the sides swap
+    message = SSL_Referee()
+    message.CopyFrom(gs.get_latest_refbox_message())
+    message.blueTeamOnPositiveHalf = not message.blueTeamOnPositiveHalf
+    gs.update_latest_refbox_message(message.SerializeToString())
+    assert gs.get_defense_goal('blue')[0][0] == -goal[0][0]
@@ -0,0 +1,30 @@
+# pylint: disable=import-error
+import pickle
+import numpy as np
+from ..position_history import PositionHistory
+
+
+def test_position_history_wraps_around():
+    """Tests that the history keeps the most recent entries first once the
+    ring buffer wraps, and that returned positions are not overwritten.
+    """
+    history = PositionHistory(3, 2)
+    history.add(1.0, np.array([1, 1]))
+    first_time, first_pos = history[0]
+    for i in range(2, 6):
+        history.add(float(i), np.array([i, i]))
+    assert len(history) == 3
+    assert [t for t, _ in history] == [5.0, 4.0, 3.0]
+    assert (history[-1][1] == [3, 3]).all()
+    assert (first_pos == [1, 1]).all()
+    assert (history.get_positions(2) == [[5, 5], [4, 4]]).all()
+    assert history.index_before(1.5) == 2
+    assert history.index_before(10) == 2
+
+    copy = pickle.loads(pickle.dumps(history))
+    assert [t for t, _ in copy] == [5.0, 4.0, 3.0]
+    copy.add(6.0, np.array([6, 6]))
+    assert (copy.get_times() == [6, 5, 4]).all()
+
+    history.clear()
+    assert len(history) == 0
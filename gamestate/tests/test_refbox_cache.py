@@ -0,0 +1,27 @@
+# pylint: disable=import-error
+from refbox import SSL_Referee
+from ..gamestate import GameState
+
+
+def test_refbox_message_only_parsed_when_changed():
+    """Tests that the parsed refbox message is reused until a new message
+    is stored, either through update_latest_refbox_message or by the string
+    being replaced directly (as when it comes from another process).
+    """
+    gs = GameState()
+    message = gs.get_latest_refbox_message()
+    assert gs.get_latest_refbox_message() is message
+
+    new_message = SSL_Referee()
+    new_message.CopyFrom(message)
+    new_message.command = SSL_Referee.STOP
+    new_message.blue.goalie = 3
+    gs.update_latest_refbox_message(new_message.SerializeToString())
+    assert gs.get_refbox_command() == SSL_Referee.STOP
+    assert gs.is_goalie('blue', 3)
+
+    other = GameState()
+    other.decode_field('_latest_refbox_message_string',
+                       gs.encode_field('_latest_refbox_message_string'))
+    assert other.get_refbox_command() == SSL_Referee.STOP
+    assert other.get_goalie_id('blue') == 3
@@ -0,0 +1,45 @@
+import numpy as np
+from ..gamestate import GameState, ROBOT_LOST_TIME, ROBOT_REMOVE_TIME
+
+
+def test_sweep_lost_robots():
+    gs = GameState()
+    gs.update_robot_position('blue', 0, np.array([0, 0, 0]))
+    gs.update_robot_position('blue', 1, np.array([500, 0, 0]))
+    now = gs.get_robot_last_update_time('blue', 1)
+    assert not gs.is_robot_lost('blue', 0)
+    gs.sweep_lost_robots(now + ROBOT_LOST_TIME + .1)
+    assert gs.is_robot_lost('blue', 0)
+    assert gs.get_robot_ids('blue') == (0, 1)
+    assert gs.get_active_robot_ids('blue') == ()
+    # reading doesn't change anything, even long after
+    assert gs.get_robot_last_update_time('blue', 0) is not None
+    gs.update_robot_position('blue', 1, np.array([500, 0, 0]))
+    assert gs.get_active_robot_ids('blue') == (1,)
+    gs.sweep_lost_robots(now + ROBOT_REMOVE_TIME + .1)
+    assert gs.get_robot_ids('blue') == ()
+    assert gs.is_robot_lost('blue', 0) and gs.is_robot_lost('yellow', 0)
+
+
+def test_states_sent_with_positions():
+    gs = GameState()
+    gs.update_robot_position('yellow', 3, np.array([0, 0, 0]))
+    other = GameState()
+    for field in ['_yellow_robot_positions', '_robot_states']:
+        other.decode_field(field, gs.encode_field(field))
+    assert not other.is_robot_lost('yellow', 3)
+
+
+def test_lost_robots_not_obstacles():
+    gs = GameState()
+    gs.update_robot_position('blue', 0, np.array([0, 0, 0]))
+    gs.update_robot_position('yellow', 1, np.array([500, 0, 0]))
+    now = gs.get_robot_last_update_time('yellow', 1)
+    assert not gs.is_position_open(np.array([500, 0]), 'blue', 0)
+    gs.update_robot_position('blue', 0, np.array([0, 0, 0]))
+    gs.sweep_lost_robots(now + ROBOT_LOST_TIME + .1)
+    _, teams, ids = gs.get_robot_pose_matrix()
+    assert list(teams) == [] and list(ids) == []
+    gs.update_robot_position('blue', 0, np.array([0, 0, 0]))
+    assert gs.is_position_open(np.array([500, 0]), 'blue', 0)
+    assert gs.get_robot_ids('yellow') == (1,)
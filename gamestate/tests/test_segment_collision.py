@@ -0,0 +1,54 @@
+import numpy as np
+from refbox import SSL_Referee  # pylint: disable=import-error
+from ..gamestate import GameState
+from ..segment_collision import segment_circles_entry, \
+    segment_rectangles_entry, segment_rectangle_exit
+
+
+def test_circles():
+    times = segment_circles_entry([0, 0], [10, 0],
+                                  [[5, 0], [5, 3], [5, 5], [1, 1], [-1, 0]],
+                                  [1, 3, 1, 2, 2])
+    assert np.allclose(times, [.4, .5, np.inf, 0, np.inf])
+
+
+def test_rectangles():
+    rectangles = [[2, -1, 4, 1], [-1, -1, 1, 1], [2, 2, 4, 4], [0, 0, 20, 0]]
+    times = segment_rectangles_entry([0, 0], [10, 0], rectangles)
+    assert np.allclose(times, [.2, 0, np.inf, 0])
+    assert segment_rectangle_exit([0, 0], [10, 0], [-5, -5, 5, 5]) == .5
+    assert segment_rectangle_exit([0, 0], [1, 0], [-5, -5, 5, 5]) == np.inf
+    assert segment_rectangle_exit([6, 0], [1, 0], [-5, -5, 5, 5]) == 0
+
+
+def stepped_collision_time(gs, start, end, team, robot_id):
+    "checks points 1 mm apart along the path"
+    length = np.linalg.norm(end - start)
+    times = np.arange(1, int(length) + 1) / length
+    points = start + times[:, None] * (end - start)
+    blocked = ~(gs.are_pos_legal(points, team, robot_id) &
+                gs.are_positions_open(points, team, robot_id))
+    return times[blocked][0] if blocked.any() else np.inf
+
+
+def test_matches_stepping():
+    gs = GameState()
+    rng = np.random.RandomState(0)
+    for team in ['blue', 'yellow']:
+        for robot_id in range(6):
+            pos = rng.uniform([-4000, -2500], [4000, 2500])
+            gs.update_robot_position(team, robot_id,
+                                     np.array([pos[0], pos[1], 0]))
+    gs.update_ball_position(np.array([0, 0]))
+    for command in [SSL_Referee.NORMAL_START, SSL_Referee.STOP]:
+        gs.get_refbox_command = lambda: command
+        start = gs.get_robot_position('blue', 1)[:2]
+        for end in rng.uniform([-5000, -3500], [5000, 3500], (50, 2)):
+            collision = gs.first_path_collision(start, end, 'blue', 1)
+            expected = stepped_collision_time(gs, start, end, 'blue', 1)
+            if collision is None:
+                assert expected == np.inf
+            else:
+                length = np.linalg.norm(end - start)
+                time = np.linalg.norm(collision - start) / length
+                assert abs(time - expected) * length <= 1
@@ -0,0 +1,28 @@
+# pylint: disable=import-error
+import numpy as np
+from ..gamestate import GameState
+
+
+def test_compact_fields_round_trip():
+    """Tests that position histories decode to the same times, positions
+    and robot order as were encoded, and that other fields still work.
+    """
+    gs = GameState()
+    gs.update_ball_position(np.array([0, 0]), 1.0)
+    gs.update_ball_position(np.array([10, 20]), 2.0)
+    gs.update_robot_position('blue', 5, np.array([1, 2, 3]))
+    gs.update_robot_position('blue', 2, np.array([4, 5, 6]))
+    gs.update_robot_position('blue', 5, np.array([7, 8, 9]))
+    gs.get_robot_commands('blue', 5).is_dribbling = True
+
+    other = GameState()
+    other.decode_snapshot(gs.encode_snapshot())
+    assert [t for t, _ in other._ball_position] == [2.0, 1.0]
+    assert (other.get_ball_position() == [10, 20]).all()
+    assert other.get_robot_ids('blue') == (5, 2)
+    assert len(other._blue_robot_positions[5]) == 2
+    assert (other.get_robot_position('blue', 5) == [7, 8, 9]).all()
+    assert other.get_robot_last_update_time('blue', 2) == \
+        gs.get_robot_last_update_time('blue', 2)
+    assert other.get_robot_commands('blue', 5).is_dribbling
+    assert other.get_robot_ids('yellow') == ()
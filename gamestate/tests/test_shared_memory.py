@@ -0,0 +1,53 @@
+# pylint: disable=import-error
+import numpy as np
+import pytest
+from ..gamestate import GameState
+from ..gamestate_shared_memory import SharedGameStateBuffer
+
+pytestmark = pytest.mark.skipif(not SharedGameStateBuffer.is_supported(),
+                                reason="shared memory needs python 3.8+")
+
+
+def test_shared_memory_round_trip():
+    """Tests that positions, commands and status written into shared memory
+    by one gamestate are read back the same by another, both for the first
+    read and for incremental updates.
+    """
+    buffer = SharedGameStateBuffer(create=True)
+    try:
+        writer = GameState()
+        reader = GameState()
+        writer.update_ball_position(np.array([0, 0]), 1.0)
+        writer.update_ball_position(np.array([10, 20]), 2.0)
+        writer.update_robot_position('blue', 3, np.array([1, 2, 3]))
+        commands = writer.get_robot_commands('blue', 3)
+        commands.waypoints = [np.array([100, 200, .5])]
+        commands.is_dribbling = True
+        writer.get_robot_status('yellow', 1).charge_level = 42
+        buffer.write(writer)
+        assert buffer.read_into(reader)
+        assert list(reader._ball_position)[0][0] == 2.0
+        assert (reader.get_ball_position() == [10, 20]).all()
+        assert (reader.get_robot_position('blue', 3) == [1, 2, 3]).all()
+        assert reader.get_robot_commands('blue', 3).is_dribbling
+        assert (reader.get_robot_commands('blue', 3).waypoints[0] ==
+                [100, 200, .5]).all()
+        assert reader.get_robot_status('yellow', 1).charge_level == 42
+
+        # incremental update keeps the older history entries
+        writer.update_ball_position(np.array([20, 40]), 3.0)
+        writer.remove_robot('blue', 3)
+        buffer.write(writer)
+        buffer.read_into(reader)
+        assert [t for t, _ in reader._ball_position] == [3.0, 2.0, 1.0]
+        assert reader.get_robot_ids('blue') == ()
+
+        # clearing the history is picked up as well
+        writer.clear_ball_position()
+        writer.update_ball_position(np.array([5, 5]), 4.0)
+        buffer.write(writer)
+        buffer.read_into(reader)
+        assert [t for t, _ in reader._ball_position] == [4.0]
+    finally:
+        buffer.close()
+        buffer.unlink()
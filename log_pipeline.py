@@ -0,0 +1,118 @@
+"""Non-blocking logging for providers.
+Loggers only put records on an in-memory queue, and a background thread
+(QueueListener) does the file writes and cutelog socket writes, including
+for the handlers records used to propagate to (e.g. robocup.log).
+Debug/info records are rate limited per logger, so chatty hot loops can't
+flood the listener either.
+"""
+import copy
+import logging
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+# Max records per second (and burst size) each logger may send, for
+# records below LOG_RATE_LIMIT_LEVEL. Warnings and errors are never dropped.
+LOG_RATE_LIMIT = 200
+LOG_RATE_LIMIT_BURST = 400
+LOG_RATE_LIMIT_LEVEL = logging.WARNING
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket per logger name, dropping low level records once a logger
+    goes over its rate. Keeps count of what it dropped.
+    """
+    def __init__(self, rate=LOG_RATE_LIMIT, burst=LOG_RATE_LIMIT_BURST,
+                 level=LOG_RATE_LIMIT_LEVEL):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.level = level
+        # logger name : [tokens, last refill time]
+        self._buckets = dict()
+        self.dropped = 0
+
+    def filter(self, record):
+        if record.levelno >= self.level:
+            return True
+        now = time.time()
+        bucket = self._buckets.get(record.name)
+        if bucket is None:
+            bucket = self._buckets[record.name] = [self.burst, now]
+        bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if bucket[0] < 1:
+            self.dropped += 1
+            return False
+        bucket[0] -= 1
+        return True
+
+
+class SnapshotQueueHandler(QueueHandler):
+    """
+    QueueHandler that fills in the message (and exception text) before
+    queueing, so the log shows arguments (arrays, positions) as they were
+    when logged, not after a later tick has changed them. Unlike the
+    default one it leaves the rest of the formatting (time, level, ...)
+    to each handler on the listener thread.
+    """
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(
+                    record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def propagated_handlers(logger):
+    "the handlers of the loggers above logger that its records reach"
+    handlers = []
+    parent = logger.parent if logger.propagate else None
+    while parent is not None:
+        handlers.extend(parent.handlers)
+        parent = parent.parent if parent.propagate else None
+    return handlers
+
+
+class LogPipeline(object):
+    """
+    Attaches a queue handler to a logger, and runs a listener thread that
+    passes the records on to the given (blocking) handlers. The logger
+    stops propagating, its parents' handlers are run by the listener too.
+    """
+    def __init__(self, logger, handlers, rate_limit=LOG_RATE_LIMIT):
+        self.logger = logger
+        self.queue = queue.Queue()
+        self.rate_limit_filter = RateLimitFilter(rate_limit)
+        self.queue_handler = SnapshotQueueHandler(self.queue)
+        self.queue_handler.addFilter(self.rate_limit_filter)
+        handlers = list(handlers) + propagated_handlers(logger)
+        self._propagate = logger.propagate
+        logger.propagate = False
+        self.listener = QueueListener(self.queue, *handlers,
+                                      respect_handler_level=True)
+        logger.addHandler(self.queue_handler)
+        self.listener.start()
+
+    def dropped(self):
+        return self.rate_limit_filter.dropped
+
+    def stop(self):
+        """
+        Flushes the queued records and stops the listener thread
+        """
+        if self.listener is None:
+            return
+        self.logger.removeHandler(self.queue_handler)
+        self.logger.propagate = self._propagate
+        if self.dropped():
+            self.queue.put_nowait(self.logger.makeRecord(
+                self.logger.name, logging.WARNING, __file__, 0,
+                "Rate limit dropped %d log records", (self.dropped(),), None))
+        self.listener.stop()
+        self.listener = None
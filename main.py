@@ -52,6 +52,35 @@ parser.add_argument('-hs', '--home_strategy',
 parser.add_argument('-as', '--away_strategy',
                     default='UI',
                     help="The strategy the away team should use to play.")
+parser.add_argument('-shm', '--shared_memory',
+                    action="store_true",
+                    help='Passes positions, commands and statuses between '
+                         'processes through shared memory instead of '
+                         'pickling them every tick (python 3.8+).')
+parser.add_argument('-mpr', '--max_publish_rate',
+                    type=float,
+                    default=100,
+                    help='Maximum rate (Hz) at which the coordinator pushes '
+                         'new data to the providers.')
+parser.add_argument('-ls', '--lockstep',
+                    action="store_true",
+                    help='Runs every provider in one process, one after '
+                         'another on a shared gamestate. Slower, but '
+                         'repeatable and easy to profile.')
+parser.add_argument('-ldt', '--lockstep_dt',
+                    type=float,
+                    default=None,
+                    help='Fixed time step (s) the providers see in lockstep '
+                         'mode, rather than the measured one.')
+parser.add_argument('-lt', '--lockstep_ticks',
+                    type=int,
+                    default=None,
+                    help='Stop after this many rounds in lockstep mode.')
+parser.add_argument('-lsd', '--lockstep_seed',
+                    type=int,
+                    default=None,
+                    help='Seeds the random number generators in lockstep '
+                         'mode, so runs with a fixed time step repeat.')
 parser.add_argument('-d', '--debug',
                     action="store_true",
                     help='Uses more verbose logging for debugging.')
@@ -67,6 +96,12 @@ AWAY_TEAM = 'yellow' if HOME_TEAM == 'blue' else 'blue'
 SIMULATOR_SETUP = command_line_args.simulator_setup
 HOME_STRATEGY = command_line_args.home_strategy
 AWAY_STRATEGY = command_line_args.away_strategy
+USE_SHARED_MEMORY = command_line_args.shared_memory
+MAX_PUBLISH_RATE = command_line_args.max_publish_rate
+LOCKSTEP = command_line_args.lockstep
+LOCKSTEP_DT = command_line_args.lockstep_dt
+LOCKSTEP_TICKS = command_line_args.lockstep_ticks
+LOCKSTEP_SEED = command_line_args.lockstep_seed
 
 
 def setup_logging():
@@ -85,6 +120,7 @@ if __name__ == '__main__':
     print(f'Running in simulator mode: {IS_SIMULATION}')
     print(f'Running in no radio mode: {NO_RADIO}')
     print(f'Running in no refbox mode: {NO_REFBOX}')
+    print(f'Running in lockstep mode: {LOCKSTEP}')
     print('Open cutelog separately to see logging!')
 
     # Initialize providers and pass to coordinator
@@ -112,7 +148,13 @@ if __name__ == '__main__':
     providers += [Visualizer()]
 
     # Pass the providers to the coordinator
-    c = Coordinator(providers)
+    c = Coordinator(providers,
+                    use_shared_memory=USE_SHARED_MEMORY,
+                    max_publish_rate=MAX_PUBLISH_RATE,
+                    lockstep=LOCKSTEP,
+                    lockstep_dt=LOCKSTEP_DT,
+                    max_ticks=LOCKSTEP_TICKS,
+                    lockstep_seed=LOCKSTEP_SEED)
 
     # Setup the exit handler
     def stop_it(signum, frame):
@@ -91,6 +91,8 @@ class RefboxDataProvider(Provider):
         self._ip = ip
         self._port = port
         self._owned_fields = ['_latest_refbox_message_string']
+        # ball position is recorded when the game (re)starts
+        self._subscribed_fields = ['_ball_position']
 
     def pre_run(self):
         """
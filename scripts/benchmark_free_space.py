@@ -0,0 +1,76 @@
+"""Times finding legal open positions (Strategy.find_legal_pos) on a full
+field, with every robot moving a little each tick like after a vision
+update: building the gamestate's FreeSpaceMap, and whole ticks with one
+query and with a query for each of our robots, in normal play and during a
+stop (when the rules depend on the ball, which moves too).
+    To run (from the root directory): python3 scripts/benchmark_free_space.py
+"""
+import os
+import sys
+import time
+import logging
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from simulator.simulator import Simulator  # noqa
+from strategy import Strategy  # noqa
+from gamestate.free_space import FreeSpaceMap  # noqa
+from refbox import SSL_Referee  # noqa  # pylint: disable=import-error
+
+TICKS = 200
+SETUP = 'full_teams'
+
+
+def strategy_for(setup, is_stop):
+    simulator = Simulator(setup)
+    simulator.pre_run()
+    strategy = Strategy('blue', '')
+    strategy.gs = simulator.gs
+    strategy.logger = logging.getLogger('benchmark_free_space')
+    if is_stop:
+        strategy.gs.get_refbox_command = lambda: SSL_Referee.STOP
+    return strategy
+
+
+def move_everything(gs, starts, rng):
+    "a vision update: all of the robots and the ball somewhere else"
+    for (team, robot_id), start in starts.items():
+        pos = start + np.append(rng.uniform(-100, 100, 2), 0)
+        gs.update_robot_position(team, robot_id, pos)
+    gs.update_ball_position(rng.uniform(-100, 100, 2))
+
+
+def benchmark(is_stop):
+    strategy = strategy_for(SETUP, is_stop)
+    gs = strategy.gs
+    rng = np.random.RandomState(1)
+    starts = {key: pos.copy() for key, pos in gs.get_all_robot_positions()}
+    our_ids = gs.get_robot_ids('blue')
+    build = 0
+    for _ in range(TICKS):
+        move_everything(gs, starts, rng)
+        t0 = time.perf_counter()
+        FreeSpaceMap(gs, 'blue', our_ids[0])
+        build += time.perf_counter() - t0
+    results = ['build %5.2f ms' % (build / TICKS * 1e3)]
+    for queries in [1, len(our_ids)]:
+        elapsed = 0
+        for _ in range(TICKS):
+            move_everything(gs, starts, rng)
+            # somewhere blocked, where an opponent is
+            opponents = gs.get_robot_ids('yellow')
+            t0 = time.perf_counter()
+            for robot_id in our_ids[:queries]:
+                opponent = opponents[rng.randint(len(opponents))]
+                strategy.find_legal_pos(
+                    robot_id, gs.get_robot_position('yellow', opponent))
+            elapsed += time.perf_counter() - t0
+        results.append('%d queries %5.2f ms per tick' % (
+            queries, elapsed / TICKS * 1e3))
+    print('%-12s %s' % ('stop' if is_stop else 'normal play',
+                        '   '.join(results)))
+
+
+if __name__ == '__main__':
+    for is_stop in [False, True]:
+        benchmark(is_stop)
@@ -0,0 +1,91 @@
+"""Compares the path finding engines (greedy, RRT and visibility graph A*)
+on simulator setups: planning time, how often they find a path that is
+clear all the way, and how long the paths are.
+    To run (from the root directory): python3 scripts/benchmark_planners.py
+"""
+import os
+import sys
+import time
+import logging
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from simulator.simulator import Simulator  # noqa
+from strategy import Strategy  # noqa
+
+GOALS = 30
+# setup : (robot id, start (None for where it is))
+SETUPS = {
+    'surrounded_by_opponents_test': (1, None),
+    # (the robots in the lines are too close together to get out)
+    'full_teams': (0, np.array([-1500, -1000, 0])),
+    'entry_video': (0, None),
+}
+PLANNERS = ['greedy', 'RRT', 'visibility']
+
+
+def strategy_for(setup):
+    simulator = Simulator(setup)
+    simulator.pre_run()
+    strategy = Strategy('blue', '')
+    strategy.gs = simulator.gs
+    strategy.logger = logging.getLogger('benchmark_planners')
+    return strategy
+
+
+def random_goals(strategy, robot_id, rng):
+    "legal, open goals all over the field"
+    gs = strategy.gs
+    goals = []
+    while len(goals) < GOALS:
+        x, y = rng.uniform([gs.FIELD_MIN_X, gs.FIELD_MIN_Y],
+                           [gs.FIELD_MAX_X, gs.FIELD_MAX_Y])
+        goal = np.array([x, y, 0])
+        if gs.is_pos_valid(goal, 'blue', robot_id):
+            goals.append(goal)
+    return goals
+
+
+def is_clear(strategy, robot_id, route):
+    return not any(strategy.is_path_blocked(s_pos, g_pos, robot_id)
+                   for s_pos, g_pos in zip(route[:-1], route[1:]))
+
+
+def benchmark(setup, planner):
+    robot_id, start = SETUPS[setup]
+    strategy = strategy_for(setup)
+    if start is None:
+        start = strategy.gs.get_robot_position('blue', robot_id)
+    else:
+        strategy.gs.update_robot_position('blue', robot_id, start)
+    waypoints_for = getattr(strategy, planner + '_waypoints')
+    np.random.seed(0)
+    goals = random_goals(strategy, robot_id, np.random.RandomState(1))
+    found = clear = 0
+    elapsed = 0
+    lengths = []
+    for goal in goals:
+        t0 = time.perf_counter()
+        waypoints = waypoints_for(start, goal, robot_id)
+        elapsed += time.perf_counter() - t0
+        if waypoints is None:
+            continue
+        found += 1
+        route = [start[:2]] + [np.array(w[:2], dtype=float)
+                               for w in waypoints]
+        if is_clear(strategy, robot_id, route):
+            clear += 1
+            lengths.append(np.linalg.norm(np.diff(route, axis=0),
+                                          axis=1).sum() /
+                           np.linalg.norm(goal[:2] - start[:2]))
+    print('%-30s %-10s %8.2f ms  found %2d/%d  clear %2d/%d  '
+          'length / straight %s' % (
+              setup, planner, elapsed / len(goals) * 1e3, found, len(goals),
+              clear, len(goals),
+              '%.3f' % np.mean(lengths) if lengths else '-'))
+
+
+if __name__ == '__main__':
+    for setup in SETUPS:
+        for planner in PLANNERS:
+            benchmark(setup, planner)
@@ -0,0 +1,89 @@
+"""Times RRT_path_find on a few simulator setups, with the grid indexed
+RRTTree against a plain linear scan over the nodes (what we used to do).
+    To run (from the root directory): python3 scripts/benchmark_rrt.py
+"""
+import os
+import sys
+import time
+import logging
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from simulator.simulator import Simulator  # noqa
+from strategy import Strategy  # noqa
+from strategy import analysis  # noqa
+from strategy.rrt_tree import RRTTree  # noqa
+
+REPEATS = 20
+# setup : (robot id, start (None for where it is), goal)
+SETUPS = {
+    'surrounded_by_opponents_test': (1, None, np.array([0, 0, 0])),
+    # (the robots in the lines are too close together to get out)
+    'full_teams': (0, np.array([2000, -1500, 0]), np.array([3200, 1000, 0])),
+}
+
+
+class LinearTree(RRTTree):
+    "same nodes, but loops over all of them for the nearest one"
+    def nearest(self, pos):
+        best, best_distance = -1, float('inf')
+        for index in range(self.size):
+            node = self.positions[index]
+            distance = np.sqrt((pos[0] - node[0]) ** 2 +
+                               (pos[1] - node[1]) ** 2)
+            if distance < best_distance:
+                best, best_distance = index, distance
+        return best, best_distance
+
+
+def strategy_for(setup):
+    simulator = Simulator(setup)
+    simulator.pre_run()
+    strategy = Strategy('blue', '')
+    strategy.gs = simulator.gs
+    strategy.logger = logging.getLogger('benchmark_rrt')
+    return strategy
+
+
+def benchmark(setup, tree_class, lim):
+    robot_id, start, goal = SETUPS[setup]
+    strategy = strategy_for(setup)
+    if start is None:
+        start = strategy.gs.get_robot_position('blue', robot_id)
+    analysis.RRTTree = tree_class
+    np.random.seed(0)
+    successes = 0
+    t0 = time.perf_counter()
+    for _ in range(REPEATS):
+        successes += strategy.RRT_path_find(start, goal, robot_id, lim=lim)
+    elapsed = (time.perf_counter() - t0) / REPEATS
+    print('%-30s %-10s lim %5d  %8.2f ms  %2d/%d found' % (
+        setup, tree_class.__name__, lim, elapsed * 1e3, successes, REPEATS))
+
+
+def benchmark_nearest(num_nodes, tree_class):
+    "just the nearest node queries, on a tree grown like an RRT"
+    rng = np.random.RandomState(0)
+    tree = tree_class(np.array([0, 0]), num_nodes)
+    for _ in range(num_nodes):
+        pos = tree.positions[rng.randint(len(tree))] + \
+            rng.uniform(-540, 540, 2)
+        tree.add(pos, 0)
+    queries = rng.uniform([-4500, -3000], [4500, 3000], (1000, 2))
+    t0 = time.perf_counter()
+    for pos in queries:
+        tree.nearest(pos)
+    elapsed = (time.perf_counter() - t0) / len(queries)
+    print('nearest, %5d nodes  %-10s %8.1f us' % (
+        num_nodes, tree_class.__name__, elapsed * 1e6))
+
+
+if __name__ == '__main__':
+    for num_nodes in [100, 1000, 5000]:
+        for tree_class in [LinearTree, RRTTree]:
+            benchmark_nearest(num_nodes, tree_class)
+    for setup in SETUPS:
+        for lim in [1000, 5000]:
+            for tree_class in [LinearTree, RRTTree]:
+                benchmark(setup, tree_class, lim)
+    analysis.RRTTree = RRTTree
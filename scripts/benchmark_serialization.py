@@ -0,0 +1,59 @@
+"""Compares the size and encode/decode time of the compact gamestate
+serialization (gamestate_serialization.py) against plain pickle.
+    To run (from the root directory):
+    python3 scripts/benchmark_serialization.py
+"""
+import os
+import sys
+import pickle
+import timeit
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from gamestate import GameState  # noqa
+from gamestate.gamestate import BALL_POS_HISTORY_LENGTH, \
+    ROBOT_POS_HISTORY_LENGTH  # noqa
+
+REPEATS = 200
+
+
+def full_gamestate():
+    "gamestate with full teams and full position histories"
+    gs = GameState()
+    for i in range(BALL_POS_HISTORY_LENGTH):
+        gs.update_ball_position(np.array([i, -i]), float(i))
+    for team in ['blue', 'yellow']:
+        for robot_id in range(6):
+            for i in range(ROBOT_POS_HISTORY_LENGTH):
+                gs.update_robot_position(team, robot_id,
+                                         np.array([i, robot_id, .1]))
+            commands = gs.get_robot_commands(team, robot_id)
+            commands.waypoints = [np.array([1000, 1000, 0])]
+            gs.get_robot_status(team, robot_id)
+    return gs
+
+
+def benchmark(name, encode, decode):
+    data = encode()
+    encode_time = timeit.timeit(encode, number=REPEATS) / REPEATS
+    decode_time = timeit.timeit(lambda: decode(data), number=REPEATS) / REPEATS
+    print('%-32s %8d bytes  encode %7.1f us  decode %7.1f us' % (
+        name, len(data), encode_time * 1e6, decode_time * 1e6))
+
+
+if __name__ == '__main__':
+    gs = full_gamestate()
+    other = GameState()
+    benchmark('pickle gamestate',
+              lambda: pickle.dumps(gs, pickle.HIGHEST_PROTOCOL),
+              pickle.loads)
+    benchmark('compact snapshot', gs.encode_snapshot, other.decode_snapshot)
+    for field in ['_ball_position', '_blue_robot_positions',
+                  '_blue_robot_commands']:
+        benchmark('pickle ' + field,
+                  lambda: pickle.dumps(getattr(gs, field),
+                                       pickle.HIGHEST_PROTOCOL),
+                  pickle.loads)
+        benchmark('compact ' + field,
+                  lambda: gs.encode_field(field),
+                  lambda data: other.decode_field(field, data))
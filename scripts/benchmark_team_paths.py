@@ -0,0 +1,122 @@
+"""Compares planning each robot's path on its own (visibility graph, with
+teammates where they are now) with planning the team's paths together
+(Strategy.plan_team_paths), with our robots scattered about going to
+random goals: time per tick, how many robots get a path, and how many
+pairs of teammates would run into each other going along their paths.
+    To run (from the root directory): python3 scripts/benchmark_team_paths.py
+"""
+import os
+import sys
+import time
+import logging
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from simulator.simulator import Simulator  # noqa
+from strategy import Strategy  # noqa
+from strategy.team_paths import route_positions, TEAM_PLAN_HORIZON, \
+    TEAM_PLAN_STEP  # noqa
+
+TRIALS = 30
+# (the setups just place the opponents)
+SETUPS = ['full_teams', 'entry_video']
+
+
+def strategy_for(setup):
+    simulator = Simulator(setup)
+    simulator.pre_run()
+    strategy = Strategy('blue', '')
+    strategy.gs = simulator.gs
+    strategy.logger = logging.getLogger('benchmark_team_paths')
+    return strategy
+
+
+def random_positions(strategy, rng):
+    "a legal, open position for each of our robots, apart from each other"
+    gs = strategy.gs
+    positions = {}
+    for robot_id in gs.get_robot_ids('blue'):
+        while True:
+            x, y = rng.uniform([gs.FIELD_MIN_X, gs.FIELD_MIN_Y],
+                               [gs.FIELD_MAX_X, gs.FIELD_MAX_Y])
+            position = np.array([x, y, 0])
+            if gs.is_pos_valid(position, 'blue', robot_id) and \
+                    all(np.linalg.norm(position[:2] - other[:2]) >
+                        gs.ROBOT_RADIUS * 4 for other in positions.values()):
+                positions[robot_id] = position
+                break
+    return positions
+
+
+def conflicts(strategy, plans):
+    "pairs of teammates that would run into each other"
+    gs = strategy.gs
+    times = np.arange(0, TEAM_PLAN_HORIZON, TEAM_PLAN_STEP)
+    routes = [route_positions(gs.get_robot_position('blue', robot_id),
+                              waypoints, gs.robot_max_speed('blue', robot_id),
+                              times)
+              for robot_id, waypoints in plans.items()]
+    count = 0
+    for i, route in enumerate(routes):
+        for other in routes[i + 1:]:
+            close = np.hypot(*(route - other).T) < gs.ROBOT_RADIUS * 2
+            # (not counting ones that start out touching)
+            count += (close & ~np.logical_and.accumulate(close)).any()
+    return count
+
+
+def independent(strategy, goals, keep=False):
+    plans = {}
+    for robot_id, goal in goals.items():
+        start = strategy.gs.get_robot_position('blue', robot_id)
+        waypoints = strategy.visibility_waypoints(start, goal, robot_id)
+        plans[robot_id] = [start] if waypoints is None else waypoints
+    return plans
+
+
+def together(strategy, goals, keep=False):
+    if not keep:
+        strategy._team_paths.clear()
+    for robot_id, goal in goals.items():
+        strategy.request_path(robot_id, goal)
+    return strategy.plan_team_paths()
+
+
+def benchmark(setup):
+    strategy = strategy_for(setup)
+    gs = strategy.gs
+    rng = np.random.RandomState(1)
+    trials = []
+    for _ in range(TRIALS):
+        # our robots scattered about (away from the opponents), going to
+        # random goals
+        starts = random_positions(strategy, rng)
+        trials.append((starts, random_positions(strategy, rng)))
+    for name, plan in [('independent', independent), ('team', together)]:
+        elapsed = elapsed_next = 0
+        moving = count = 0
+        for starts, goals in trials:
+            for robot_id, start in starts.items():
+                gs.update_robot_position('blue', robot_id, start)
+            t0 = time.perf_counter()
+            plans = plan(strategy, goals)
+            elapsed += time.perf_counter() - t0
+            moving += sum(len(waypoints) > 1 or not np.allclose(
+                waypoints[0][:2], starts[robot_id][:2])
+                for robot_id, waypoints in plans.items())
+            count += conflicts(strategy, plans)
+            # and the tick after, with nothing changed
+            gs.update_robot_position('blue', 0, starts[0])
+            t0 = time.perf_counter()
+            plan(strategy, goals, keep=True)
+            elapsed_next += time.perf_counter() - t0
+        print('%-12s %-12s %6.2f ms per tick (%5.2f ms the tick after)  '
+              '%3d/%d robots with a path  %3d teammate conflicts' % (
+                  setup, name, elapsed / TRIALS * 1e3,
+                  elapsed_next / TRIALS * 1e3, moving,
+                  TRIALS * len(gs.get_robot_ids('blue')), count))
+
+
+if __name__ == '__main__':
+    for setup in SETUPS:
+        benchmark(setup)
@@ -1,9 +1,9 @@
 # pylint: disable=line-too-long
-import time
 import numpy as np
 from typing import Tuple
 import logging
 from coordinator import Provider  # pylint: disable=import-error
+from telemetry import record_latencies  # pylint: disable=import-error
 
 logger = logging.getLogger(__name__)
 
@@ -19,15 +19,30 @@ class Simulator(Provider):
         self.logger = None
         self._initial_setup = initial_setup
         self._viz_events_handled = 0
+        # count our "frames" like a camera, for latency tracing
+        self._frame_number = 0
+        # team : frame number of the last command trace we recorded
+        self._last_traced_frames = dict()
         self._owned_fields = [
             # act as vision provider
             '_ball_position',
             '_blue_robot_positions',
             '_yellow_robot_positions',
+            '_robot_states',
             # also act as robot feedback
             '_blue_robot_status',
             '_yellow_robot_status',
+            '_vision_trace',
         ]
+        self._subscribed_fields = [
+            'viz_inputs',
+            '_blue_robot_commands',
+            '_yellow_robot_commands',
+            '_blue_command_trace',
+            '_yellow_command_trace',
+            '_latest_refbox_message_string',
+        ]
+        self._target_frequency = 100
 
     def put_fake_robot(self, team: str,
                        robot_id: int,
@@ -47,8 +62,9 @@ class Simulator(Provider):
         # use small dt to minimize deceleration correction
         dt = .05
         prev_pos = position - velocity * dt
-        self.gs.update_ball_position(prev_pos, time.time() - dt)
-        self.gs.update_ball_position(position, time.time())
+        now = self.gs.clock()
+        self.gs.update_ball_position(prev_pos, now - dt)
+        self.gs.update_ball_position(position, now)
 
     def pre_run(self):
         if self.logger is None:
@@ -104,6 +120,14 @@ class Simulator(Provider):
                          "initial_setup: %s", self._initial_setup)
 
     def run(self):
+        # the commands we got are acted on this tick, trace their latency
+        for team in ['blue', 'yellow']:
+            trace = self.gs.get_command_trace(team)
+            last_frame = self._last_traced_frames.get(team)
+            if trace is not None and trace['frame_number'] != last_frame:
+                self._last_traced_frames[team] = trace['frame_number']
+                record_latencies(self.telemetry, trace, self.gs.clock())
+
         # allow user to move the ball via UI
         if self._viz_events_handled < self.gs.viz_inputs['simulator_events_count']:  # noqa
             self._viz_events_handled += 1
@@ -214,3 +238,8 @@ class Simulator(Provider):
                     new_pos = ball_pos + new_velocity * self.delta_time
                     self.put_fake_ball(new_pos, new_velocity)
                 robot_status.simulate_kick()
+
+        # positions are "captured" now, like a new camera frame
+        self.gs.sweep_lost_robots()
+        self._frame_number += 1
+        self.gs.update_vision_trace(self._frame_number, self.gs.clock())
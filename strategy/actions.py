@@ -1,7 +1,16 @@
 # pylint: disable=maybe-no-member
 import numpy as np
-import time
 from typing import Tuple
+try:
+    from path_cache import CachedPath
+    from team_paths import Reservations, is_route_clear, TEAM_PLAN_MARGIN, \
+        TEAM_PLAN_DETOURS, TEAM_PLAN_WAIT
+    from visibility_graph import VisibilityGraph
+except (SystemError, ImportError):
+    from .path_cache import CachedPath
+    from .team_paths import Reservations, is_route_clear, \
+        TEAM_PLAN_MARGIN, TEAM_PLAN_DETOURS, TEAM_PLAN_WAIT
+    from .visibility_graph import VisibilityGraph
 
 
 class Actions:
@@ -78,6 +87,7 @@ class Actions:
         commands.is_dribbling = is_dribbling
 
     def stop(self, robot_id: int):
+        self._path_requests.pop(robot_id, None)
         commands = self.gs.get_robot_commands(self._team, robot_id)
         commands.set_speeds(0, 0, 0)
         commands.clear_waypoints()
@@ -102,11 +112,37 @@ class Actions:
         """ Tries to find a legal non-colliding path to goal position.
         If goal position is not legal or is blocked, goes somewhere nearby.
         """
+        return self._path_find(robot_id, goal_pos, self.RRT_waypoints,
+                               allow_illegal)
+
+    def path_find(self, robot_id: int,
+                  goal_pos: Tuple[float, float, float],
+                  allow_illegal: bool = False,
+                  planner: str = 'greedy') -> bool:
+        """ Makes the robot to start moving to a destination using
+        a greedy approach, or the given planner:
+        'greedy', 'rrt' or 'visibility' (shortest path, A*)"""
+        planners = {
+            'greedy': self.greedy_waypoints,
+            'rrt': self.RRT_waypoints,
+            'visibility': self.visibility_waypoints,
+        }
+        return self._path_find(robot_id, goal_pos, planners[planner],
+                               allow_illegal)
+
+    def _path_find(self, robot_id, goal_pos, planner, allow_illegal):
+        """
+        Moves the robot along a path to goal_pos, keeping the one it is
+        already following where possible (see _follow_cached_path).
+        planner(start_pos, goal_pos, robot_id, allow_illegal=...) gives
+        waypoints, or None if it can't find any.
+        """
         # If the goal is illegal or occupied, find somewhere nearby
         is_legal = self.gs.is_pos_legal(goal_pos, self._team, robot_id)
         is_open = self.gs.is_position_open(goal_pos, self._team, robot_id)
         if not is_legal or not is_open:
             goal_pos = self.find_legal_pos(robot_id, goal_pos)
+        goal_pos = np.array(goal_pos)
 
         start_pos = self.gs.get_robot_position(self._team, robot_id)
 
@@ -114,95 +150,243 @@ class Actions:
         if not self.is_path_blocked(start_pos, goal_pos, robot_id,
                                     buffer_dist=0,
                                     allow_illegal=allow_illegal):
-            self.move_straight(robot_id, np.array(goal_pos))
-            self.logger.debug("Robot %s going straight from %s to %s",
-                              robot_id, start_pos, goal_pos)
+            cached = CachedPath(goal_pos, [goal_pos], allow_illegal, planner)
+            self._path_cache[robot_id] = cached
+            self.move_straight(robot_id, goal_pos)
+            cached.commanded = self.gs.get_robot_commands(
+                self._team, robot_id).waypoints
             return self.is_done_moving(robot_id)
 
-        # now check if current waypoints are already going where we want
-        current_goal = self.get_goal_pos(robot_id)
-        SAME_GOAL_THRESHOLD = 100  # TODO
-        is_same_goal = current_goal is not None and \
-            np.linalg.norm(goal_pos[:2] - current_goal[:2]) < SAME_GOAL_THRESHOLD  # noqa
-        commands = self.gs.get_robot_commands(self._team, robot_id)
-        current_waypoints = [start_pos] + commands.waypoints
-        current_path_collides = False
-        for i in range(len(current_waypoints) - 1):
-            wp, next_wp = current_waypoints[i], current_waypoints[i+1]
-            if self.is_path_blocked(wp, next_wp, robot_id,
-                                    allow_illegal=allow_illegal):
-                current_path_collides = True
-
-        # avoid rerunning too often so we don't crash the system
-        # RRT_MIN_INTERVAL = .1
-        # recently_called = robot_id in self._last_pathfind_times and \
-        #  time.time() - self._last_pathfind_times[robot_id] < RRT_MIN_INTERVAL
-        # only rerun for same goal if long time has elapsed or path collides
-        # mainly in case something very strange has happened
-        MIN_REFRESH_INTERVAL = 3
-        need_refresh = robot_id not in self._last_pathfind_times or \
-            time.time() - self._last_pathfind_times[robot_id] > MIN_REFRESH_INTERVAL  # noqa
-        self.logger.debug("Robot: %s Start: %s Goal: %s Waypoints: %s",
-                          robot_id, start_pos, goal_pos, current_waypoints)
-        if (current_path_collides or not is_same_goal or need_refresh):
-            self._last_pathfind_times[robot_id] = time.time()
-            is_success = self.RRT_path_find(
-                start_pos, goal_pos, robot_id, allow_illegal=allow_illegal)
-            if not is_success:
-                self.logger.debug(f"Robot {robot_id} RRT path find failed")
-                return False
+        if not self._follow_cached_path(robot_id, start_pos, goal_pos,
+                                        planner, allow_illegal):
+            return False
         return self.is_done_moving(robot_id)
 
-    def path_find(self, robot_id: int,
-                  goal_pos: Tuple[float, float, float],
-                  allow_illegal: bool = False) -> bool:
-        """ Makes the robot to start moving to a destination using
-        a greedy approach"""
-        # If the goal is illegal or occupied, find somewhere nearby
+    def _follow_cached_path(self, robot_id, start_pos, goal_pos, planner,
+                            allow_illegal):
+        """
+        Checks the segments of the robot's cached path that could have
+        been blocked since last time, replans just the blocked ones, and
+        only plans a whole new path if that fails. Returns whether the
+        robot has a path.
+        """
+        cached = self._path_cache.get(robot_id)
+        is_changed = False
+        if cached is None or \
+                not cached.is_for(goal_pos, allow_illegal, planner):
+            cached = self._plan_cached_path(robot_id, start_pos, goal_pos,
+                                            planner, allow_illegal)
+            if cached is None:
+                return False
+            is_changed = True
+        is_changed |= cached.advance(start_pos, self.gs.ROBOT_RADIUS)
+
+        reach = self.gs.ROBOT_RADIUS * 2
+        to_check = cached.segments_to_check(self.gs, self._team, robot_id,
+                                            start_pos, reach)
+        route = [start_pos] + cached.waypoints
+        # last first, so repairs don't move the segments still to check
+        for i in reversed(to_check):
+            if not self.is_path_blocked(route[i], route[i + 1], robot_id,
+                                        allow_illegal=allow_illegal):
+                cached.unchecked[i] = False
+                continue
+            waypoints = planner(route[i], route[i + 1], robot_id,
+                                allow_illegal=allow_illegal)
+            if waypoints is None:
+                # no way around, start again
+                cached = self._plan_cached_path(robot_id, start_pos,
+                                                goal_pos, planner,
+                                                allow_illegal)
+                if cached is None:
+                    return False
+                break
+            cached.replace_segment(i, waypoints)
+            is_changed = True
+
+        commands = self.gs.get_robot_commands(self._team, robot_id)
+        # (or someone else has set the robot's waypoints since)
+        if is_changed or commands.waypoints is not cached.commanded:
+            self.set_waypoints(robot_id, list(cached.waypoints))
+            cached.commanded = commands.waypoints
+        return True
+
+    def _plan_cached_path(self, robot_id, start_pos, goal_pos, planner,
+                          allow_illegal):
+        self._last_pathfind_times[robot_id] = self.gs.clock()
+        waypoints = planner(start_pos, goal_pos, robot_id,
+                            allow_illegal=allow_illegal)
+        if waypoints is None:
+            self._path_cache.pop(robot_id, None)
+            return None
+        cached = CachedPath(goal_pos, waypoints, allow_illegal, planner)
+        cached.previous = np.asarray(start_pos[:2], dtype=float)
+        self._path_cache[robot_id] = cached
+        return cached
+
+    def request_path(self, robot_id: int,
+                     goal_pos: Tuple[float, float, float],
+                     allow_illegal: bool = False,
+                     priority: float = 0) -> bool:
+        """
+        Asks the team planner for a path to goal_pos. All the paths asked
+        for in a tick are planned together at the end of it (see
+        plan_team_paths), higher priority first. Setting the robot's
+        waypoints some other way later in the tick cancels the request.
+        Returns whether the robot has arrived (not just waiting for a
+        teammate to get out of the way).
+        """
+        self._path_requests[robot_id] = (np.array(goal_pos), allow_illegal,
+                                         priority)
+        return robot_id in self._team_paths and self.is_done_moving(robot_id)
+
+    def get_planned_waypoints(self, robot_id: int):
+        "waypoints the team planner last gave the robot, None if none"
+        cached = self._team_paths.get(robot_id)
+        if cached is None:
+            return None
+        return list(cached.waypoints)
+
+    def plan_team_paths(self):
+        """
+        Plans the paths requested this tick, one robot after another.
+        Each robot plans around where the robots before it (and teammates
+        following waypoints from somewhere else) will be over the next few
+        seconds, instead of treating them as fixed where they are now, and
+        keeps last tick's path if it's still clear. Robots still to be
+        planned, and idle ones, are fixed obstacles. Run calls this once
+        per tick, returns the waypoints given to each robot.
+        """
+        requests, self._path_requests = self._path_requests, {}
+        robot_ids = self.gs.get_active_robot_ids(self._team)
+        reservations = Reservations(self.gs.ROBOT_RADIUS * 2 +
+                                    TEAM_PLAN_MARGIN)
+        idle_ids = []
+        for robot_id in robot_ids:
+            if robot_id in requests:
+                continue
+            commands = self.gs.get_robot_commands(self._team, robot_id)
+            cached = self._team_paths.get(robot_id)
+            if cached is not None and \
+                    commands.waypoints is not cached.commanded:
+                # following something else now
+                del self._team_paths[robot_id]
+            if commands.waypoints:
+                reservations.add(
+                    robot_id, self.gs.get_robot_position(self._team, robot_id),
+                    commands.waypoints,
+                    self.gs.robot_max_speed(self._team, robot_id))
+            else:
+                idle_ids.append(robot_id)
+
+        def order(robot_id):
+            # longest first, they have the fewest other ways to go
+            goal_pos, _, priority = requests[robot_id]
+            distance = np.linalg.norm(
+                goal_pos[:2] - self.gs.get_robot_position(self._team,
+                                                          robot_id)[:2])
+            return -priority, -distance
+        planned = sorted([robot_id for robot_id in requests
+                          if robot_id in robot_ids], key=order)
+        plans = {}
+        for i, robot_id in enumerate(planned):
+            goal_pos, allow_illegal, _ = requests[robot_id]
+            plans[robot_id] = self._plan_team_path(
+                robot_id, goal_pos, allow_illegal, reservations,
+                planned[i + 1:] + idle_ids)
+        return plans
+
+    def _plan_team_path(self, robot_id, goal_pos, allow_illegal,
+                        reservations, obstacle_ids):
+        """
+        Gives the robot a path around the obstacle_ids teammates, the
+        opponents, the rules and the reservations, then reserves it
+        """
         is_legal = self.gs.is_pos_legal(goal_pos, self._team, robot_id)
         is_open = self.gs.is_position_open(goal_pos, self._team, robot_id)
         if not is_legal or not is_open:
-            goal_pos = self.find_legal_pos(robot_id, goal_pos)
-
+            goal_pos = np.array(self.find_legal_pos(robot_id, goal_pos))
         start_pos = self.gs.get_robot_position(self._team, robot_id)
-        # always check if we can just go straight
-        if not self.is_path_blocked(start_pos, goal_pos, robot_id,
-                                    buffer_dist=0,
-                                    allow_illegal=allow_illegal):
-            self.move_straight(robot_id, np.array(goal_pos))
-            return self.is_done_moving(robot_id)
+        speed = self.gs.robot_max_speed(self._team, robot_id)
+        _, teams, ids = self.gs.get_robot_pose_matrix()
+        is_obstacle = (teams != self._team) | np.isin(ids, obstacle_ids)
+        obstacles = self.visibility_obstacles(robot_id, allow_illegal,
+                                              is_obstacle)
 
-        # now check if current waypoints are already going where we want
-        current_goal = self.get_goal_pos(robot_id)
-        SAME_GOAL_THRESHOLD = 100  # TODO
-        is_same_goal = current_goal is not None and \
-            np.linalg.norm(goal_pos[:2] - current_goal[:2]) < SAME_GOAL_THRESHOLD  # noqa
-        commands = self.gs.get_robot_commands(self._team, robot_id)
-        current_waypoints = [start_pos] + commands.waypoints
-        # greedy approach only cares about first segment
-        fst_segmt = None if len(current_waypoints) < 2 else current_waypoints[:2]  # noqa
-        fst_segmt_collides = False if fst_segmt is None \
-            else self.is_path_blocked(fst_segmt[0], fst_segmt[1], robot_id,
-                                      allow_illegal=allow_illegal)
-
-        if fst_segmt is None:
-            fst_segmt_len = 0
+        cached = self._team_paths.get(robot_id)
+        is_changed = True
+        if cached is not None and \
+                cached.is_for(goal_pos, allow_illegal, 'team'):
+            is_changed = cached.advance(start_pos, self.gs.ROBOT_RADIUS)
+            if not self._is_team_path_clear(start_pos, cached.waypoints,
+                                            obstacles) or \
+                    reservations.first_conflict(start_pos, cached.waypoints,
+                                                speed) is not None:
+                cached = None
         else:
-            fst_segmt_len = np.linalg.norm(fst_segmt[1][:2] - fst_segmt[0][:2])
-
-        # distance where we should just let the robot go
-        TRIVIAL_DISTANCE = 3 * self.gs.ROBOT_RADIUS
-        # need frequent refreshes since we do not have full path planning
-        MIN_REFRESH_INTERVAL = .1
-        need_refresh = robot_id not in self._last_pathfind_times or \
-            time.time() - self._last_pathfind_times[robot_id] > MIN_REFRESH_INTERVAL  # noqa
-
-        if (fst_segmt_collides or not is_same_goal or \
-            (need_refresh and not SAME_GOAL_THRESHOLD < fst_segmt_len < TRIVIAL_DISTANCE)):  # noqa
-            self._last_pathfind_times[robot_id] = time.time()
-            is_success = self.greedy_path_find(start_pos, goal_pos, robot_id,
-                                               allow_illegal=allow_illegal)
-            if not is_success:
-                return False
+            cached = None
 
-        return self.is_done_moving(robot_id)
+        if cached is None:
+            self._last_pathfind_times[robot_id] = self.gs.clock()
+            waypoints, conflict = self._team_path_waypoints(
+                start_pos, goal_pos, obstacles, reservations, speed)
+            if waypoints is None or conflict is not None and \
+                    conflict[0] < TEAM_PLAN_WAIT:
+                # no way through (yet), wait here
+                self._team_paths.pop(robot_id, None)
+                waypoints = [np.array(start_pos)]
+                self.set_waypoints(robot_id, list(waypoints))
+                reservations.add(robot_id, start_pos, waypoints, speed)
+                return waypoints
+            cached = CachedPath(goal_pos, waypoints, allow_illegal, 'team')
+            cached.previous = np.asarray(start_pos[:2], dtype=float)
+            self._team_paths[robot_id] = cached
+            is_changed = True
+
+        commands = self.gs.get_robot_commands(self._team, robot_id)
+        if is_changed or commands.waypoints is not cached.commanded:
+            self.set_waypoints(robot_id, list(cached.waypoints))
+            cached.commanded = commands.waypoints
+        reservations.add(robot_id, start_pos, cached.waypoints, speed)
+        return list(cached.waypoints)
+
+    def _is_team_path_clear(self, start_pos, waypoints, obstacles):
+        centers, radii, rectangles, is_node_allowed = obstacles
+        route = np.array([start_pos[:2]] +
+                         [waypoint[:2] for waypoint in waypoints],
+                         dtype=float)
+        if is_node_allowed is not None and \
+                not is_node_allowed(route[1:]).all():
+            return False
+        return is_route_clear(route, centers, radii, rectangles)
+
+    def _team_path_waypoints(self, start_pos, goal_pos, obstacles,
+                             reservations, speed):
+        """
+        Shortest path that keeps out of the reserved robots' way,
+        treating where it first runs into one (for TEAM_PLAN_SWEEP either
+        side of then) as more obstacles, up to TEAM_PLAN_DETOURS times.
+        Returns the waypoints (None if there is no path at all) and the
+        conflict left on them, if any.
+        """
+        centers, radii, rectangles, is_node_allowed = obstacles
+        best = None, None
+        for _ in range(TEAM_PLAN_DETOURS + 1):
+            graph = VisibilityGraph(centers, radii, rectangles,
+                                    is_node_allowed)
+            path = graph.shortest_path(start_pos, goal_pos)
+            if path is None:
+                break
+            waypoints = path[:-1] + [goal_pos]
+            conflict = reservations.first_conflict(start_pos, waypoints,
+                                                   speed)
+            best = waypoints, conflict
+            if conflict is None:
+                break
+            # keep out of where it is around then
+            positions = reservations.positions_around(conflict[1],
+                                                      conflict[0])
+            centers = np.vstack([centers, positions])
+            radii = np.append(radii, np.full(len(positions),
+                                             reservations.clearance))
+        return best
@@ -1,8 +1,13 @@
 # pylint: disable=maybe-no-member
 import numpy as np
-import time
 from typing import Tuple
 import logging
+try:
+    from rrt_tree import RRTTree
+    from visibility_graph import VisibilityGraph
+except (SystemError, ImportError):
+    from .rrt_tree import RRTTree
+    from .visibility_graph import VisibilityGraph
 
 logger = logging.getLogger(__name__)
 
@@ -13,30 +18,14 @@ class Analysis(object):
     """
     def get_future_ball_array(self):
         """
-        Samples incrementally to return array of
-        future predicted ball positions
+        Returns list of (timestamp, position) of future predicted
+        ball positions, see gamestate's BallTrajectory
         """
-        ball_pos = self.gs.get_ball_position()
-        """
-        this definition of new_ball_pos guarentees that
-        they are not the same intitally
-        """
-        new_ball_pos = ball_pos - np.array([1, 1])
-        now = time.time()
-        t = 0
-        delta_t = .1
-        future_ball_array = []
-        while (((ball_pos != new_ball_pos).any() or t == 0)
-                and self.gs.is_in_field(new_ball_pos)):
-            # here we make the previously generated point the reference
-            ball_pos = new_ball_pos
-            new_ball_pos = self.gs.predict_ball_pos(t)
-            future_ball_array.append((t + now, new_ball_pos))
-            t += delta_t
-        return future_ball_array
+        return self.gs.get_ball_trajectory().as_list()
 
     def intercept_range(self,
-                        robot_id: int
+                        robot_id: int,
+                        team: str = None
                         ) -> Tuple[Tuple[float, float], Tuple[float, float]]:
         """find the range for which a robot can reach the ball in its trajectory
 
@@ -44,65 +33,37 @@ class Analysis(object):
             returns the positions between which robots can intercept the ball.
             returns None if interception is not possible
         """
-        future_ball_array = self.get_future_ball_array()
-        if len(future_ball_array) == 0:
+        if team is None:
+            team = self._team
+        trajectory = self.gs.get_ball_trajectory()
+        if len(trajectory) == 0:
+            return None
+        # solved for all robots at once, see gamestate's ball_interception
+        intercepts = self.gs.get_ball_intercepts()
+        i = intercepts.index(team, robot_id)
+        if i is None:
+            # not seen (or lost)
             return None
-        max_index = len(future_ball_array) - 1
-        robot_pos = self.gs.get_robot_position(self._team, robot_id)
-        max_speed = self.gs.robot_max_speed(self._team, robot_id)
-
-        def buffer_time(data):
-            timestamp, ball_pos = data
-            ball_travel_time = timestamp - time.time()
-            dist_robot_needs_to_travel = np.linalg.norm(ball_pos
-                                                        - robot_pos[:2])
-            robot_travel_time = dist_robot_needs_to_travel / max_speed
-            return ball_travel_time - robot_travel_time
-        index = 0
-        while(index < max_index and buffer_time(future_ball_array[index]) < 0):
-            index += 1
         """
-        This "if/elif" covers the cases when we've exhausted the
-        future_ball_array and haven't found an last_intercept_point
-        if the last two pos entries are equal, the ball is stopped
-        and we can get there in a time longer than the
-        scope of the array, otherwise there is no intercept pos.
+        If the robot can't get there before the ball leaves the field,
+        this has always given the point where it leaves, so robots
+        still chase it.
         """
-        if index >= max_index:
-            if ((future_ball_array[max_index][1] ==
-                    future_ball_array[max_index - 1][1]).all):
-                return (future_ball_array[max_index][1],
-                        future_ball_array[max_index][1])
-            else:
-                return None
-        first_intercept_point = future_ball_array[index][1]
-        while ((index < max_index and
-                buffer_time(future_ball_array[index]) >= 0)):
-            index += 1
-        last_intercept_point = future_ball_array[index-1][1]
-        return first_intercept_point, last_intercept_point
+        if np.isnan(intercepts.earliest_times[i]):
+            return trajectory.positions[-1], trajectory.positions[-1]
+        return intercepts.earliest_positions[i], intercepts.latest_positions[i]
 
     def safest_intercept_point(self, robot_id: int) -> Tuple[float, float]:
         """determine the point in the ball's trajectory that the robot can reach
         soonest relative to the ball (even if it's too late)
         """
-        future_ball_array = self.get_future_ball_array()
-        robot_pos = self.gs.get_robot_position(self._team, robot_id)
-        max_speed = self.gs.robot_max_speed(self._team, robot_id)
-
-        def buffer_time(data):
-            timestamp, ball_pos = data
-            ball_travel_time = timestamp - time.time()
-            distance_robot_needs_to_travel = np.linalg.norm(ball_pos
-                                                            - robot_pos[:2])
-            robot_travel_time = distance_robot_needs_to_travel / max_speed
-            return ball_travel_time - robot_travel_time
-        if len(future_ball_array) > 0:
-            buffer_time, safest_pos = max(future_ball_array, key=buffer_time)
-        else:
-            # if the ball is not visible, return current position
-            safest_pos = robot_pos
-        return safest_pos
+        # solved for all robots at once, see gamestate's ball_interception
+        intercepts = self.gs.get_ball_intercepts()
+        i = intercepts.index(self._team, robot_id)
+        if i is None or np.isnan(intercepts.safest_times[i]):
+            # if the ball is not in the field, return current position
+            return self.gs.get_robot_position(self._team, robot_id)
+        return intercepts.safest_positions[i]
 
     def defending_on_left(self):
         return self.gs.is_blue_defense_side_left() == (self._team == "blue")
@@ -112,9 +73,9 @@ class Analysis(object):
         dists = {}
         team = self.gs.other_team(self._team) if other_team else self._team
         if ids is None:
-            ids = self.gs.get_robot_ids(team)
+            ids = self.gs.get_active_robot_ids(team)
         for robot_id in ids:
-            intercept_range = self.intercept_range(robot_id)
+            intercept_range = self.intercept_range(robot_id, team)
             if intercept_range:
                 intercept_path = intercept_range[0] \
                     - self.gs.get_robot_position(team, robot_id)[:2]
@@ -180,7 +141,8 @@ class Analysis(object):
     def find_legal_pos(self, robot_id: int, position=None,
                        perpendicular=False) -> Tuple[float, float, float]:
         """
-        Returns a nearby legal and open position by searching around the robot.
+        Returns the nearest legal and open position to the robot (or the
+        given position), see gamestate's FreeSpaceMap.
         Searches perpendicular to the path to the goal first if
         perpendicular is set to True.
         Returns the current position if it is legal.
@@ -189,42 +151,23 @@ class Analysis(object):
             position = position[:2]
             path = position - self.gs.get_robot_position(self._team,
                                                          robot_id)[:2]
-            norm_path = path / np.linalg.norm(path)
-            STEP_SIZE = self.gs.ROBOT_RADIUS
-            direction = np.array([norm_path[1], -norm_path[0]])
-            for i in range(0, 2000, int(STEP_SIZE)):
-                if self.gs.is_pos_legal(position + i * direction, self._team,
-                                        robot_id) and \
-                   self.gs.is_position_open(position + i * direction,
-                                            self._team, robot_id):
-                    return position + i * direction
-                if self.gs.is_pos_legal(position - i * direction, self._team,
-                                        robot_id) and \
-                   self.gs.is_position_open(position - i * direction,
-                                            self._team, robot_id):
-                    return position - i * direction
-            self.logger.debug("No legal perpeudicular position found")
+            # (no direction if the robot is at the position)
+            if path.any():
+                norm_path = path / np.linalg.norm(path)
+                direction = np.array([norm_path[1], -norm_path[0]])
+                pos = self.gs.nearest_free_position_on_line(
+                    position, direction, 2000, self._team, robot_id)
+                if pos is not None:
+                    return pos
+                self.logger.debug("No legal perpeudicular position found")
         if position is None:
             position = self.gs.get_robot_position(self._team, robot_id)
         if len(position) == 2:
             position = (position[0], position[1], None)
         x, y, w = position
-        delta = 0
-        for delta in range(0, 1000, 10):
-            positions_to_try = [
-                np.array([x, y + delta, w]),
-                np.array([x, y - delta, w]),
-                np.array([x + delta, y, w]),
-                np.array([x - delta, y, w]),
-                np.array([x + delta, y + delta, w]),
-                np.array([x - delta, y + delta, w]),
-                np.array([x + delta, y - delta, w]),
-                np.array([x - delta, y - delta, w])
-            ]
-            for pos in positions_to_try:
-                if self.gs.is_pos_legal(pos, self._team, robot_id) and \
-                   self.gs.is_position_open(pos, self._team, robot_id):
-                    return pos
+        pos = self.gs.nearest_free_position((x, y), self._team, robot_id)
+        if pos is not None:
+            return np.array([pos[0], pos[1], w])
         self.logger.debug("No legal position found open")
         return np.array([0, 0, 0])
 
@@ -262,7 +205,8 @@ class Analysis(object):
         goal_dist = np.linalg.norm(center_of_goal - pos[:2])
         # Measure of proximity to opposing robots
         nearest_opponent_dist = self.gs.FIELD_X_LENGTH + self.gs.FIELD_Y_LENGTH
-        for opponent in self.gs.get_robot_ids(self.gs.other_team(self._team)):
+        for opponent in self.gs.get_active_robot_ids(
+                self.gs.other_team(self._team)):
             opponent_pos = self.gs.get_robot_position(self.gs.other_team(
                 self._team), opponent)
             opponent_dist = np.linalg.norm(opponent_pos[:2] - pos[:2])
@@ -270,7 +214,7 @@ class Analysis(object):
         # Measure of the spread of a formation
         teammate_sum = 0
         # nearest_teammate_dist = self.gs.FIELD_X_LENGTH + self.gs.FIELD_Y_LENGTH  # noqa
-        for teammate in self.gs.get_robot_ids(self._team):
+        for teammate in self.gs.get_active_robot_ids(self._team):
             if teammate != robot_id:
                 teammate_pos = self.gs.get_robot_position(self._team, teammate)
                 teammate_dist = np.linalg.norm(teammate_pos[:2] - pos[:2])
@@ -321,7 +265,8 @@ class Analysis(object):
         # center_of_goal = (goal[0] + goal[1]) / 2
         # Measure of proximity to opposing robots
         nearest_opponent_dist = self.gs.FIELD_X_LENGTH + self.gs.FIELD_Y_LENGTH
-        for opponent in self.gs.get_robot_ids(self.gs.other_team(self._team)):
+        for opponent in self.gs.get_active_robot_ids(
+                self.gs.other_team(self._team)):
             opponent_pos = self.gs.get_robot_position(self.gs.other_team(
                 self._team), opponent)
             opponent_dist = np.linalg.norm(opponent_pos[:2] - pos[:2])
@@ -329,7 +274,7 @@ class Analysis(object):
         # Measure of the spread of a formation
         teammate_sum = 0
         # nearest_teammate_dist = self.gs.FIELD_X_LENGTH + self.gs.FIELD_Y_LENGTH  # noqa
-        for teammate in self.gs.get_robot_ids(self._team):
+        for teammate in self.gs.get_active_robot_ids(self._team):
             if teammate != robot_id:
                 teammate_pos = self.gs.get_robot_position(self._team, teammate)
                 teammate_dist = np.linalg.norm(teammate_pos[:2] - pos[:2])
@@ -374,7 +319,8 @@ class Analysis(object):
         goal_dist = np.linalg.norm(center_of_goal - pos[:2])
         # Measure of proximity to opposing robots
         nearest_opponent_dist = self.gs.FIELD_X_LENGTH + self.gs.FIELD_Y_LENGTH
-        for opponent in self.gs.get_robot_ids(self.gs.other_team(self._team)):
+        for opponent in self.gs.get_active_robot_ids(
+                self.gs.other_team(self._team)):
             opponent_pos = self.gs.get_robot_position(self.gs.other_team(
                 self._team), opponent)
             opponent_dist = np.linalg.norm(opponent_pos[:2] - pos[:2])
@@ -433,35 +379,20 @@ class Analysis(object):
             x += STEP_SIZE
         return best_pos
 
-    # TODO: speed up first_path_obstacle
-    # and is_path_blocked using approach of is_straight_path_open
     def first_path_obstacle(self, s_pos, g_pos, robot_id,
                             buffer_dist=0, allow_illegal=False):
-        "finds first obstacle in a linear robot trajectory"
+        """
+        finds where a linear robot trajectory first hits an obstacle
+        (see gs.first_path_collision)
+        """
         s_pos = np.array(s_pos)[:2]
         g_pos = np.array(g_pos)[:2]
 
         if (g_pos == s_pos).all():
             return None
-
-        def legal(pos):
-            return self.gs.is_pos_legal(pos,
-                                        self._team, robot_id) or allow_illegal
-        path = g_pos - s_pos
-        norm_path = path / np.linalg.norm(path)
-        STEP_SIZE = self.gs.ROBOT_RADIUS
-
-        # step along the path and look for a blocked point
-        steps = int(np.floor(np.linalg.norm(path) / STEP_SIZE))
-        for i in range(1, steps + 1):
-            intermediate_pos = s_pos + norm_path * STEP_SIZE * i
-            np.append(intermediate_pos, 0)
-            if not self.gs.is_position_open(intermediate_pos,
-                                            self._team,
-                                            robot_id, buffer_dist) \
-                    or not legal(intermediate_pos):
-                return intermediate_pos
-        return None
+        return self.gs.first_path_collision(s_pos, g_pos, self._team,
+                                            robot_id, buffer_dist,
+                                            allow_illegal)
 
     def is_path_blocked(self, s_pos, g_pos, robot_id,
                         buffer_dist=0, allow_illegal=False):
@@ -479,10 +410,6 @@ class Analysis(object):
         if not self.gs.is_position_open(g_pos, self._team,
                                         robot_id) or not legal(g_pos):
             return True
-        # path = g_pos - s_pos
-        # norm_path = path / np.linalg.norm(path)
-        # STEP_SIZE = self.gs.ROBOT_RADIUS
-
         return (self.first_path_obstacle(s_pos, g_pos,
                                          robot_id, buffer_dist=buffer_dist,
                                          allow_illegal=allow_illegal)
@@ -497,31 +424,35 @@ class Analysis(object):
         """
         if buffer is None:
             buffer = 2 * self.gs.ROBOT_RADIUS
-        robot_positions = self.gs.get_all_robot_positions()
-        s_pos = s_pos[:2]
-        g_pos = g_pos[:2]
+        s_pos = np.asarray(s_pos[:2], dtype=float)
+        g_pos = np.asarray(g_pos[:2], dtype=float)
         if (s_pos == g_pos).all():
             return True
-        x1, y1 = s_pos[:2]
-        x2, y2 = g_pos[:2]
-        line_unit_vector = (s_pos - g_pos) / np.linalg.norm(s_pos - g_pos)
-        for pos in robot_positions:
-            if pos[0][0] == self._team and pos[0][1] in ignore_ids \
-                or pos[0][0] == self.gs.other_team(self._team) and \
-                    pos[0][1] in ignore_opp_ids:
-                continue
-            pos = pos[1][:2]
-            self.logger.debug(f"{pos}")
-            x3, y3 = pos[:2]
-            if np.dot(line_unit_vector, (s_pos - pos)) > 0 and \
-                    np.dot(line_unit_vector,
-                           (pos - g_pos)) > -1 * self.gs.ROBOT_RADIUS:
-                distance_from_line = abs((-(y2-y1)*x3 + (x2-x1)*y3 - y1*(x2-x1)
-                                         + x1*(y2-y1)) /
-                                         np.linalg.norm(g_pos-s_pos))
-                if distance_from_line < 2 * self.gs.ROBOT_RADIUS:
-                    return False
-        return True
+        poses, teams, ids = self.gs.get_robot_pose_matrix()
+        # (callers can pass things that aren't ids, e.g. the (None, None)
+        # from which_teammate_has_ball, which never match a robot)
+        ignore_ids = [i for i in ignore_ids
+                      if isinstance(i, (int, np.integer))]
+        ignore_opp_ids = [i for i in ignore_opp_ids
+                          if isinstance(i, (int, np.integer))]
+        is_ignored = (teams == self._team) & np.isin(ids, ignore_ids) | \
+            (teams == self.gs.other_team(self._team)) & \
+            np.isin(ids, ignore_opp_ids)
+        positions = poses[~is_ignored, :2]
+        length = np.linalg.norm(g_pos - s_pos)
+        line_unit_vector = (s_pos - g_pos) / length
+        # robots between the start and (just past) the goal
+        is_between = ((s_pos - positions) @ line_unit_vector > 0) & \
+            ((positions - g_pos) @ line_unit_vector > -self.gs.ROBOT_RADIUS)
+        # perpendicular distance from the line through s_pos and g_pos
+        x1, y1 = s_pos
+        x2, y2 = g_pos
+        distance_from_line = np.abs(
+            -(y2 - y1) * positions[:, 0] + (x2 - x1) * positions[:, 1] -
+            y1 * (x2 - x1) + x1 * (y2 - y1)) / length
+        is_blocking = is_between & \
+            (distance_from_line < 2 * self.gs.ROBOT_RADIUS)
+        return not is_blocking.any()
 
     def within_shooting_range(self, team, robot_id):
         # shooting range
@@ -534,12 +465,20 @@ class Analysis(object):
 
     def RRT_path_find(self, start_pos, goal_pos,
                       robot_id, lim=1000, allow_illegal=False):
-        """generate RRT waypoints"""
+        """set RRT waypoints, returns whether it found a path"""
+        waypoints = self.RRT_waypoints(start_pos, goal_pos, robot_id,
+                                       lim=lim, allow_illegal=allow_illegal)
+        if waypoints is None:
+            return False
+        self.set_waypoints(robot_id, waypoints)
+        return True
+
+    def RRT_waypoints(self, start_pos, goal_pos,
+                      robot_id, lim=1000, allow_illegal=False):
+        """generate RRT waypoints, None if it doesn't find a path"""
         goal_pos = np.array(goal_pos)
         start_pos = np.array(start_pos)
-        graph = {tuple(start_pos): []}
-        prev = {tuple(start_pos): None}
-        cnt = 0
+        tree = RRTTree(start_pos, lim)
         success = False
         for _ in range(lim):
             # use gamestate.random_position()
@@ -551,37 +490,30 @@ class Analysis(object):
                 new_pos = goal_pos
 
             if not self.gs.is_position_open(new_pos, self._team,
-                                            robot_id, buffer_dist=0) \
-               or tuple(new_pos) in graph:
+                                            robot_id, buffer_dist=0):
                 continue
 
-            nearest_pos = self.get_nearest_pos(graph, tuple(new_pos))
-            extend_pos = self.extend(nearest_pos, new_pos, robot_id=robot_id)
+            nearest, distance = tree.nearest(new_pos)
+            if distance == 0:
+                continue
+            extend_pos = self.extend(tree.positions[nearest], new_pos,
+                                     robot_id=robot_id)
             if extend_pos is None:
                 continue
 
-            graph[tuple(extend_pos)] = [nearest_pos]
-            graph[nearest_pos].append(tuple(extend_pos))
-            prev[tuple(extend_pos)] = nearest_pos
+            tree.add(extend_pos, nearest)
 
             if np.linalg.norm(extend_pos[:2]
                               - goal_pos[:2]) < self.gs.ROBOT_RADIUS:
                 success = True
                 break
 
-            cnt += 1
-
         if not success:
             self.logger.debug("RRT path find failing")
-            return success
+            return None
 
-        pos = self.get_nearest_pos(graph, goal_pos)
-        # get nearest position to goal in graph
-        path = []
-        while not (pos[:2] == start_pos[:2]).all():
-            path.append(pos)
-            pos = prev[pos]
-        path.reverse()
+        # path to the nearest position to goal in the tree
+        path = tree.path_to(tree.nearest(goal_pos)[0])
 
         # Smooth path to reduce zig zagging
         i = 0
@@ -599,20 +531,7 @@ class Analysis(object):
                 path = path[:i+1]
                 break
 
-        self.set_waypoints(robot_id, path + [goal_pos])
-        return success
-
-    # RRT helper
-    def get_nearest_pos(self, graph, new_pos):
-        rtn = None
-        min_dist = float('inf')
-        for pos in graph:
-            dist = np.sqrt((new_pos[0] - pos[0]) ** 2
-                           + (new_pos[1] - pos[1]) ** 2)
-            if dist < min_dist:
-                min_dist = dist
-                rtn = pos
-        return rtn
+        return path + [goal_pos]
 
     # RRT helper
     def extend(self, s_pos, g_pos, robot_id=None):
@@ -622,29 +541,41 @@ class Analysis(object):
         if (g_pos == s_pos).all():
             return False
 
+        if not self.gs.is_pos_legal(g_pos, self._team, robot_id):
+            return None
         path = g_pos - s_pos
-        norm_path = path / np.linalg.norm(path)
+        length = np.linalg.norm(path)
         STEP_SIZE = self.gs.ROBOT_RADIUS
 
-        # step along the path and check if any points are blocked
-        poses = [None]
-        steps = int(np.floor(np.linalg.norm(path) / STEP_SIZE))
-        for i in range(1, steps + 1):
-            intermediate_pos = s_pos + norm_path * STEP_SIZE * i
-            np.append(intermediate_pos, 0)
-            if not self.gs.is_position_open(intermediate_pos, self._team,
-                                            robot_id, buffer_dist=100) or \
-               not self.gs.is_pos_legal(g_pos, self._team, robot_id):
-                break
-            if np.linalg.norm(intermediate_pos - s_pos) > 4 * STEP_SIZE:
-                break
-            poses.append(intermediate_pos)
-
-        return poses[-1]
+        # whole steps along the path before it gets too close to a robot,
+        # up to 4 of them
+        hit_time = self.gs.path_collision_time(s_pos, g_pos, self._team,
+                                               robot_id, buffer_dist=100)
+        # (colliding right at a step counts as blocked there)
+        free_length = min(hit_time, 1) * length
+        steps = min(int(np.floor(free_length / STEP_SIZE)), 4)
+        if hit_time <= 1 and steps * STEP_SIZE >= free_length:
+            steps -= 1
+        if steps <= 0:
+            return None
+        return s_pos + path / length * STEP_SIZE * steps
 
     def greedy_path_find(self, start_pos, goal_pos,
                          robot_id, lim=10, allow_illegal: bool = False):
         """Heuristic path finder"""
+        waypoints = self.greedy_waypoints(start_pos, goal_pos, robot_id,
+                                          lim=lim, allow_illegal=allow_illegal)
+        if waypoints is None:
+            return False
+        self.set_waypoints(robot_id, waypoints)
+        return True
+
+    def greedy_waypoints(self, start_pos, goal_pos,
+                         robot_id, lim=10, allow_illegal: bool = False):
+        """
+        Waypoints of greedy_path_find, None if it fails. Only the first
+        segment is checked, the rest is up to later calls.
+        """
         s_pos = start_pos[:2]
         g_pos = goal_pos[:2]
         for _ in range(lim):
@@ -654,19 +585,77 @@ class Analysis(object):
                 buffer_dist=0,
                 allow_illegal=allow_illegal)
             if obstacle is None:
-                self.set_waypoints(robot_id, [g_pos, goal_pos])
-                return True
+                return [g_pos, goal_pos]
             # find a new position if there is an obstacle
             # TODO: make this account for allow_illegal
             g_pos = self.find_legal_pos(robot_id, obstacle, perpendicular=True)
-        return False
+        return None
+
+    def visibility_obstacles(self, robot_id, allow_illegal=False,
+                             is_obstacle=None):
+        """
+        (centers, radii, rectangles, is_node_allowed) for a VisibilityGraph
+        around the robots is_obstacle picks (a mask over
+        gs.get_robot_pose_matrix(), by default all the others) and the
+        rules, unless allow_illegal
+        """
+        poses, teams, ids = self.gs.get_robot_pose_matrix()
+        if is_obstacle is None:
+            is_obstacle = (teams != self._team) | (ids != robot_id)
+        centers = poses[is_obstacle, :2]
+        radii = np.full(len(centers), self.gs.ROBOT_RADIUS * 2)
+        if allow_illegal:
+            return centers, radii, np.empty((0, 4)), None
+        rectangles, rule_centers, rule_radii = \
+            self.gs.forbidden_shapes(self._team, robot_id)
+        return (np.vstack([centers, rule_centers]),
+                np.concatenate([radii, rule_radii]), rectangles,
+                lambda points: self.gs.are_pos_legal(points, self._team,
+                                                     robot_id))
+
+    def get_visibility_graph(self, robot_id, allow_illegal=False):
+        """
+        VisibilityGraph around the other robots (and the rules, unless
+        allow_illegal), made once per position update
+        """
+        return self.gs.memoize(
+            ('get_visibility_graph', self._team, robot_id, allow_illegal),
+            lambda: VisibilityGraph(*self.visibility_obstacles(
+                robot_id, allow_illegal)))
+
+    def visibility_path_find(self, start_pos, goal_pos,
+                             robot_id, allow_illegal: bool = False):
+        """Shortest path finder, see VisibilityGraph"""
+        waypoints = self.visibility_waypoints(start_pos, goal_pos, robot_id,
+                                              allow_illegal=allow_illegal)
+        if waypoints is None:
+            return False
+        self.set_waypoints(robot_id, waypoints)
+        return True
+
+    def visibility_waypoints(self, start_pos, goal_pos,
+                             robot_id, allow_illegal: bool = False):
+        """
+        Waypoints of the shortest path around the obstacles, None if there
+        isn't one
+        """
+        graph = self.get_visibility_graph(robot_id, allow_illegal)
+        path = graph.shortest_path(start_pos, goal_pos)
+        if path is None:
+            return None
+        return path[:-1] + [goal_pos]
 
     def which_robot_has_ball(self, teams=["blue", "yellow"]):
+        # memoized until the positions change
+        return self.gs.memoize(('which_robot_has_ball', tuple(teams)),
+                               lambda: self._which_robot_has_ball(teams))
+
+    def _which_robot_has_ball(self, teams):
         # BUFFER = 2 * self.gs._BALL_RADIUS (TODO): var wasn't being  used
         for team in teams:
             if team not in ["blue", "yellow"]:
                 continue
-            robot_ids = self.gs.get_robot_ids(team)
+            robot_ids = self.gs.get_active_robot_ids(team)
             for id in robot_ids:
                 if self.gs.ball_in_dribbler(team, id):
                     return team, id
@@ -689,7 +678,7 @@ class Analysis(object):
     def identify_enemy_threat_level(self):
         our_team = self._team
         other_team = self.gs.other_team(our_team)
-        enemy_robot_ids = self.gs.get_robot_ids(other_team)
+        enemy_robot_ids = self.gs.get_active_robot_ids(other_team)
         enemy_robot_distances = []
         goal_top, goal_bottom = self.gs.get_defense_goal(self._team)
         goal_center = (goal_top + goal_bottom) / 2
@@ -708,7 +697,7 @@ class Analysis(object):
         '''
         our_team = self._team
         other_team = self.gs.other_team(our_team)
-        enemy_robot_ids = self.gs.get_robot_ids(other_team)
+        enemy_robot_ids = self.gs.get_active_robot_ids(other_team)
         enemy_robot_distances = []
         goal_top, goal_bottom = self.gs.get_defense_goal(self._team)
         goal_center = (goal_top + goal_bottom) / 2
@@ -73,7 +73,7 @@ class Coach(object):
         latest_refbox_message = self.gs.get_latest_refbox_message()
         if latest_refbox_message:
             self._command_dict[latest_refbox_message.command]()
-        for robot_id in self.gs.get_robot_ids(self._team):
+        for robot_id in self.gs.get_active_robot_ids(self._team):
             current_pos = self.gs.get_robot_position(self._team, robot_id)
             # Get out of illegal positions immediately
             if not self.gs.is_pos_legal(current_pos, self._team, robot_id):
@@ -0,0 +1,110 @@
+import numpy as np
+
+# goals closer than this to the cached one count as the same (mm)
+SAME_GOAL_THRESHOLD = 100
+
+
+def segment_distances(starts, ends, points):
+    "distance from each point (column) to each segment (row)"
+    starts = starts[:, None, :]
+    segments = (ends - starts[:, 0])[:, None, :]
+    lengths2 = (segments ** 2).sum(axis=2)
+    lengths2[lengths2 == 0] = 1
+    t = np.clip(((points[None] - starts) * segments).sum(axis=2) / lengths2,
+                0, 1)
+    closest = starts + t[:, :, None] * segments
+    return np.linalg.norm(points[None] - closest, axis=2)
+
+
+class CachedPath(object):
+    """
+    The last path planned for a robot, and what the other robots and rules
+    looked like when its segments were last checked, so following it
+    only means checking the segments something could have moved into.
+    Segment i goes to waypoints[i] (from the robot, for the first one).
+    """
+    def __init__(self, goal, waypoints, allow_illegal, planner=None):
+        self.goal = np.array(goal[:2], dtype=float)
+        self.allow_illegal = allow_illegal
+        # what made it, repairs use the same one
+        self.planner = planner
+        self.waypoints = list(waypoints)
+        # which segments haven't been checked since they were planned
+        self.unchecked = [True] * len(self.waypoints)
+        # where the robot came from, to tell when it's passed a waypoint
+        self.previous = None
+        # other robot positions, (teams, ids) and the rules last check
+        self._obstacles = None
+        self._robots = None
+        self._rules = None
+        self._ball = None
+        # commands.waypoints we last set from this path
+        self.commanded = None
+
+    def is_for(self, goal, allow_illegal, planner=None):
+        distance = np.linalg.norm(np.asarray(goal[:2], dtype=float) -
+                                  self.goal)
+        return allow_illegal == self.allow_illegal and \
+            planner == self.planner and distance < SAME_GOAL_THRESHOLD
+
+    def advance(self, robot_pos, reached_distance):
+        """
+        Drops the waypoints (except the goal) the robot has reached or gone
+        past, returns whether there were any
+        """
+        robot_pos = np.asarray(robot_pos[:2], dtype=float)
+        passed = 0
+        while passed < len(self.waypoints) - 1:
+            waypoint = np.asarray(self.waypoints[passed][:2], dtype=float)
+            is_close = np.linalg.norm(waypoint - robot_pos) < \
+                reached_distance
+            is_past = self.previous is not None and \
+                (robot_pos - waypoint) @ (waypoint - self.previous) > 0
+            if not (is_close or is_past):
+                break
+            self.previous = waypoint
+            passed += 1
+        del self.waypoints[:passed]
+        del self.unchecked[:passed]
+        return passed > 0
+
+    def segments_to_check(self, gs, team, robot_id, robot_pos, reach):
+        """
+        Indices of the segments that need checking again: the first one
+        (the robot moves), any not checked yet, and any that another robot
+        has moved within reach of. All of them if the rules changed.
+        Takes a new snapshot of the obstacles, so call it once per check.
+        """
+        poses, teams, ids = gs.get_robot_pose_matrix()
+        is_other = (teams != team) | (ids != robot_id)
+        obstacles = poses[is_other, :2]
+        robots = (teams[is_other].tolist(), ids[is_other].tolist())
+        rules = (gs.get_refbox_command(), gs.is_blue_defense_side_left())
+        ball = gs.get_ball_position() if gs.ball_rules_apply() else None
+        rules_changed = rules != self._rules or (
+            ball is not None and (self._ball is None or
+                                  (ball != self._ball).any()))
+        if rules_changed or robots != self._robots:
+            check = np.ones(len(self.waypoints), dtype=bool)
+        else:
+            route = np.array([robot_pos[:2]] +
+                             [waypoint[:2] for waypoint in self.waypoints],
+                             dtype=float)
+            moved = (obstacles != self._obstacles).any(axis=1)
+            near = segment_distances(route[:-1], route[1:],
+                                     obstacles[moved]) < reach
+            check = near.any(axis=1) | self.unchecked
+            check[0] = True
+        self._obstacles = obstacles
+        self._robots = robots
+        self._rules = rules
+        self._ball = ball
+        return np.flatnonzero(check)
+
+    def replace_segment(self, i, waypoints):
+        """
+        Replaces segment i with a path along waypoints (which end where
+        it did), keeping the rest of the path
+        """
+        self.waypoints[i:i + 1] = waypoints
+        self.unchecked[i:i + 1] = [True] * len(waypoints)
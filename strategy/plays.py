@@ -15,7 +15,7 @@ class Plays:
 
         # TODO: tell other robots to go to starting lineup
         # TODO: below code needs to be tested
-        ids = self.gs.get_robot_ids(self._team)
+        ids = self.gs.get_active_robot_ids(self._team)
         goalie_id = self.gs.get_goalie_id(self._team)
         self.goalie(goalie_id)
         ids.remove(goalie_id)
@@ -66,12 +66,12 @@ class Plays:
         ball_pos = self.gs.get_ball_position()
         team = self._team
         if robot_ids is None:
-            robot_ids = self.gs.get_robot_ids(team)
+            robot_ids = self.gs.get_active_robot_ids(team)
         for robot_id in robot_ids:
             self.set_speed_limit(robot_id, speed_limit)
             a = self.gs.get_robot_position(team, robot_id)[:2] - ball_pos
             if np.linalg.norm(a) < distance:
-                self.path_find(robot_id, self.find_legal_pos(robot_id))
+                self.request_path(robot_id, self.find_legal_pos(robot_id))
 
     def avoid_ball_penalty(self, robot_ids=None, distance=1000,
                            speed_limit=1500):
@@ -80,17 +80,17 @@ class Plays:
         ball_pos = self.gs.get_ball_position()
         team = self._team
         if robot_ids is None:
-            robot_ids = self.gs.get_robot_ids(team)
+            robot_ids = self.gs.get_active_robot_ids(team)
         for robot_id in robot_ids:
             self.set_speed_limit(robot_id, speed_limit)
             a = self.gs.get_robot_position(team, robot_id)[:2] - ball_pos
             if abs(a[0]) < distance:
-                self.path_find(robot_id,
-                               self.find_legal_pos(robot_id,
-                                                   position=[0, 0, 0]))
+                self.request_path(robot_id,
+                                  self.find_legal_pos(robot_id,
+                                                      position=[0, 0, 0]))
 
     def move_randomly(self):
-        for robot_id in self.gs.get_robot_ids(self._team):
+        for robot_id in self.gs.get_active_robot_ids(self._team):
             self.random_robot(robot_id)
 
     def timeout(self) -> None:
@@ -136,7 +136,8 @@ class Plays:
 
     def prepare_freekick(self, is_direct):
         free_kicker_id = self.rank_intercept_distances()[0][0]
-        other_bots = self.gs.get_robot_ids(self._team).remove(free_kicker_id)
+        other_bots = self.gs.get_active_robot_ids(self._team).remove(
+            free_kicker_id)
         self.avoid_ball(other_bots)
         if is_direct:
             self.free_kicker(free_kicker_id)
@@ -159,5 +160,6 @@ class Plays:
     def defend_penalty(self):
         goalie_id = self.gs.get_goalie_id(self._team)
         self.penalty_goalie(goalie_id)
-        other_bots = self.gs.get_robot_ids(self._team).remove(goalie_id)
+        other_bots = self.gs.get_active_robot_ids(self._team).remove(
+            goalie_id)
         self.avoid_ball_penalty(other_bots)
@@ -1,7 +1,6 @@
 # pylint: disable=maybe-no-member
 import numpy as np
 from random import random
-import time
 
 
 class Roles:
@@ -80,10 +79,9 @@ class Roles:
                ):
                 self.prepare_and_kick(robot_id, center_of_goal, shoot_velocity)
             else:
-                team_position_data = self.gs.get_team_positions(team)
                 team_posns = {}
-                for id, pos_data in team_position_data.items():
-                    team_posns[id] = pos_data[0][1]
+                for id in self.gs.get_active_robot_ids(team):
+                    team_posns[id] = self.gs.get_robot_position(team, id)
                 best_teammates = sorted(
                     team_posns.items(),
                     key=lambda x: self.rate_pass_pos(x[1], x[0]),
@@ -121,35 +119,35 @@ class Roles:
         """Commands a given robot id to play as attacker without a ball"""
         MIN_REFRESH_INTERVAL = .1
         if robot_id not in self._last_pathfind_times or \
-           time.time() - self._last_pathfind_times[robot_id] > MIN_REFRESH_INTERVAL:  # noqa
+           self.gs.clock() - self._last_pathfind_times[robot_id] > MIN_REFRESH_INTERVAL:  # noqa
             pos_x, pos_y = self.attacker_get_open(robot_id)
             ball_pos = self.gs.get_ball_position()
             pos_w = self.face_pos([pos_x, pos_y], ball_pos)
-            self.path_find(robot_id, [pos_x, pos_y, pos_w])
+            self.request_path(robot_id, [pos_x, pos_y, pos_w])
         # time.sleep(1)
 
     def attacker_off_ball2(self, robot_id):
         """Commands a given robot id to play as attacker without a ball"""
         MIN_REFRESH_INTERVAL = .1
         if robot_id not in self._last_pathfind_times or \
-           time.time() - self._last_pathfind_times[robot_id] > MIN_REFRESH_INTERVAL:  # noqa
+           self.gs.clock() - self._last_pathfind_times[robot_id] > MIN_REFRESH_INTERVAL:  # noqa
             pos_x, pos_y = self.attacker_get_open(robot_id)
             ball_pos = self.gs.get_ball_position()
             pos_w = self.face_pos([pos_x, pos_y], ball_pos)
-            self.path_find(robot_id, [pos_x, pos_y, pos_w])
+            self.request_path(robot_id, [pos_x, pos_y, pos_w])
 
     def deep_attacker(self, robot_id):
         """Commands a given robot id to play as attacker without a ball"""
         MIN_REFRESH_INTERVAL = .1
         if robot_id not in self._last_pathfind_times or \
-           time.time() - self._last_pathfind_times[robot_id] > MIN_REFRESH_INTERVAL:  # noqa
+           self.gs.clock() - self._last_pathfind_times[robot_id] > MIN_REFRESH_INTERVAL:  # noqa
             pos_x, pos_y = self.attacker_get_open(
                 robot_id,
                 pos_rating=self.rate_deep_attacker_pos
             )
             ball_pos = self.gs.get_ball_position()
             pos_w = self.face_pos([pos_x, pos_y], ball_pos)
-            self.path_find(robot_id, [pos_x, pos_y, pos_w])
+            self.request_path(robot_id, [pos_x, pos_y, pos_w])
 
     def free_kicker(self, robot_id):
         team = self._team
@@ -183,7 +181,7 @@ class Roles:
             elif distance >= self.gs.ROBOT_RADIUS:
                 # self.logger.debug(f"{distance}")
                 # Might want to make a faster path finder to stop ball
-                self.path_find(robot_id, interceptPos)
+                self.request_path(robot_id, interceptPos)
             else:
                 DEFENDER_OFFSET = min(500, np.linalg.norm(curr_pos - ball_pos))
                 curr_offset = np.linalg.norm(ball_pos - goal_center)
@@ -208,7 +206,7 @@ class Roles:
         intercept_pos = self.block_goal_center_pos(
             max_distance, enemy_pos[:2], team=self._team
         )
-        self.path_find(robot_id, intercept_pos)
+        self.request_path(robot_id, intercept_pos)
 
     # Specialized roles (penalty taker, free kick taker, etc)
 
@@ -223,7 +221,7 @@ class Roles:
             from_ball_vector = [1.5 * self.gs.ROBOT_RADIUS, 0]
         dest_x, dest_y = ball_pos + from_ball_vector
         dest_w = self.face_pos([dest_x, dest_y], ball_pos)
-        self.path_find(robot_id, [dest_x, dest_y, dest_w])
+        self.request_path(robot_id, [dest_x, dest_y, dest_w])
 
     def penalty_goalie(self, robot_id):
         goal_top, goal_bottom = self.gs.get_defense_goal(self._team)
@@ -249,10 +247,9 @@ class Roles:
     def indirect_freekicker(self, robot_id):
         team = self._team
         if self.gs.ball_in_dribbler(team, robot_id):
-            team_position_data = self.gs.get_team_positions(team)
             team_posns = {}
-            for id, pos_data in team_position_data.items():
-                team_posns[id] = pos_data[0][1]
+            for id in self.gs.get_active_robot_ids(team):
+                team_posns[id] = self.gs.get_robot_position(team, id)
             best_teammates = sorted(
                 team_posns.items(),
                 key=lambda x: self.rate_pass_pos(x[1], x[0]),
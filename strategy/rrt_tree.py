@@ -0,0 +1,106 @@
+import math
+import numpy as np
+
+# side of the cells of the nearest node grid (mm), about the distance
+# the RRT extends per node
+RRT_GRID_CELL_SIZE = 500
+# trees smaller than this just check all the nodes
+RRT_GRID_MIN_NODES = 32
+
+
+class RRTTree(object):
+    """
+    Nodes of an RRT, kept in preallocated arrays (position, parent index)
+    with a bucket grid over them, so finding the nearest node only looks
+    at the cells around a position instead of every node.
+    """
+    def __init__(self, root, max_nodes, cell_size=RRT_GRID_CELL_SIZE):
+        self.cell_size = cell_size
+        self.positions = np.empty((max_nodes + 1, 2))
+        self.parents = np.empty(max_nodes + 1, dtype=int)
+        self.size = 0
+        # cell : list of node indices
+        self._buckets = dict()
+        self._cell_min = self._cell_max = self._cell(root)
+        self.add(root, -1)
+
+    def __len__(self):
+        return self.size
+
+    def _cell(self, pos):
+        return (int(pos[0] // self.cell_size), int(pos[1] // self.cell_size))
+
+    def add(self, pos, parent):
+        "adds a node, returning its index"
+        index = self.size
+        self.positions[index] = pos[:2]
+        self.parents[index] = parent
+        self.size += 1
+        cell = self._cell(pos)
+        self._buckets.setdefault(cell, []).append(index)
+        self._cell_min = (min(self._cell_min[0], cell[0]),
+                          min(self._cell_min[1], cell[1]))
+        self._cell_max = (max(self._cell_max[0], cell[0]),
+                          max(self._cell_max[1], cell[1]))
+        return index
+
+    def _ring(self, cell, r):
+        """
+        indices of the nodes in the cells r cells away from cell, only
+        looking at the cells that have had nodes in their rows and columns
+        """
+        i, j = cell
+        (min_i, min_j), (max_i, max_j) = self._cell_min, self._cell_max
+        nodes = []
+        for di in range(max(-r, min_i - i), min(r, max_i - i) + 1):
+            if abs(di) == r:
+                # whole columns at the ends
+                djs = range(max(-r, min_j - j), min(r, max_j - j) + 1)
+            else:
+                # top and bottom cells in between
+                djs = [dj for dj in {-r, r} if min_j <= j + dj <= max_j]
+            for dj in djs:
+                nodes.extend(self._buckets.get((i + di, j + dj), []))
+        return nodes
+
+    def nearest(self, pos):
+        "index of and distance to the nearest node"
+        if self.size < RRT_GRID_MIN_NODES:
+            x, y = float(pos[0]), float(pos[1])
+            distances = [math.hypot(node_x - x, node_y - y) for node_x, node_y
+                         in self.positions[:self.size].tolist()]
+            best = min(range(self.size), key=distances.__getitem__)
+            return best, distances[best]
+        cell = self._cell(pos)
+        # rings before min_r and past max_r don't have any nodes
+        min_r = max(self._cell_min[0] - cell[0], cell[0] - self._cell_max[0],
+                    self._cell_min[1] - cell[1], cell[1] - self._cell_max[1],
+                    0)
+        max_r = max(cell[0] - self._cell_min[0], self._cell_max[0] - cell[0],
+                    cell[1] - self._cell_min[1], self._cell_max[1] - cell[1])
+        best, best_distance = -1, np.inf
+        r = min_r
+        # nodes r cells away are more than (r - 1) cells from pos
+        while r <= max_r and best_distance > (r - 1) * self.cell_size:
+            nodes = self._ring(cell, r)
+            if nodes:
+                node, distance = self._nearest_of(nodes, pos)
+                if distance < best_distance:
+                    best, best_distance = node, distance
+            r += 1
+        return best, best_distance
+
+    def _nearest_of(self, nodes, pos):
+        deltas = self.positions[nodes] - pos[:2]
+        distances = np.hypot(deltas[:, 0], deltas[:, 1])
+        k = np.argmin(distances)
+        return int(nodes[k]), distances[k]
+
+    def path_to(self, index):
+        "positions from the root (not included) to a node"
+        path = []
+        while self.parents[index] >= 0:
+            path.append(self.positions[index].copy())
+            index = self.parents[index]
+        path.reverse()
+        return path
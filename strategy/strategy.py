@@ -31,12 +31,22 @@ class Strategy(Provider, Utils, Analysis, Actions, Routines, Roles, Plays):
         assert(team in ['blue', 'yellow'])
         self._team = team
         self._strategy_name = strategy_name
-        self._owned_fields = ['_blue_robot_commands'] if team == 'blue' \
-            else ['_yellow_robot_commands']
+        self._owned_fields = [
+            '_{}_robot_commands'.format(team),
+            '_{}_command_trace'.format(team),
+        ]
+        # match the ssl-vision frame rate
+        self._target_frequency = 60
 
         # state for reducing frequency of expensive calls
         # (this also helps reduce oscillation)
         self._last_pathfind_times = {}  # robot_id : timestamp
+        # last path planned for each robot, see Actions._path_find
+        self._path_cache = {}  # robot_id : CachedPath
+        # paths asked for this tick, planned together at the end of it,
+        # see Actions.request_path
+        self._path_requests = {}  # robot_id : (goal, allow_illegal, priority)
+        self._team_paths = {}  # robot_id : CachedPath
 
     def pre_run(self):
         # print info + initial state for the mode that is running
@@ -94,12 +104,16 @@ class Strategy(Provider, Utils, Analysis, Actions, Routines, Roles, Plays):
         else:
             # self.logger.exception('(unrecognized mode, doing nothing)')
             pass
+        # one solve for all the paths the roles asked for
+        self.plan_team_paths()
         # Reset kicking commands after kick takes place and charge is zero
         # team_commands = self.gs.get_team_commands(self._team)
         for robot_id, commands in self.gs.get_team_commands(self._team).items():  # noqa
             robot_status = self.gs.get_robot_status(self._team, robot_id)
             if robot_status.charge_level == 0:
                 commands.is_kicking = False
+        # tag the commands with the vision frame they were based on
+        self.gs.update_command_trace(self._team)
 
     # follow the user-input commands through visualizer
     def UI(self):
@@ -141,7 +155,7 @@ class Strategy(Provider, Utils, Analysis, Actions, Routines, Roles, Plays):
             self.goalie(self._goalie_id)
 
     def random_robot_test(self):
-        for robot_id in self.gs.get_robot_ids(self._team):
+        for robot_id in self.gs.get_active_robot_ids(self._team):
             self.random_robot(robot_id)
 
     def attacker_test(self):
@@ -172,10 +186,10 @@ class Strategy(Provider, Utils, Analysis, Actions, Routines, Roles, Plays):
             self.defender2(ranked_dists[1][0])
         goalie_id = self.gs.get_goalie_id(self._team)
         # TODO: Fix this part
-        if goalie_id not in self.gs.get_robot_ids(self._team):
+        if goalie_id not in self.gs.get_active_robot_ids(self._team):
             goalie_id = 1
         self.goalie(goalie_id)
-        # for robot_id in self.gs.get_robot_ids(self._team):
+        # for robot_id in self.gs.get_active_robot_ids(self._team):
         #     self.defender(robot_id)
 
     def full_team_test(self):
@@ -183,13 +197,13 @@ class Strategy(Provider, Utils, Analysis, Actions, Routines, Roles, Plays):
         Test of a full team setup
         '''
         team = self._team
-        unassigned_ids = list(self.gs.get_robot_ids(team))
+        unassigned_ids = list(self.gs.get_active_robot_ids(team))
 
         # Assign goalie
         if len(unassigned_ids) > 0:
             goalie_id = self.gs.get_goalie_id(self._team)
             # TODO: Fix this part
-            if goalie_id not in self.gs.get_robot_ids(self._team):
+            if goalie_id not in self.gs.get_active_robot_ids(self._team):
                 goalie_id = 1
             unassigned_ids.remove(goalie_id)
             self.goalie(goalie_id)
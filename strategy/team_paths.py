@@ -0,0 +1,98 @@
+import numpy as np
+try:
+    from visibility_graph import segments_hit_circles, segments_hit_rectangles
+except (SystemError, ImportError):
+    from .visibility_graph import segments_hit_circles, \
+        segments_hit_rectangles
+
+# how far ahead (s) robots' paths are reserved, and how often along them
+TEAM_PLAN_HORIZON = 4
+TEAM_PLAN_STEP = .1
+# extra room kept between teammates' reserved paths (mm), since they
+# don't really go at a steady speed
+TEAM_PLAN_MARGIN = 50
+# times a robot plans around where a teammate will be before giving up
+TEAM_PLAN_DETOURS = 3
+# and how long (s) before and after running into it it plans around
+TEAM_PLAN_SWEEP = 1
+# robots wait rather than take a path running into a teammate this soon (s)
+TEAM_PLAN_WAIT = .5
+
+
+def route_positions(start, waypoints, speed, times):
+    """
+    Where a robot going from start through waypoints at speed is at each
+    of times, staying at the last waypoint once it gets there
+    """
+    route = np.array([start[:2]] + [waypoint[:2] for waypoint in waypoints],
+                     dtype=float)
+    lengths = np.hypot(*np.diff(route, axis=0).T)
+    # (np.interp needs the distances along the route to increase)
+    route = np.vstack([route[:1], route[1:][lengths > 0]])
+    along = np.concatenate([[0], np.cumsum(lengths[lengths > 0])])
+    travelled = np.minimum(np.asarray(times) * speed, along[-1])
+    return np.stack([np.interp(travelled, along, route[:, 0]),
+                     np.interp(travelled, along, route[:, 1])], axis=1)
+
+
+def is_route_clear(route, centers, radii, rectangles):
+    "whether each segment of route is clear, like VisibilityGraph.visible"
+    route = np.asarray(route, dtype=float)
+    for start, end in zip(route[:-1], route[1:]):
+        if segments_hit_circles(start, end[None], centers, radii)[0] or \
+                segments_hit_rectangles(start, end[None], rectangles)[0]:
+            return False
+    return True
+
+
+class Reservations(object):
+    """
+    Where the robots planned so far will be over the next
+    TEAM_PLAN_HORIZON seconds, every TEAM_PLAN_STEP, so the ones planned
+    after them can keep out of their way (prioritized planning).
+    """
+    def __init__(self, clearance, horizon=TEAM_PLAN_HORIZON,
+                 step=TEAM_PLAN_STEP):
+        self.clearance = clearance
+        self.times = np.arange(0, horizon, step)
+        self.ids = []
+        # (robot, time, x/y)
+        self.positions = np.empty((0, len(self.times), 2))
+
+    def add(self, robot_id, start, waypoints, speed):
+        positions = route_positions(start, waypoints, speed, self.times)
+        self.positions = np.concatenate([self.positions, positions[None]])
+        self.ids.append(robot_id)
+
+    def first_conflict(self, start, waypoints, speed):
+        """
+        (time, id) of when and which reserved robot a robot following the
+        route first gets within clearance of, None if it doesn't. Robots
+        it's already that close to don't count until they get apart,
+        there's no planning out of that.
+        """
+        positions = route_positions(start, waypoints, speed, self.times)
+        deltas = self.positions - positions[None]
+        close = np.hypot(deltas[:, :, 0], deltas[:, :, 1]) < self.clearance
+        close &= ~np.logical_and.accumulate(close, axis=1)
+        conflicts = np.flatnonzero(close.any(axis=0))
+        if not len(conflicts):
+            return None
+        t = conflicts[0]
+        return self.times[t], self.ids[np.flatnonzero(close[:, t])[0]]
+
+    def positions_around(self, robot_id, time, sweep=TEAM_PLAN_SWEEP):
+        """
+        Where a reserved robot is from sweep before time to sweep after,
+        only keeping positions at least half the clearance apart
+        """
+        robot = self.ids.index(robot_id)
+        # (times are multiples of the step, give or take rounding)
+        is_around = np.abs(self.times - time) <= sweep + 1e-6
+        positions = self.positions[robot, is_around]
+        kept = [positions[0]]
+        for position in positions[1:-1]:
+            if np.hypot(*(position - kept[-1])) >= self.clearance / 2:
+                kept.append(position)
+        kept.append(positions[-1])
+        return np.array(kept)
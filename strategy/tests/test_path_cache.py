@@ -0,0 +1,74 @@
+import numpy as np
+from ..strategy import Strategy
+from ..path_cache import segment_distances
+from gamestate import GameState
+
+
+def test_segment_distances():
+    starts = np.array([[0, 0], [0, 0]])
+    ends = np.array([[10, 0], [0, 0]])
+    points = np.array([[5, 3], [-4, 3], [20, 0]])
+    assert np.allclose(segment_distances(starts, ends, points),
+                       [[3, 5, 10], [np.hypot(5, 3), 5, 20]])
+
+
+def blocked_strategy():
+    "blue robot 1 with a yellow robot in the way of going to (1000, 0)"
+    gs = GameState()
+    gs.update_robot_position('blue', 1, np.array([-2000, 0, 0]))
+    gs.update_robot_position('yellow', 1, np.array([-1000, 0, 0]))
+    strategy = Strategy('blue', '')
+    strategy.gs = gs
+    plans = []
+    planner = strategy.greedy_waypoints
+
+    def counting_planner(start_pos, goal_pos, *args, **kwargs):
+        plans.append(np.array(start_pos[:2], dtype=float))
+        return planner(start_pos, goal_pos, *args, **kwargs)
+    strategy.greedy_waypoints = counting_planner
+    return strategy, plans
+
+
+def settle(strategy, plans, goal):
+    "path_find until the path has been checked all the way and kept"
+    for _ in range(10):
+        count = len(plans)
+        strategy.path_find(1, goal)
+        if len(plans) == count:
+            return
+    assert False, "path never settled"
+
+
+def test_reuses_path():
+    strategy, plans = blocked_strategy()
+    goal = np.array([1000, 0, 0])
+    settle(strategy, plans, goal)
+    assert np.allclose(plans[0], [-2000, 0])
+    count = len(plans)
+    waypoints = strategy.gs.get_robot_commands('blue', 1).waypoints
+    assert len(waypoints) >= 2
+    strategy.path_find(1, goal)
+    assert len(plans) == count
+    assert strategy.gs.get_robot_commands('blue', 1).waypoints is waypoints
+
+
+def test_repairs_blocked_segment():
+    strategy, plans = blocked_strategy()
+    goal = np.array([1000, 0, 0])
+    settle(strategy, plans, goal)
+    count = len(plans)
+    waypoints = strategy.gs.get_robot_commands('blue', 1).waypoints
+    # block the last segment
+    segment_start = waypoints[-2][:2].astype(float)
+    middle = (segment_start + goal[:2]) / 2
+    strategy.gs.update_robot_position('yellow', 2,
+                                      np.array([middle[0], middle[1], 0]))
+    strategy.path_find(1, goal)
+    # planned around it from the start of that segment, not the robot
+    assert len(plans) == count + 1
+    assert np.allclose(plans[-1], segment_start)
+    new_waypoints = strategy.gs.get_robot_commands('blue', 1).waypoints
+    for old, new in zip(waypoints[:-1], new_waypoints):
+        assert np.allclose(old[:2].astype(float), new[:2].astype(float))
+    assert len(new_waypoints) > len(waypoints)
+    assert np.allclose(strategy.get_goal_pos(1)[:2].astype(float), [1000, 0])
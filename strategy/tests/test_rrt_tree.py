@@ -0,0 +1,29 @@
+import numpy as np
+from ..rrt_tree import RRTTree
+
+
+def test_nearest_matches_linear_scan():
+    rng = np.random.RandomState(0)
+    tree = RRTTree(np.array([0, 0, 0]), 500)
+    for _ in range(500):
+        # spread out like an RRT, new nodes near existing ones
+        pos = tree.positions[rng.randint(len(tree))] + \
+            rng.uniform(-500, 500, 2)
+        tree.add(pos, rng.randint(len(tree)))
+    for pos in rng.uniform(-6000, 6000, (200, 2)):
+        index, distance = tree.nearest(pos)
+        deltas = tree.positions[:len(tree)] - pos
+        distances = np.hypot(deltas[:, 0], deltas[:, 1])
+        assert distance == distances.min()
+        assert distances[index] == distance
+
+
+def test_path_to():
+    tree = RRTTree(np.array([0, 0]), 3)
+    a = tree.add(np.array([1, 0]), 0)
+    tree.add(np.array([5, 5]), 0)
+    b = tree.add(np.array([2, 0]), a)
+    path = tree.path_to(b)
+    assert np.array_equal(path, [[1, 0], [2, 0]])
+    assert tree.path_to(0) == []
+    assert tree.nearest(np.array([4, 4])) == (2, np.hypot(1, 1))
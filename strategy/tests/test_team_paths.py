@@ -0,0 +1,84 @@
+import numpy as np
+from ..strategy import Strategy
+from ..team_paths import Reservations, route_positions
+from gamestate import GameState
+from gamestate.gamestate import ROBOT_LOST_TIME
+
+
+def test_route_positions():
+    positions = route_positions([0, 0], [[100, 0], [100, 0], [100, 50]], 50,
+                                [0, 1, 2.5, 10])
+    assert np.allclose(positions, [[0, 0], [50, 0], [100, 25], [100, 50]])
+
+
+def test_first_conflict():
+    reservations = Reservations(100)
+    reservations.add(1, [0, -500], [[0, 500]], 500)
+    # crossing in front of it at the same time
+    time, robot_id = reservations.first_conflict([-500, 0], [[500, 0]], 500)
+    assert .5 < time < 1 and robot_id == 1
+    positions = reservations.positions_around(1, 1, sweep=.5)
+    assert np.allclose(positions[[0, -1]], [[0, -250], [0, 250]])
+    # going along behind it
+    assert reservations.first_conflict([0, -700], [[0, 300]], 500) is None
+
+
+def crossing_strategy():
+    "blue robots 1 and 2 going across each other's way"
+    gs = GameState()
+    gs.update_robot_position('blue', 1, np.array([-1000, 0, 0]))
+    gs.update_robot_position('blue', 2, np.array([0, -1000, 0]))
+    strategy = Strategy('blue', '')
+    strategy.gs = gs
+    return strategy
+
+
+def request_crossing(strategy):
+    strategy.request_path(1, np.array([1000, 0, 0]))
+    strategy.request_path(2, np.array([0, 1000, 0]))
+
+
+def test_teammates_keep_out_of_each_others_way():
+    strategy = crossing_strategy()
+    request_crossing(strategy)
+    plans = strategy.plan_team_paths()
+    assert set(plans) == {1, 2}
+    reservations = Reservations(strategy.gs.ROBOT_RADIUS * 2)
+    for robot_id in plans:
+        start = strategy.gs.get_robot_position('blue', robot_id)
+        waypoints = strategy.get_planned_waypoints(robot_id)
+        if reservations.ids:
+            assert reservations.first_conflict(start, waypoints, 500) is None
+        reservations.add(robot_id, start, waypoints, 500)
+        assert np.allclose(strategy.get_goal_pos(robot_id)[:2].astype(float),
+                           plans[robot_id][-1][:2])
+
+
+def test_keeps_team_paths():
+    strategy = crossing_strategy()
+    request_crossing(strategy)
+    strategy.plan_team_paths()
+    waypoints = [strategy.gs.get_robot_commands('blue', robot_id).waypoints
+                 for robot_id in [1, 2]]
+    request_crossing(strategy)
+    strategy.plan_team_paths()
+    for robot_id, old in zip([1, 2], waypoints):
+        assert strategy.gs.get_robot_commands('blue', robot_id).waypoints \
+            is old
+
+
+def test_setting_waypoints_cancels_request():
+    strategy = crossing_strategy()
+    request_crossing(strategy)
+    strategy.move_straight(2, np.array([0, -500, 0]))
+    assert set(strategy.plan_team_paths()) == {1}
+    assert np.allclose(strategy.get_goal_pos(2)[:2].astype(float), [0, -500])
+
+
+def test_lost_robots_not_planned():
+    strategy = crossing_strategy()
+    now = strategy.gs.get_robot_last_update_time('blue', 2)
+    strategy.gs.sweep_lost_robots(now + ROBOT_LOST_TIME + .1)
+    strategy.gs.update_robot_position('blue', 1, np.array([-1000, 0, 0]))
+    request_crossing(strategy)
+    assert set(strategy.plan_team_paths()) == {1}
@@ -0,0 +1,62 @@
+import numpy as np
+from ..strategy import Strategy
+from ..visibility_graph import VisibilityGraph
+from gamestate import GameState
+from simulator.simulator import Simulator
+
+
+def path_length(start, path):
+    points = np.array([start] + [point[:2] for point in path], dtype=float)
+    return np.linalg.norm(np.diff(points, axis=0), axis=1).sum()
+
+
+def test_around_circle():
+    graph = VisibilityGraph([[0, 0]], [100], [])
+    path = graph.shortest_path([-500, 0], [500, 0])
+    assert len(path) > 1
+    assert np.allclose(path[-1], [500, 0])
+    # (a bit more than the tangents and arc)
+    assert 1000 < path_length([-500, 0], path) < 1100
+    # straight there if it can
+    assert np.allclose(graph.shortest_path([-500, 0], [-500, 300]),
+                       [[-500, 300]])
+
+
+def test_no_path():
+    # a wall of rectangles all the way across
+    graph = VisibilityGraph([], [], [[-10, -1000, 10, 1000]],
+                            lambda points: np.abs(points[:, 1]) < 1000)
+    assert graph.shortest_path([-500, 0], [500, 0]) is None
+
+
+def test_paths_are_clear():
+    gs = GameState()
+    rng = np.random.RandomState(0)
+    for team in ['blue', 'yellow']:
+        for robot_id in range(6):
+            pos = rng.uniform([-3500, -2500], [3500, 2500])
+            gs.update_robot_position(team, robot_id,
+                                     np.array([pos[0], pos[1], 0]))
+    strategy = Strategy('blue', '')
+    strategy.gs = gs
+    start = gs.get_robot_position('blue', 1)
+    for goal in rng.uniform([-4000, -2800], [4000, 2800], (20, 2)):
+        goal = np.array([goal[0], goal[1], 0])
+        if not gs.is_pos_valid(goal, 'blue', 1):
+            continue
+        waypoints = strategy.visibility_waypoints(start, goal, 1)
+        route = [start] + waypoints
+        for s_pos, g_pos in zip(route[:-1], route[1:]):
+            assert not strategy.is_path_blocked(s_pos, g_pos, 1)
+        assert path_length(start[:2], waypoints) >= \
+            np.linalg.norm(goal[:2] - start[:2])
+
+
+def test_surrounded():
+    simulator = Simulator("surrounded_by_opponents_test")
+    simulator.pre_run()
+    strategy = Strategy('blue', '')
+    strategy.gs = simulator.gs
+    start = simulator.gs.get_robot_position('blue', 1)
+    assert strategy.visibility_waypoints(start, np.array([0, 0, 0]),
+                                         1) is None
@@ -28,6 +28,8 @@ class Utils:
                       is_urgent: bool = False
                       ) -> None:
         """format + insert list of waypoints into robot commands"""
+        # (replacing any path asked for with request_path this tick)
+        self._path_requests.pop(robot_id, None)
         current_pos = self.gs.get_robot_position(self._team, robot_id)
         commands = self.gs.get_robot_commands(self._team, robot_id)
         for i, p in enumerate(waypoints):
@@ -0,0 +1,159 @@
+import heapq
+import numpy as np
+
+# sides of the polygons we put around robots
+VISIBILITY_CIRCLE_SIDES = 8
+# how far outside the obstacles the polygon corners are (mm), so paths
+# along their sides don't touch them
+VISIBILITY_MARGIN = 10
+
+
+def circle_corners(centers, radii, sides=VISIBILITY_CIRCLE_SIDES,
+                   margin=VISIBILITY_MARGIN):
+    "corners of polygons around each circle"
+    angles = np.arange(sides) * 2 * np.pi / sides
+    offsets = np.stack([np.cos(angles), np.sin(angles)], axis=1)
+    # the polygon sides touch a circle of radius + margin
+    corner_radii = (np.asarray(radii) + margin) / np.cos(np.pi / sides)
+    return (np.asarray(centers)[:, None, :] +
+            corner_radii[:, None, None] * offsets).reshape(-1, 2)
+
+
+def rectangle_corners(rectangles, margin=VISIBILITY_MARGIN):
+    "corners of each (min x, min y, max x, max y) rectangle, moved out"
+    corners = []
+    for min_x, min_y, max_x, max_y in np.asarray(rectangles).reshape(-1, 4):
+        corners.extend([[min_x - margin, min_y - margin],
+                        [max_x + margin, min_y - margin],
+                        [max_x + margin, max_y + margin],
+                        [min_x - margin, max_y + margin]])
+    return np.array(corners).reshape(-1, 2)
+
+
+def segments_hit_circles(start, ends, centers, radii):
+    """
+    Whether the segments from start to each of ends go inside any of the
+    circles. Like segment_collision.segment_circles_entry, moving away
+    from a circle we start in is fine.
+    """
+    directions = ends - start
+    offsets = start - centers
+    # closest point of each segment (row) to each circle (column)
+    lengths2 = (directions ** 2).sum(axis=1)[:, None]
+    along = directions @ offsets.T
+    t = np.clip(-along / np.where(lengths2 == 0, 1, lengths2), 0, 1)
+    closest = offsets[None] + t[:, :, None] * directions[:, None, :]
+    inside = (closest ** 2).sum(axis=2) < np.square(radii)
+    starts_inside = (offsets ** 2).sum(axis=1) < np.square(radii)
+    moving_away = along >= 0
+    return (inside & ~(starts_inside & moving_away)).any(axis=1)
+
+
+def segments_hit_rectangles(start, ends, rectangles):
+    """
+    Whether the segments from start to each of ends touch any of the
+    rectangles (the same slab test as segment_collision)
+    """
+    hit = np.zeros(len(ends), dtype=bool)
+    directions = ends - start
+    for rectangle in np.asarray(rectangles).reshape(-1, 4):
+        enter = np.zeros(len(ends))
+        leave = np.ones(len(ends))
+        for axis in range(2):
+            low, high = rectangle[axis], rectangle[axis + 2]
+            direction = directions[:, axis]
+            parallel = direction == 0
+            safe = np.where(parallel, 1, direction)
+            t1 = (low - start[axis]) / safe
+            t2 = (high - start[axis]) / safe
+            outside = parallel & ~((low <= start[axis]) &
+                                   (start[axis] <= high))
+            enter = np.maximum(enter, np.where(
+                parallel, np.where(outside, np.inf, -np.inf),
+                np.minimum(t1, t2)))
+            leave = np.minimum(leave, np.where(
+                parallel, np.where(outside, -np.inf, np.inf),
+                np.maximum(t1, t2)))
+        hit |= enter <= leave
+    return hit
+
+
+class VisibilityGraph(object):
+    """
+    Shortest paths around circles and rectangles, with A* over the
+    corners of polygons around them (the visibility graph). Edges are
+    only worked out for the nodes A* expands.
+    """
+    def __init__(self, centers, radii, rectangles, is_node_allowed=None):
+        self.centers = np.asarray(centers, dtype=float).reshape(-1, 2)
+        self.radii = np.asarray(radii, dtype=float)
+        self.rectangles = np.asarray(rectangles, dtype=float).reshape(-1, 4)
+        corners = np.vstack([circle_corners(self.centers, self.radii),
+                             rectangle_corners(self.rectangles)])
+        # corners inside other obstacles (or not allowed) can't be used
+        usable = ~self._inside(corners)
+        if is_node_allowed is not None and len(corners):
+            usable &= is_node_allowed(corners)
+        self.corners = corners[usable]
+
+    def _inside(self, points):
+        deltas = points[:, None, :] - self.centers[None]
+        in_circles = ((deltas ** 2).sum(axis=2) <
+                      np.square(self.radii)).any(axis=1)
+        r = self.rectangles
+        in_rectangles = ((r[:, 0] <= points[:, :1]) &
+                         (points[:, :1] <= r[:, 2]) &
+                         (r[:, 1] <= points[:, 1:]) &
+                         (points[:, 1:] <= r[:, 3])).any(axis=1)
+        return in_circles | in_rectangles
+
+    def visible(self, start, ends):
+        "whether the straight path from start to each of ends is clear"
+        ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+        return ~(segments_hit_circles(start, ends, self.centers,
+                                      self.radii) |
+                 segments_hit_rectangles(start, ends, self.rectangles))
+
+    def shortest_path(self, start, goal):
+        """
+        Points from start (not included) to goal along the shortest
+        path, None if there is none
+        """
+        start = np.asarray(start, dtype=float)[:2]
+        goal = np.asarray(goal, dtype=float)[:2]
+        nodes = np.vstack([start, goal, self.corners])
+        GOAL = 1
+        heuristic = np.hypot(*(nodes - goal).T)
+        distances = np.full(len(nodes), np.inf)
+        distances[0] = 0
+        previous = np.full(len(nodes), -1)
+        closed = np.zeros(len(nodes), dtype=bool)
+        queue = [(heuristic[0], 0)]
+        while queue:
+            _, node = heapq.heappop(queue)
+            if closed[node]:
+                continue
+            if node == GOAL:
+                break
+            closed[node] = True
+            candidates = np.flatnonzero(~closed)
+            candidates = candidates[self.visible(nodes[node],
+                                                 nodes[candidates])]
+            lengths = distances[node] + np.hypot(
+                *(nodes[candidates] - nodes[node]).T)
+            better = lengths < distances[candidates]
+            for candidate, length in zip(candidates[better],
+                                         lengths[better]):
+                distances[candidate] = length
+                previous[candidate] = node
+                heapq.heappush(queue,
+                               (length + heuristic[candidate], candidate))
+        if previous[GOAL] < 0:
+            return None
+        path = []
+        node = GOAL
+        while node != 0:
+            path.append(nodes[node])
+            node = previous[node]
+        path.reverse()
+        return path
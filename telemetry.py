@@ -0,0 +1,157 @@
+"""Lightweight timing statistics for providers, so we can tell which
+provider is the bottleneck during a real match.
+Each provider keeps a ProviderTelemetry object, and periodically sends
+its summary to the coordinator which writes it to a metrics file.
+"""
+import json
+import time
+import numpy as np
+
+# Histogram buckets are log spaced between these (in seconds). Anything
+# outside ends up in the first/last bucket, but min/max are still exact.
+MIN_BUCKET_TIME = 1e-6
+MAX_BUCKET_TIME = 10
+NUM_BUCKETS = 200
+
+# The timings recorded by every provider
+PROVIDER_METRICS = [
+    'run',  # time spent in run()
+    'queue_wait',  # time blocked waiting for the coordinator's data
+    'update',  # time applying the coordinator's data to our gamestate
+    'send',  # time sending our fields back to the coordinator
+    'loop',  # time between consecutive run() calls
+]
+
+
+class LatencyHistogram(object):
+    """
+    Fixed size histogram of durations, so we can record every loop
+    without memory growing over a match. Percentiles are approximate
+    (to within a bucket, ~7%), count/mean/max are exact.
+    """
+    EDGES = np.geomspace(MIN_BUCKET_TIME, MAX_BUCKET_TIME, NUM_BUCKETS + 1)
+
+    def __init__(self):
+        self.counts = np.zeros(NUM_BUCKETS, dtype=np.int64)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, duration):
+        i = np.searchsorted(self.EDGES, duration, side='right') - 1
+        self.counts[min(max(i, 0), NUM_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+
+    def percentile(self, p):
+        """
+        Returns the approximate p-th percentile (0-100) of the recorded
+        durations, using the upper edge of the bucket it falls in.
+        """
+        if self.count == 0:
+            return 0
+        target = p / 100 * self.count
+        i = np.searchsorted(np.cumsum(self.counts), target, side='left')
+        i = min(i, NUM_BUCKETS - 1)
+        return min(float(self.EDGES[i + 1]), self.max)
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
+
+
+class ProviderTelemetry(object):
+    """
+    A histogram of each timing metric of a provider
+    """
+    def __init__(self, name, metrics=PROVIDER_METRICS):
+        self.name = name
+        self.start_time = time.time()
+        self.histograms = {m: LatencyHistogram() for m in metrics}
+
+    def record(self, metric, duration):
+        if metric not in self.histograms:
+            self.histograms[metric] = LatencyHistogram()
+        self.histograms[metric].record(duration)
+
+    def summary(self):
+        """
+        A plain dict (safe to pickle/json) of the stats of every metric
+        """
+        return {
+            'name': self.name,
+            'time': time.time(),
+            'uptime': time.time() - self.start_time,
+            'metrics': {m: h.summary() for m, h in self.histograms.items()},
+        }
+
+
+# Stages of the latency from a camera frame to the robots acting on it,
+# as (metric, start stamp, end stamp) of the traces stored in the gamestate
+# (see GameState.update_vision_trace). Note t_capture comes from the
+# ssl-vision computer's clock, so stages using it assume clocks are synced.
+LATENCY_STAGES = [
+    ('latency_capture_to_receive', 't_capture', 't_receive'),
+    ('latency_receive_to_gamestate', 't_receive', 't_gamestate'),
+    ('latency_gamestate_to_command', 't_gamestate', 't_command'),
+    ('latency_command_to_actuation', 't_command', 't_actuation'),
+    ('latency_receive_to_actuation', 't_receive', 't_actuation'),
+    ('latency_capture_to_actuation', 't_capture', 't_actuation'),
+]
+
+
+def record_latencies(telemetry, trace, actuation_time=None):
+    """
+    Records the latency of each stage of a command trace, once the
+    commands have been sent to the robots (at actuation_time)
+    """
+    if actuation_time is None:
+        actuation_time = time.time()
+    trace = dict(trace, t_actuation=actuation_time)
+    for metric, start, end in LATENCY_STAGES:
+        telemetry.record(metric, trace[end] - trace[start])
+
+
+def latency_report(summaries):
+    """
+    Picks the latency metrics out of provider summaries, as
+    provider name : metric : stats
+    """
+    report = dict()
+    for name, summary in summaries.items():
+        latencies = {m: stats for m, stats in summary['metrics'].items()
+                     if m.startswith('latency_')}
+        if latencies:
+            report[name] = latencies
+    return report
+
+
+def write_metrics(f, summaries):
+    """
+    Appends the provider summaries as one json line to an open file
+    """
+    f.write(json.dumps({'time': time.time(), 'providers': summaries}) + '\n')
+    f.flush()
+
+
+def format_summary(summary):
+    """
+    A short human readable version of a summary, times in ms
+    """
+    lines = ['%s:' % summary['name']]
+    for metric, stats in summary['metrics'].items():
+        if not stats['count']:
+            continue
+        lines.append(
+            '  %-28s n=%-6d p50=%.2f p95=%.2f p99=%.2f max=%.2f' % (
+                metric, stats['count'], stats['p50'] * 1000,
+                stats['p95'] * 1000, stats['p99'] * 1000,
+                stats['max'] * 1000))
+    return '\n'.join(lines)
@@ -0,0 +1,21 @@
+import pytest
+from ..coordinator import Coordinator
+from ..simulator import Simulator
+from ..strategy import Strategy
+
+
+def run_lockstep(seed):
+    coordinator = Coordinator(
+        [Simulator('full_teams'), Strategy('blue', 'full_team_test')],
+        lockstep=True, lockstep_dt=.02, max_ticks=25, lockstep_seed=seed)
+    coordinator.start_game()
+    return coordinator.gamestate
+
+
+def test_same_seed_same_game(tmp_path, monkeypatch):
+    # (the providers log to logs/ in the working directory)
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'logs').mkdir()
+    first, second = run_lockstep(1), run_lockstep(1)
+    assert first.clock() == second.clock() == pytest.approx(25 * .02)
+    assert first.encode_snapshot() == second.encode_snapshot()
@@ -0,0 +1,54 @@
+import logging
+import threading
+from ..log_pipeline import LogPipeline
+
+
+class ThreadRecordingHandler(logging.Handler):
+    "keeps the messages it writes, and which threads wrote them"
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.messages.append(self.format(record))
+        self.threads.add(threading.get_ident())
+
+
+def test_flood_stays_off_calling_thread():
+    # like the robocup.log handler main.setup_logging puts on the root
+    root_handler = ThreadRecordingHandler()
+    logging.getLogger().addHandler(root_handler)
+    logger = logging.getLogger('test_flood_stays_off_calling_thread')
+    logger.setLevel(logging.DEBUG)
+    handler = ThreadRecordingHandler()
+    try:
+        pipeline = LogPipeline(logger, [handler], rate_limit=10)
+        for i in range(1000):
+            logger.debug("record %d", i)
+        pipeline.stop()
+    finally:
+        logging.getLogger().removeHandler(root_handler)
+    assert threading.get_ident() not in handler.threads | root_handler.threads
+    # the root handler gets the same (rate limited) records
+    assert len(root_handler.messages) == len(handler.messages) < 1000
+    assert pipeline.dropped() > 0
+    assert logger.propagate
+
+
+def test_arguments_logged_as_they_were():
+    logger = logging.getLogger('test_arguments_logged_as_they_were')
+    logger.setLevel(logging.DEBUG)
+    handler = ThreadRecordingHandler()
+    pipeline = LogPipeline(logger, [handler])
+    position = [0, 0]
+    logger.info("position %s", position)
+    position[0] = 100
+    try:
+        raise ValueError("lost")
+    except ValueError:
+        logger.exception("failed")
+    pipeline.stop()
+    assert handler.messages[0] == "position [0, 0]"
+    assert handler.messages[1].startswith("failed\nTraceback")
+    assert "ValueError: lost" in handler.messages[1]
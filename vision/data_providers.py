@@ -2,6 +2,7 @@
 '''A class to provide robot position data from the cameras'''
 import sslclient
 import threading
+import time
 import numpy as np
 from collections import Counter
 from typing import Tuple
@@ -25,11 +26,21 @@ class SSLVisionDataProvider(Provider):
             2: sslclient_detection(),
             3: sslclient_detection(),
         }
+        # camera_id : local time the latest raw data was received
+        self._receive_times = dict()
+        # frame of the latest data we put in the gamestate, for tracing
+        self._last_traced_frame = None
         self._owned_fields = [
             '_ball_position',
             '_blue_robot_positions',
-            '_yellow_robot_positions'
+            '_yellow_robot_positions',
+            '_robot_states',
+            '_vision_trace',
         ]
+        # vision only writes to the gamestate
+        self._subscribed_fields = []
+        # ssl-vision cameras run at 60fps
+        self._target_frequency = 60
 
     def pre_run(self):
         """Starts listen to SSL-vision and updating gamestate with new data"""
@@ -57,6 +68,7 @@ class SSLVisionDataProvider(Provider):
             if data.HasField('detection'):
                 cid = data.detection.camera_id
                 self._raw_camera_data[cid] = data.detection
+                self._receive_times[cid] = time.time()
 
     def run(self):
         # update positions of all robots seen by data feed
@@ -69,6 +81,20 @@ class SSLVisionDataProvider(Provider):
         ball_data = self._get_ball_position()
         if ball_data is not None:
             self.gs.update_ball_position(ball_data)
+        self.gs.sweep_lost_robots()
+        self._update_trace()
+
+    def _update_trace(self):
+        "Tags the gamestate with the newest camera frame we have used"
+        if not self._receive_times:
+            return
+        cid = max(self._receive_times, key=self._receive_times.get)
+        frame = self._raw_camera_data[cid]
+        if (cid, frame.frame_number) == self._last_traced_frame:
+            return
+        self._last_traced_frame = (cid, frame.frame_number)
+        self.gs.update_vision_trace(frame.frame_number, frame.t_capture,
+                                    self._receive_times[cid])
 
     def get_robot_positions(self, team='blue'):
         robot_positions = {}
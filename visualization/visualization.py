@@ -1,5 +1,4 @@
 import math
-import time
 import numpy as np
 from coordinator import Provider
 import pygame
@@ -54,9 +53,11 @@ class Visualizer(Provider):
         self.user_click_up = None
 
         self._owned_fields = ['viz_inputs']
+        self._target_frequency = 20
 
     def initialize(self):
-        self.gs = self.data_in_q.get()
+        # wait for the first gamestate from the coordinator
+        self._update_gamestate(timeout=None)
 
         # derive screen dimentions from field dimensions
         self._TOTAL_SCREEN_WIDTH = \
@@ -209,7 +210,6 @@ class Visualizer(Provider):
         self._viewer.fill(FIELD_COLOR)
         self.render()
         pygame.display.flip()
-        time.sleep(0.05)
 
     def select_ball(self):
         self.gs.viz_inputs['user_selected_ball'] = True
@@ -309,7 +309,7 @@ class Visualizer(Provider):
             # mouse_pos = self.screen_to_field(pygame.mouse.get_pos())
 
             # draw where we think ball will be in 1s
-            predicted_pos = self.gs.predict_ball_pos(1)
+            predicted_pos = self.gs.get_ball_trajectory().position_at(1)
             self.draw_circle((0, 0, 0), predicted_pos, self.gs.BALL_RADIUS)
             # draw actual ball
             self.draw_circle(BALL_COLOR, ball_pos, self.gs.BALL_RADIUS)